@@ -0,0 +1,86 @@
+"""Measures how long the GUI thread is blocked by key presses whose actions are slow, when the
+actions run on the GUI thread (like handle_keypress used to) and when they run on the action
+executor.
+
+Every key writes a short text (simulated by a sleep, as keyboard_write waits after every
+character) and calls a Home Assistant service (simulated by a sleep, as call_service waits for the
+response). The keys are pressed one after the other, as fast as the GUI handles them.
+
+Usage: poetry run python scripts/benchmarks/action_executor.py
+"""
+
+import threading
+import time
+from typing import Callable, List
+
+from streamdeck_ui.action_executor import BACKGROUND_LANE, KEYBOARD_LANE, ActionExecutor
+
+SERIAL_NUMBER = "AL12H1A00000"
+"Serial number of the simulated Stream Deck"
+KEYS = 8
+"Number of keys pressed"
+WRITE_TIME = 0.1
+"Time it takes to write the text of a key, in seconds"
+SERVICE_CALL_TIME = 0.1
+"Time it takes to call the Home Assistant service of a key, in seconds"
+
+
+def write(_cancelled: threading.Event) -> None:
+    time.sleep(WRITE_TIME)
+
+
+def call_service(_cancelled: threading.Event) -> None:
+    time.sleep(SERVICE_CALL_TIME)
+
+
+def press_inline(key: int) -> None:
+    write(threading.Event())
+    call_service(threading.Event())
+
+
+def measure(press: Callable[[int], None], wait_until_done: Callable[[], None]):
+    """Returns the time each press blocked the GUI thread, and the time until every action was
+    done, in ms."""
+    blocked: List[float] = []
+    start = time.perf_counter()
+    for key in range(KEYS):
+        press_start = time.perf_counter()
+        press(key)
+        blocked.append(time.perf_counter() - press_start)
+    wait_until_done()
+    done = time.perf_counter() - start
+    return sum(blocked) / KEYS * 1000, max(blocked) * 1000, done * 1000
+
+
+def main():
+    executor = ActionExecutor()
+
+    def press_with_executor(key: int) -> None:
+        executor.submit(SERIAL_NUMBER, key, KEYBOARD_LANE, write)
+        executor.submit(SERIAL_NUMBER, key, BACKGROUND_LANE, call_service)
+
+    def wait_for_executor() -> None:
+        while True:
+            stats = executor.get_stats()
+            if not stats.pending and not stats.running:
+                return
+            time.sleep(0.001)
+
+    print(f"{'actions':>9} {'blocked':>10} {'max blocked':>12} {'all done':>10}")
+    for name, press, wait_until_done in (
+        ("inline", press_inline, lambda: None),
+        ("executor", press_with_executor, wait_for_executor),
+    ):
+        average_ms, maximum_ms, done_ms = measure(press, wait_until_done)
+        print(f"{name:>9} {average_ms:>7.2f} ms {maximum_ms:>9.2f} ms {done_ms:>7.0f} ms")
+
+    stats = executor.get_stats()
+    executor.stop()
+    print(
+        f"executor: {stats.count} actions, {stats.average_wait * 1000:.1f} ms average wait, "
+        f"{stats.maximum_wait * 1000:.1f} ms maximum wait, {stats.average_run * 1000:.1f} ms average run"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measures the CPU used by the display to play an animated GIF on every key of a Stream Deck XL.
+
+By default, the frames of the loop are composited and encoded to the native format when the
+filters are set, and playing them back only selects the frame for the current time. For
+comparison, the frames are also rendered through the pipeline on every pass, as they used to be.
+
+Usage: poetry run python scripts/benchmarks/animation_playback.py
+"""
+
+import os
+import tempfile
+import threading
+import time
+from typing import List
+
+from PIL import Image
+from StreamDeck.Devices.StreamDeckXL import StreamDeckXL
+
+from streamdeck_ui.config import DEFAULT_FONT_FALLBACK_PATH
+from streamdeck_ui.display.display_grid import DisplayGrid
+from streamdeck_ui.display.image_filter import ImageFilter
+from streamdeck_ui.display.text_filter import TextFilter
+from streamdeck_ui.mock_streamdeck import StreamDeckMock
+
+FRAMES = 30
+"Number of frames of the GIF"
+FRAME_DURATION = 40
+"Duration of each frame of the GIF, in milliseconds"
+DURATION = 5.0
+"Duration of each measurement, in seconds"
+
+
+class StreamDeckXLMock(StreamDeckMock):
+    """A mock Stream Deck XL."""
+
+    KEY_COUNT = StreamDeckXL.KEY_COUNT
+    KEY_COLS = StreamDeckXL.KEY_COLS
+    KEY_ROWS = StreamDeckXL.KEY_ROWS
+    KEY_PIXEL_WIDTH = StreamDeckXL.KEY_PIXEL_WIDTH
+    KEY_PIXEL_HEIGHT = StreamDeckXL.KEY_PIXEL_HEIGHT
+    KEY_IMAGE_FORMAT = StreamDeckXL.KEY_IMAGE_FORMAT
+    KEY_FLIP = StreamDeckXL.KEY_FLIP
+    KEY_ROTATION = StreamDeckXL.KEY_ROTATION
+    DECK_TYPE = StreamDeckXL.DECK_TYPE
+
+
+def create_gif(path: str) -> None:
+    frames = [Image.new("RGB", (256, 256), (index * 8, 255 - index * 8, 128)) for index in range(FRAMES)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=FRAME_DURATION, loop=0)
+
+
+def measure(gif: str, pre_encoded: bool) -> float:
+    """Returns the average CPU usage reported by the display, in percent."""
+    deck = StreamDeckXLMock(None)
+    usage: List[int] = []
+    grid = DisplayGrid(threading.Lock(), deck, [0], lambda serial, cpu: usage.append(cpu))
+    for button in range(deck.key_count()):
+        grid.replace(
+            0,
+            button,
+            [
+                ImageFilter(gif),
+                TextFilter(f"Key {button}", DEFAULT_FONT_FALLBACK_PATH, 14, "white", "bottom", "center"),
+            ],
+        )
+        if not pre_encoded:
+            grid.pages[0][button].animation = None
+    grid.set_page(0)
+    grid.start()
+    time.sleep(DURATION)
+    grid.stop()
+    # The first report includes the first frames of the loop
+    return sum(usage[1:]) / max(len(usage) - 1, 1)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        gif = os.path.join(directory, "animation.gif")
+        create_gif(gif)
+        print(f"{'playback':>12} {'cpu':>6}")
+        print(f"{'pipeline':>12} {measure(gif, pre_encoded=False):>5.1f}%")
+        print(f"{'pre-encoded':>12} {measure(gif, pre_encoded=True):>5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
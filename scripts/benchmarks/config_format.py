@@ -0,0 +1,77 @@
+"""Compares the size of the config file, and the time it takes to write and read it back, between the
+full format (version 2, every field of every button) and the compact format (version 3, only the
+fields that don't have their default value, and only the buttons that were changed).
+
+The synthetic config has 40 pages of 32 buttons (a Stream Deck XL), and a quarter of the buttons
+have a text, an icon and a command.
+
+Usage: poetry run python scripts/benchmarks/config_format.py
+"""
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Callable, Dict
+
+from streamdeck_ui.config import CONFIG_FILE_FULL_VERSION, read_state_from_config, write_state_to_config
+from streamdeck_ui.model import ButtonMultiState, ButtonState, DeckState
+
+PAGES = 40
+"Number of pages of the synthetic config"
+BUTTONS = 32
+"Number of buttons per page"
+ROUNDS = 10
+"Number of times each format is written and read"
+
+
+def create_state() -> Dict[str, DeckState]:
+    buttons = {}
+    for page in range(PAGES):
+        buttons[page] = {}
+        for button in range(BUTTONS):
+            state = ButtonState()
+            if button % 4 == 0:
+                state = ButtonState(text=f"Key {button}", icon="~/icons/key.png", command="xdotool key F5")
+            buttons[page][button] = ButtonMultiState(state=0, states={0: state})
+    return {"AL12H1A00000": DeckState(buttons=buttons, brightness=60)}
+
+
+def write_full_config(config_file_path: str, state: Dict[str, DeckState]) -> None:
+    """Writes the config file as version 2 did"""
+    config = {
+        "state": {deck_id: asdict(deck_state) for deck_id, deck_state in state.items()},
+        "streamdeck_ui_version": CONFIG_FILE_FULL_VERSION,
+    }
+    with open(config_file_path, "w") as config_file:
+        json.dump(config, config_file, indent=4)
+
+
+def measure(config_file_path: str, write: Callable[[str, Dict[str, DeckState]], None]):
+    """Returns the size of the file, and the average time to write it and to read it back, in ms."""
+    state = create_state()
+    write_time = 0.0
+    read_time = 0.0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        write(config_file_path, state)
+        write_time += time.perf_counter() - start
+        start = time.perf_counter()
+        read_state_from_config(config_file_path)
+        read_time += time.perf_counter() - start
+    size = os.path.getsize(config_file_path)
+    return size, write_time / ROUNDS * 1000, read_time / ROUNDS * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        config_file_path = os.path.join(directory, "config.json")
+        print(f"{'format':>8} {'size':>10} {'write':>10} {'read':>10}")
+        for name, write in (("full", write_full_config), ("compact", write_state_to_config)):
+            size, write_ms, read_ms = measure(config_file_path, write)
+            print(f"{name:>8} {size / 1024:>7.0f} KB {write_ms:>7.1f} ms {read_ms:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measures how long it takes to load the config file at startup, when it is parsed (the first
+start after it changed) and when its snapshot is used instead (every other start).
+
+The synthetic configs have a growing number of pages of 32 buttons (a Stream Deck XL), and
+every button has a text, an icon and a command, so none of them is left out of the file.
+
+Usage: poetry run python scripts/benchmarks/config_startup.py
+"""
+
+import os
+import tempfile
+import time
+from typing import Dict
+
+from streamdeck_ui.config import STATE_CACHE_SUFFIX, read_state_from_config, write_state_to_config
+from streamdeck_ui.model import ButtonMultiState, ButtonState, DeckState
+
+PAGES = [10, 100, 400]
+"Number of pages of each synthetic config"
+BUTTONS = 32
+"Number of buttons per page"
+ROUNDS = 10
+"Number of times each config is loaded"
+
+
+def create_state(pages: int) -> Dict[str, DeckState]:
+    buttons = {
+        page: {
+            button: ButtonMultiState(
+                state=0,
+                states={
+                    0: ButtonState(text=f"Key {page}.{button}", icon="~/icons/key.png", command="xdotool key F5")
+                },
+            )
+            for button in range(BUTTONS)
+        }
+        for page in range(pages)
+    }
+    return {"AL12H1A00000": DeckState(buttons=buttons, brightness=60)}
+
+
+def measure(config_file_path: str, use_snapshot: bool) -> float:
+    """Returns the average time to load the config file, in ms."""
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        if not use_snapshot and os.path.exists(config_file_path + STATE_CACHE_SUFFIX):
+            os.remove(config_file_path + STATE_CACHE_SUFFIX)
+        start = time.perf_counter()
+        read_state_from_config(config_file_path)
+        elapsed += time.perf_counter() - start
+    return elapsed / ROUNDS * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        config_file_path = os.path.join(directory, "config.json")
+        print(f"{'buttons':>8} {'size':>10} {'parsed':>10} {'snapshot':>10} {'speedup':>8}")
+        for pages in PAGES:
+            write_state_to_config(config_file_path, create_state(pages))
+            size = os.path.getsize(config_file_path)
+            parsed_ms = measure(config_file_path, use_snapshot=False)
+            snapshot_ms = measure(config_file_path, use_snapshot=True)
+            print(
+                f"{pages * BUTTONS:>8} {size / 1024:>7.0f} KB {parsed_ms:>7.1f} ms {snapshot_ms:>7.1f} ms "
+                f"{parsed_ms / snapshot_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measures how key image throughput scales with the number of attached Stream Decks.
+
+Every key of every mock Stream Deck changes on every frame, and each USB write takes a fixed
+amount of time. With a single lock shared by all the Stream Decks, the total throughput stays
+flat as Stream Decks are added. With a lock per Stream Deck, it grows with the number of
+Stream Decks.
+
+Usage: poetry run python scripts/benchmarks/deck_locking.py
+"""
+
+import threading
+import time
+from typing import List
+
+from streamdeck_ui.display.display_grid import DisplayGrid
+from streamdeck_ui.display.pulse_filter import PulseFilter
+from streamdeck_ui.mock_streamdeck import StreamDeckMock
+
+USB_WRITE_TIME = 0.002
+"Simulated duration of a key image USB transfer, in seconds"
+DURATION = 3.0
+"Duration of each measurement, in seconds"
+MAX_DECKS = 4
+
+
+class SlowStreamDeck(StreamDeckMock):
+    """A mock Stream Deck that counts key image writes and simulates the USB transfer time."""
+
+    def __init__(self, serial_number: str):
+        super().__init__(None)
+        self.serial_number = serial_number
+        self.writes = 0
+
+    def get_serial_number(self):
+        return self.serial_number
+
+    def set_key_image(self, key, image):
+        time.sleep(USB_WRITE_TIME)
+        self.writes += 1
+
+
+def measure(deck_count: int, shared_lock: bool) -> float:
+    """Returns the number of key images written per second by all the Stream Decks."""
+    decks = [SlowStreamDeck(f"BENCH{index}") for index in range(deck_count)]
+    lock = threading.Lock()
+    grids: List[DisplayGrid] = []
+    for deck in decks:
+        grid = DisplayGrid(lock if shared_lock else threading.Lock(), deck, [0], lambda serial, cpu: None, fps=1000)
+        for button in range(deck.key_count()):
+            pulse = PulseFilter()
+            # Change the image on every frame
+            pulse.pulse_delay = 0
+            grid.replace(0, button, [pulse])
+        grid.set_page(0)
+        grids.append(grid)
+
+    for grid in grids:
+        grid.start()
+    start_writes = sum(deck.writes for deck in decks)
+    time.sleep(DURATION)
+    writes = sum(deck.writes for deck in decks) - start_writes
+    for grid in grids:
+        grid.stop()
+    return writes / DURATION
+
+
+def main():
+    print(f"{'decks':>5} {'shared lock':>14} {'lock per deck':>14}")
+    for deck_count in range(1, MAX_DECKS + 1):
+        shared = measure(deck_count, shared_lock=True)
+        per_deck = measure(deck_count, shared_lock=False)
+        print(f"{deck_count:>5} {shared:>10.0f} w/s {per_deck:>10.0f} w/s")
+
+
+if __name__ == "__main__":
+    main()
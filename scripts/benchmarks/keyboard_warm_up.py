@@ -0,0 +1,100 @@
+"""Measures how long the first key press after startup waits before its first key event is written,
+when the virtual keyboard is created on the first press (cold) and when it was created on a
+background thread at startup (warm).
+
+On a cold first press, the key tables are built, the uinput device is created and the keys are
+parsed before anything is written. When /dev/uinput cannot be written to, a stand-in device is
+used, which takes STAND_IN_CREATION_TIME to be created.
+
+Usage: poetry run python scripts/benchmarks/keyboard_warm_up.py
+"""
+
+import os
+import time
+from typing import List
+
+from streamdeck_ui.modules import keyboard
+
+KEYS = "ctrl+shift+t"
+"The keys of the key that is pressed"
+ROUNDS = 5
+"Number of startups measured"
+STAND_IN_CREATION_TIME = 0.05
+"Time it takes to create the stand-in device, in seconds"
+
+first_writes: List[float] = []
+"When the first event of each device was written"
+
+
+def timed_device_class():
+    """Returns the class of the virtual keyboard, which records when its first event is written"""
+    if os.access("/dev/uinput", os.W_OK):
+
+        class TimedUInput(keyboard.UInput):
+            def write(self, event_type: int, code: int, value: int) -> None:
+                if len(first_writes) < timed_device.created:
+                    first_writes.append(time.perf_counter())
+                super().write(event_type, code, value)
+
+        timed_device = TimedUInput
+    else:
+        print(f"/dev/uinput cannot be written to, using a stand-in device created in {STAND_IN_CREATION_TIME}s")
+
+        class StandInUInput:
+            def __init__(self, events: dict):
+                time.sleep(STAND_IN_CREATION_TIME)
+                self.fd = os.open(os.devnull, os.O_WRONLY)
+
+            def write(self, event_type: int, code: int, value: int) -> None:
+                if len(first_writes) < timed_device.created:
+                    first_writes.append(time.perf_counter())
+                os.write(self.fd, bytes(24))
+
+            def syn(self) -> None:
+                os.write(self.fd, bytes(24))
+
+        timed_device = StandInUInput
+    timed_device.created = 0
+    return timed_device
+
+
+def start_up(device_class) -> None:
+    """Forgets the key tables and the virtual keyboard, like a new process"""
+    keyboard._KEY_TABLES = None
+    keyboard._UINPUT = keyboard.UInputWrapper()
+    device_class.created += 1
+
+
+def first_press() -> float:
+    """Presses the key, and returns how long it took to write its first event, in ms"""
+    start = time.perf_counter()
+    keyboard.keyboard_press_keycodes(keyboard.parse_keys_as_keycodes(KEYS))
+    return (first_writes[-1] - start) * 1000
+
+
+def main():
+    device_class = timed_device_class()
+    keyboard.UInput = device_class
+    keyboard._TYPING_ENGINE.caps_lock.is_on()
+
+    cold_ms = 0.0
+    warm_ms = 0.0
+    warm_up_ms = 0.0
+    for _ in range(ROUNDS):
+        start_up(device_class)
+        cold_ms += first_press()
+
+        start_up(device_class)
+        start = time.perf_counter()
+        keyboard.prewarm_keyboard().join()
+        warm_up_ms += (time.perf_counter() - start) * 1000
+        warm_ms += first_press()
+
+    print(f"{'first press':>12} {'waits':>10}")
+    print(f"{'cold':>12} {cold_ms / ROUNDS:>7.2f} ms")
+    print(f"{'warm':>12} {warm_ms / ROUNDS:>7.2f} ms")
+    print(f"Warm up at startup: {warm_up_ms / ROUNDS:.2f} ms on a background thread")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measures what the GUI does for every key press before executing its actions, on keys that were
+never changed (so they are not stored in the configuration), and on keys that have a command and
+a combination of keys.
+
+"setdefault" reads every setting of the key (the command, keys, text to write, brightness change,
+page and state to switch to), and parses the command and the keys, like the GUI used to. Every
+read added the page, the button and its state to the configuration when they were missing,
+creating new objects even when they were not. "lookup" does the same with the read only lookups
+of the API. "table" looks up the compiled actions of the key.
+
+Usage: poetry run python scripts/benchmarks/keypress_dispatch.py
+"""
+
+import shlex
+import time
+from typing import Callable, Optional
+
+from streamdeck_ui.api import StreamDeckServer
+from streamdeck_ui.model import DEFAULT_BUTTON_STATE, ButtonMultiState, ButtonState, DeckState
+from streamdeck_ui.modules.keyboard import parse_keys_as_keycodes
+
+SERIAL_NUMBER = "AL12H1A00000"
+"Serial number of the simulated Stream Deck"
+KEYS = 32
+"Number of keys of the simulated Stream Deck"
+PRESSES = 100000
+"Number of key presses measured"
+
+
+class SetdefaultServer(StreamDeckServer):
+    """Reads the configuration like the API used to"""
+
+    def _button_multi_state_view(self, serial_number: str, page: int, button: int) -> ButtonMultiState:
+        self.state[serial_number].buttons[page] = self.state[serial_number].buttons.setdefault(page, {})
+        self.state[serial_number].buttons[page][button] = (
+            self.state[serial_number]
+            .buttons[page]
+            .setdefault(button, ButtonMultiState(state=0, states={0: DEFAULT_BUTTON_STATE}))
+        )
+        return self.state[serial_number].buttons[page][button]
+
+    def _button_state_view(
+        self, serial_number: str, page: int, button: int, state: Optional[int] = None
+    ) -> ButtonState:
+        multi_state = self._button_multi_state_view(serial_number, page, button)
+        choose_state = state or multi_state.state
+        multi_state.states[choose_state] = multi_state.states.setdefault(choose_state, DEFAULT_BUTTON_STATE)
+        return multi_state.states[choose_state]
+
+
+def press_with_getters(api: StreamDeckServer, key: int) -> None:
+    """What gui.handle_keypress used to do"""
+    page = api.get_page(SERIAL_NUMBER)
+    command = api.get_button_command(SERIAL_NUMBER, page, key)
+    keys = api.get_button_keys(SERIAL_NUMBER, page, key)
+    api.get_button_write(SERIAL_NUMBER, page, key)
+    api.get_button_change_brightness(SERIAL_NUMBER, page, key)
+    api.get_button_switch_page(SERIAL_NUMBER, page, key)
+    api.get_button_switch_state(SERIAL_NUMBER, page, key)
+    if command:
+        shlex.split(command)
+    if keys:
+        parse_keys_as_keycodes(keys)
+
+
+def press_with_table(api: StreamDeckServer, key: int) -> None:
+    """What gui.handle_keypress does"""
+    api.get_button_actions(SERIAL_NUMBER, api.get_page(SERIAL_NUMBER), key)
+
+
+def measure(api: StreamDeckServer, press: Callable[[StreamDeckServer, int], None], configured: bool):
+    """Returns the average time of a key press in µs, and the number of buttons stored in the
+    configuration afterwards."""
+    buttons = {}
+    if configured:
+        buttons = {
+            key: ButtonMultiState(states={0: ButtonState(command="xdotool key ctrl+t", keys="ctrl+shift+t, enter")})
+            for key in range(KEYS)
+        }
+    api.state = {SERIAL_NUMBER: DeckState(buttons={0: buttons})}
+    api.action_table.clear()
+    start = time.perf_counter()
+    for count in range(PRESSES):
+        press(api, count % KEYS)
+    elapsed = time.perf_counter() - start
+    stored = sum(len(buttons) for buttons in api.state[SERIAL_NUMBER].buttons.values())
+    return elapsed / PRESSES * 1000000, stored
+
+
+def main():
+    print(f"{'press':>10} {'untouched':>10} {'stored':>7} {'configured':>11}")
+    for name, api, press in (
+        ("setdefault", SetdefaultServer(), press_with_getters),
+        ("lookup", StreamDeckServer(), press_with_getters),
+        ("table", StreamDeckServer(), press_with_table),
+    ):
+        untouched_us, stored = measure(api, press, configured=False)
+        configured_us, _ = measure(api, press, configured=True)
+        print(f"{name:>10} {untouched_us:>7.2f} µs {stored:>7} {configured_us:>8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measures the time from a key press to its feedback being written to the Stream Deck.
+
+Static keys have their pressed and released frames rendered ahead of time, so the feedback is
+queued straight from the key callback. Animated keys are rendered by the next pass of the display,
+like every key used to be.
+
+Usage: poetry run python scripts/benchmarks/keypress_latency.py
+"""
+
+import threading
+import time
+
+from streamdeck_ui.display.background_color_filter import BackgroundColorFilter
+from streamdeck_ui.display.display_grid import DisplayGrid
+from streamdeck_ui.display.pulse_filter import PulseFilter
+from streamdeck_ui.mock_streamdeck import StreamDeckMock
+
+USB_WRITE_TIME = 0.002
+"Simulated duration of a key image USB transfer, in seconds"
+PRESSES = 100
+"Number of key presses (and releases) measured for each kind of key"
+
+
+class SlowStreamDeck(StreamDeckMock):
+    """A mock Stream Deck that simulates the USB transfer time."""
+
+    def set_key_image(self, key, image):
+        time.sleep(USB_WRITE_TIME)
+
+
+def measure(animated: bool) -> str:
+    deck = SlowStreamDeck(None)
+    grid = DisplayGrid(threading.Lock(), deck, [0], lambda serial, cpu: None)
+    for button in range(deck.key_count()):
+        filters = [BackgroundColorFilter("#ff0000")]
+        if animated:
+            filters.append(PulseFilter())
+        grid.replace(0, button, filters)
+    grid.set_page(0)
+    grid.start()
+
+    for press in range(PRESSES):
+        button = press % deck.key_count()
+        grid.set_keypress(button, True)
+        time.sleep(0.05)
+        grid.set_keypress(button, False)
+        time.sleep(0.05)
+
+    grid.stop()
+    stats = grid.writer.latency_stats()
+    return f"{stats.average * 1000:>8.1f} ms {stats.maximum * 1000:>8.1f} ms"
+
+
+def main():
+    print(f"{'keys':>8} {'average':>11} {'maximum':>11}")
+    print(f"{'static':>8} {measure(animated=False)}")
+    print(f"{'animated':>8} {measure(animated=True)}")
+
+
+if __name__ == "__main__":
+    main()
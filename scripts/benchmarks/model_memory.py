@@ -0,0 +1,117 @@
+"""Measures the memory used by the state of a config file with about 10000 buttons, once it is
+loaded, compared to the same state made of plain dataclasses (with a __dict__ per instance, a
+ButtonState per button and a string per field).
+
+The synthetic config is written in the full format (version 2), so every button is loaded. One
+button in five was changed, with a text, a font, colors and an alignment that many buttons have in
+common; the others have their default state.
+
+Usage: poetry run python scripts/benchmarks/model_memory.py
+"""
+
+import json
+import os
+import tempfile
+import tracemalloc
+from dataclasses import asdict, field, fields, make_dataclass
+from typing import Callable
+
+from streamdeck_ui.config import CONFIG_FILE_FULL_VERSION, read_state_from_config
+from streamdeck_ui.model import ButtonMultiState, ButtonState, DeckState
+
+PAGES = 313
+"Number of pages of the synthetic config"
+BUTTONS = 32
+"Number of buttons per page"
+CHANGED = 5
+"One button in CHANGED has a text, a font, colors and an alignment"
+
+PlainButtonState = make_dataclass(
+    "PlainButtonState",
+    [(state_field.name, state_field.type, field(default=state_field.default)) for state_field in fields(ButtonState)],
+)
+PlainButtonMultiState = make_dataclass(
+    "PlainButtonMultiState", [("state", int, field(default=0)), ("states", dict, field(default_factory=dict))]
+)
+PlainDeckState = make_dataclass(
+    "PlainDeckState",
+    [
+        (deck_field.name, deck_field.type, field(default=deck_field.default))
+        for deck_field in fields(DeckState)
+        if deck_field.name != "buttons"
+    ]
+    + [("buttons", dict, field(default_factory=dict))],
+)
+
+
+def write_config(config_file_path: str) -> None:
+    buttons = {}
+    for page in range(PAGES):
+        buttons[page] = {}
+        for button in range(BUTTONS):
+            state = ButtonState()
+            if button % CHANGED == 0:
+                state = ButtonState(
+                    text=f"Key {page}.{button}",
+                    font="/usr/share/fonts/truetype/roboto/Roboto-Bold.ttf",
+                    font_color="#ffffff",
+                    background_color="#1e1e1e",
+                    text_vertical_align="middle",
+                    text_horizontal_align="center",
+                )
+            buttons[page][button] = ButtonMultiState(state=0, states={0: state})
+    config = {
+        "state": {"AL12H1A00000": asdict(DeckState(buttons=buttons))},
+        "streamdeck_ui_version": CONFIG_FILE_FULL_VERSION,
+    }
+    with open(config_file_path, "w") as config_file:
+        json.dump(config, config_file)
+
+
+def read_plain_state(config_file_path: str) -> dict:
+    """Reads the config file into plain dataclasses"""
+    with open(config_file_path) as config_file:
+        config = json.load(config_file)
+    return {
+        deck_id: PlainDeckState(
+            buttons={
+                int(page): {
+                    int(button): PlainButtonMultiState(
+                        state=multi_state["state"],
+                        states={
+                            int(state): PlainButtonState(**values) for state, values in multi_state["states"].items()
+                        },
+                    )
+                    for button, multi_state in page_buttons.items()
+                }
+                for page, page_buttons in deck_state["buttons"].items()
+            },
+            **{name: value for name, value in deck_state.items() if name != "buttons"},
+        )
+        for deck_id, deck_state in config["state"].items()
+    }
+
+
+def measure(config_file_path: str, read: Callable[[str], dict]) -> int:
+    """Returns the number of bytes still allocated once the config file is read"""
+    tracemalloc.start()
+    state = read(config_file_path)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del state
+    return size
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        config_file_path = os.path.join(directory, "config.json")
+        write_config(config_file_path)
+        buttons = PAGES * BUTTONS
+        print(f"{'model':>8} {'memory':>10} {'per button':>12}")
+        for name, read in (("plain", read_plain_state), ("compact", read_state_from_config)):
+            size = measure(config_file_path, read)
+            print(f"{name:>8} {size / 1024 / 1024:>7.1f} MB {size / buttons:>8.0f} B")
+
+
+if __name__ == "__main__":
+    main()
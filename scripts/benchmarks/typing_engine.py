@@ -0,0 +1,103 @@
+"""Measures how fast a text is written by the "write" action, like keyboard_write used to write it
+(one character at a time, with a pause of 50 ms after each one, and every input device opened to
+read the Caps Lock state), and with the typing engine at different speeds.
+
+The virtual keyboard is a stand-in for the uinput device: it writes every event, in the format of
+the kernel, to /dev/null, so each event costs a system call like it does with uinput.
+
+Usage: poetry run python scripts/benchmarks/typing_engine.py
+"""
+
+import os
+import struct
+import time
+
+from evdev import ecodes as e
+
+from streamdeck_ui.modules.keyboard import _KEY_MAPPING, _SHIFT_KEY_MAPPING, CapsLockState, TypingEngine, compile_text
+
+TEXT = "Hello Stream Deck, this is a snippet with numbers (42), symbols: #$% and ünïcödé! " * 2
+"The text that is written"
+SPEEDS = [100, 500, 0]
+"Characters per second of the typing engine, 0 for as fast as possible"
+CHARACTERS_PER_FRAME = 4
+"Characters typed without pausing by the typing engine"
+ROUNDS = 100
+"Number of Caps Lock reads measured"
+
+
+class StandInUInput:
+    """Writes input events to /dev/null, like UInput writes them to /dev/uinput"""
+
+    def __init__(self):
+        self.fd = os.open(os.devnull, os.O_WRONLY)
+        self.events = 0
+
+    def write(self, event_type: int, code: int, value: int) -> None:
+        now = time.time()
+        os.write(self.fd, struct.pack("llHHi", int(now), int(now % 1 * 1000000), event_type, code, value))
+        self.events += 1
+
+    def syn(self) -> None:
+        self.write(e.EV_SYN, e.SYN_REPORT, 0)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def write_one_character_at_a_time(device: StandInUInput, text: str) -> None:
+    """What keyboard_write used to do, for the characters that are on the keyboard"""
+    caps_lock_is_on = CapsLockState().is_on()
+    for char in text:
+        if char not in _KEY_MAPPING:
+            continue
+        keycode = _KEY_MAPPING[char]
+        need_shift = char in _SHIFT_KEY_MAPPING
+        if char.isalpha() and caps_lock_is_on:
+            need_shift = not need_shift
+        if need_shift:
+            device.write(e.EV_KEY, e.KEY_LEFTSHIFT, 1)
+        device.write(e.EV_KEY, keycode, 1)
+        device.write(e.EV_KEY, keycode, 0)
+        if need_shift:
+            device.write(e.EV_KEY, e.KEY_LEFTSHIFT, 0)
+        device.syn()
+        time.sleep(0.05)
+
+
+def main():
+    characters = len(TEXT)
+    print(f"{'writer':>14} {'time':>10} {'characters/s':>13} {'events':>7}")
+
+    device = StandInUInput()
+    start = time.perf_counter()
+    write_one_character_at_a_time(device, TEXT)
+    elapsed = time.perf_counter() - start
+    print(f"{'one at a time':>14} {elapsed * 1000:>7.0f} ms {characters / elapsed:>13.0f} {device.events:>7}")
+    device.close()
+
+    for speed in SPEEDS:
+        device = StandInUInput()
+        engine = TypingEngine(characters_per_second=speed, characters_per_frame=CHARACTERS_PER_FRAME)
+        compile_text.cache_clear()
+        start = time.perf_counter()
+        engine.write(device, TEXT)
+        elapsed = time.perf_counter() - start
+        name = f"engine {speed or 'max'}"
+        print(f"{name:>14} {elapsed * 1000:>7.1f} ms {characters / elapsed:>13.0f} {device.events:>7}")
+        device.close()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        CapsLockState()._find_keyboard()
+    scan_us = (time.perf_counter() - start) / ROUNDS * 1000000
+    caps_lock = CapsLockState()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        caps_lock.is_on()
+    cached_us = (time.perf_counter() - start) / ROUNDS * 1000000
+    print(f"Caps Lock: {scan_us:.1f} µs opening the input devices, {cached_us:.1f} µs cached")
+
+
+if __name__ == "__main__":
+    main()
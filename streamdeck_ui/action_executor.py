@@ -0,0 +1,194 @@
+"""Runs the actions of the keys on background threads, so a key press does not block the GUI
+while keys are pressed, text is written or a command is started"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import monotonic
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from streamdeck_ui.logger import logger
+
+KEYBOARD_LANE = "keyboard"
+"Presses keys and writes text. There is a single virtual keyboard, so these actions run one at a time"
+BACKGROUND_LANE = "background"
+"Starts commands and calls Home Assistant services. These actions run concurrently"
+BACKGROUND_WORKERS = 4
+"Number of threads of the background lane"
+
+Action = Callable[[threading.Event], None]
+"""An action of a key. It is given an event that is set when the action is cancelled; long
+actions should check it and return early."""
+
+
+@dataclass
+class ActionStats:
+    pending: int = 0
+    """Number of actions waiting to run"""
+    running: int = 0
+    """Number of actions running"""
+    count: int = 0
+    """Number of actions that ran"""
+    cancelled: int = 0
+    """Number of actions that were cancelled before they ran"""
+    average_wait: float = 0
+    """Average time from the key press to the action starting, in seconds"""
+    maximum_wait: float = 0
+    """Longest time from the key press to the action starting, in seconds"""
+    average_run: float = 0
+    """Average time the actions took to run, in seconds"""
+    maximum_run: float = 0
+    """Longest time an action took to run, in seconds"""
+
+
+@dataclass
+class _QueuedAction:
+    lane: str
+    action: Action
+    cancelled: threading.Event
+    queued_at: float
+
+
+class ActionExecutor:
+    """Runs the actions of the keys on worker threads.
+
+    The actions of a key run one after the other, in the order they were submitted, so pressing a
+    key twice runs its actions twice, in order. The actions of different keys run concurrently,
+    except on the keyboard lane, where they run one at a time so the keys of two actions are not
+    mixed up.
+    """
+
+    def __init__(self, background_workers: int = BACKGROUND_WORKERS):
+        """Creates a new ActionExecutor instance
+
+        :param background_workers: The number of threads of the background lane
+        :type background_workers: int
+        """
+        self.lanes: Dict[str, ThreadPoolExecutor] = {
+            KEYBOARD_LANE: ThreadPoolExecutor(1, thread_name_prefix="keyboard"),
+            BACKGROUND_LANE: ThreadPoolExecutor(background_workers, thread_name_prefix="key-actions"),
+        }
+        self.lock = threading.Lock()
+        # Protects the queues and the statistics
+        self.queues: Dict[Tuple[str, int], Deque[_QueuedAction]] = {}
+        # Actions of each key. The first one is submitted to its lane, the others wait for it
+        self.cancel_events: Dict[Tuple[str, int], threading.Event] = {}
+        # The event given to the actions of each key, set when they are cancelled
+        self.stopped = False
+        self.stats = ActionStats()
+        self.wait_total = 0.0
+        self.run_total = 0.0
+
+    def submit(self, serial_number: str, key: int, lane: str, action: Action) -> None:
+        """Queues an action of a key. It runs once the previous actions of the key are done.
+
+        :param serial_number: The Stream Deck serial number
+        :type serial_number: str
+        :param key: The key that was pressed
+        :type key: int
+        :param lane: The lane that runs the action, KEYBOARD_LANE or BACKGROUND_LANE
+        :type lane: str
+        :param action: The action
+        :type action: Action
+        """
+        button = (serial_number, key)
+        with self.lock:
+            if self.stopped:
+                return
+            cancelled = self.cancel_events.setdefault(button, threading.Event())
+            queue = self.queues.setdefault(button, deque())
+            queue.append(_QueuedAction(lane, action, cancelled, monotonic()))
+            self.stats.pending += 1
+            if len(queue) == 1:
+                self._start(button, queue[0])
+
+    def cancel(self, serial_number: str, key: Optional[int] = None) -> None:
+        """Cancels the actions of a key, or of every key of a Stream Deck. The actions that wait are
+        dropped, and the running actions are told to stop.
+
+        :param serial_number: The Stream Deck serial number
+        :type serial_number: str
+        :param key: The key, None for every key of the Stream Deck
+        :type key: Optional[int]
+        """
+        with self.lock:
+            for button in list(self.queues):
+                if button[0] == serial_number and (key is None or button[1] == key):
+                    self._cancel(button)
+
+    def stop(self) -> None:
+        """Cancels every action, then stops the worker threads. Actions that are submitted
+        afterwards are ignored."""
+        with self.lock:
+            self.stopped = True
+            for button in list(self.queues):
+                self._cancel(button)
+        for lane in self.lanes.values():
+            lane.shutdown(wait=False)
+
+    def get_stats(self) -> ActionStats:
+        """Returns the number of actions that wait and run, and how long they took"""
+        with self.lock:
+            return ActionStats(**vars(self.stats))
+
+    def _cancel(self, button: Tuple[str, int]) -> None:
+        """Cancels the actions of a key. The lock must be held."""
+        event = self.cancel_events.pop(button, None)
+        if event is not None:
+            event.set()
+        queue = self.queues[button]
+        # The first action is already submitted to its lane, and is skipped or stopped there
+        while len(queue) > 1:
+            queue.pop()
+            self.stats.pending -= 1
+            self.stats.cancelled += 1
+
+    def _start(self, button: Tuple[str, int], queued: _QueuedAction) -> None:
+        """Submits the first action of a key to its lane. The lock must be held."""
+        try:
+            self.lanes[queued.lane].submit(self._run, button, queued)
+        except RuntimeError:
+            # The lanes were shut down
+            dropped = len(self.queues.pop(button, ()))
+            self.cancel_events.pop(button, None)
+            self.stats.pending -= dropped
+            self.stats.cancelled += dropped
+
+    def _run(self, button: Tuple[str, int], queued: _QueuedAction) -> None:
+        started = monotonic()
+        with self.lock:
+            self.stats.pending -= 1
+            skipped = queued.cancelled.is_set()
+            if skipped:
+                self.stats.cancelled += 1
+            else:
+                self.stats.running += 1
+                wait = started - queued.queued_at
+                self.wait_total += wait
+                self.stats.maximum_wait = max(self.stats.maximum_wait, wait)
+
+        try:
+            if not skipped:
+                queued.action(queued.cancelled)
+        except Exception as error:
+            logger.error(f"A key action failed: {error}")
+        finally:
+            with self.lock:
+                if not skipped:
+                    run = monotonic() - started
+                    self.run_total += run
+                    self.stats.running -= 1
+                    self.stats.count += 1
+                    self.stats.average_wait = self.wait_total / self.stats.count
+                    self.stats.average_run = self.run_total / self.stats.count
+                    self.stats.maximum_run = max(self.stats.maximum_run, run)
+                queue = self.queues.get(button)
+                if queue and queue[0] is queued:
+                    queue.popleft()
+                if queue:
+                    self._start(button, queue[0])
+                else:
+                    self.queues.pop(button, None)
+                    if self.cancel_events.get(button) is queued.cancelled:
+                        del self.cancel_events[button]
@@ -0,0 +1,146 @@
+"""Compiles what the keys do when they are pressed, so a key press does not read and parse the
+settings of the key every time"""
+
+import shlex
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from streamdeck_ui.model import DEFAULT_BUTTON_STATE, ButtonMultiState, ButtonState
+from streamdeck_ui.modules.keyboard import parse_keys_as_keycodes
+
+
+@dataclass
+class KeyActions:
+    """The actions of a state of a key, ready to be executed"""
+
+    command: str = ""
+    """Command to execute, as it is configured"""
+    command_args: List[str] = field(default_factory=list)
+    """The command, split into its arguments"""
+    command_error: str = ""
+    """Why the command cannot be split into arguments, if it cannot"""
+    keys: str = ""
+    """Combination of keys to press, as it is configured"""
+    keycodes: List[List[int]] = field(default_factory=list)
+    """Sections of key codes to press, one after the other"""
+    keys_error: str = ""
+    """Why the combination of keys cannot be parsed, if it cannot"""
+    write: str = ""
+    """Text to write"""
+    brightness_change: int = 0
+    """Brightness percent change (-/+)"""
+    switch_page: int = 0
+    """Page to switch to, as it is configured (1 for the first page), 0 for none"""
+    switch_page_index: Optional[int] = None
+    """Index of the page to switch to, None for none"""
+    switch_state: int = 0
+    """Button state to switch to, as it is configured (1 for the first state), 0 for none"""
+    switch_state_index: Optional[int] = None
+    """Index of the button state to switch to, None for none"""
+    hass_entity: str = ""
+    """Home Assistant entity of the service to call"""
+    hass_service: str = ""
+    """Home Assistant service to call"""
+
+
+NO_ACTIONS = KeyActions()
+"The actions of a key that was never changed"
+
+
+def compile_actions(button_state: ButtonState) -> KeyActions:
+    """Returns the actions of a state of a key. Errors in the command or in the keys are kept,
+    to be reported when the key is pressed."""
+    if button_state is DEFAULT_BUTTON_STATE:
+        return NO_ACTIONS
+
+    actions = KeyActions(
+        command=button_state.command,
+        keys=button_state.keys,
+        write=button_state.write,
+        brightness_change=button_state.brightness_change,
+        switch_page=button_state.switch_page,
+        switch_state=button_state.switch_state,
+        hass_entity=button_state.hass_entity,
+        hass_service=button_state.hass_service,
+    )
+    if actions.command:
+        try:
+            actions.command_args = shlex.split(actions.command)
+        except ValueError as error:
+            actions.command_error = str(error)
+    if actions.keys:
+        try:
+            actions.keycodes = parse_keys_as_keycodes(actions.keys)
+        except ValueError as error:
+            actions.keys_error = str(error)
+    if actions.switch_page:
+        actions.switch_page_index = actions.switch_page - 1
+    if actions.switch_state:
+        actions.switch_state_index = actions.switch_state - 1
+    return actions
+
+
+class ActionTable:
+    """The compiled actions of the keys, by Stream Deck, page and key, then by state.
+
+    The actions of a key are compiled the first time they are needed after the configuration is
+    loaded, or after the key is changed, so a key press is a lookup.
+
+    :param get_button: Returns the configuration of a key, given the serial number of the Stream
+    Deck, the page and the key. It must not add the key to the configuration.
+    """
+
+    def __init__(self, get_button: Callable[[str, int, int], ButtonMultiState]):
+        self.get_button = get_button
+        self.actions: Dict[Tuple[str, int, int], Dict[int, KeyActions]] = {}
+        self.generation = 0
+        # Incremented whenever actions are forgotten. Keys are changed from other threads (such
+        # as Home Assistant updates), and actions compiled before a change must not be kept.
+        self.lock = threading.Lock()
+        # Protects generation, and changes to actions
+
+    def get(self, serial_number: str, page: int, button: int, state: int) -> KeyActions:
+        """Returns the actions of a state of a key
+
+        :param serial_number: The Stream Deck serial number
+        :type serial_number: str
+        :param page: The page of the key
+        :type page: int
+        :param button: The key
+        :type button: int
+        :param state: The state of the key
+        :type state: int
+        :return: The actions, NO_ACTIONS if the state does not exist
+        :rtype: KeyActions
+        """
+        key = (serial_number, page, button)
+        states = self.actions.get(key)
+        if states is None:
+            generation = self.generation
+            states = {
+                state_id: compile_actions(button_state)
+                for state_id, button_state in self.get_button(serial_number, page, button).states.items()
+            }
+            with self.lock:
+                if generation == self.generation:
+                    self.actions[key] = states
+        return states.get(state, NO_ACTIONS)
+
+    def invalidate(self, serial_number: str, page: Optional[int] = None, button: Optional[int] = None) -> None:
+        """Forgets the compiled actions of a key, of the keys of a page, or of the keys of a Stream
+        Deck, after they changed"""
+        with self.lock:
+            self.generation += 1
+            if page is not None and button is not None:
+                self.actions.pop((serial_number, page, button), None)
+                return
+            for key in list(self.actions):
+                if key[0] == serial_number and (page is None or key[1] == page):
+                    del self.actions[key]
+
+    def clear(self) -> None:
+        """Forgets the compiled actions of every key"""
+        with self.lock:
+            self.generation += 1
+            self.actions.clear()
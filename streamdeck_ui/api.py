@@ -12,6 +12,8 @@ from PySide6.QtGui import QImage, QPixmap
 from StreamDeck.Devices import StreamDeck
 from StreamDeck.Transport.Transport import TransportError
 
+from streamdeck_ui.action_executor import ActionExecutor
+from streamdeck_ui.actions import ActionTable, KeyActions
 from streamdeck_ui.config import (
     DEFAULT_BACKGROUND_COLOR,
     DEFAULT_FONT,
@@ -19,6 +21,7 @@ from streamdeck_ui.config import (
     DEFAULT_FONT_SIZE,
     FONTS_PATH,
     STATE_FILE,
+    StateChange,
     read_state_from_config,
     write_state_to_config,
 )
@@ -26,16 +29,25 @@ from streamdeck_ui.dimmer import Dimmer
 from streamdeck_ui.display.background_color_filter import BackgroundColorFilter
 from streamdeck_ui.display.display_grid import DisplayGrid
 from streamdeck_ui.display.filter import Filter
+from streamdeck_ui.display.frame_store import frame_store
+from streamdeck_ui.display.icon_cache import icon_cache
 from streamdeck_ui.display.image_filter import ImageFilter
 from streamdeck_ui.display.text_filter import TextFilter
 from streamdeck_ui.homeassistant import HomeAssistant
 from streamdeck_ui.logger import logger
-from streamdeck_ui.model import ButtonMultiState, ButtonState, DeckState
+from streamdeck_ui.model import DEFAULT_BUTTON_STATE, ButtonMultiState, ButtonState, DeckState
+from streamdeck_ui.state_writer import StateWriter
 from streamdeck_ui.stream_deck_monitor import StreamDeckMonitor
+from streamdeck_ui.stream_deck_writer import StreamDeckWriter
+
+_UNTOUCHED_BUTTON = ButtonMultiState(state=0, states={0: DEFAULT_BUTTON_STATE})
+"What the read only lookups return for a button that does not exist. It must not be changed."
 
 
 class KeySignalEmitter(QObject):
     key_pressed = Signal(str, int, bool)
+    action_failed = Signal(str)
+    "A signal that is raised whenever a key action that runs in the background fails, with a message for the user"
 
 
 class StreamDeckSignalEmitter(QObject):
@@ -64,7 +76,13 @@ class StreamDeckServer:
     "Lock to serialize key press events"
 
     lock: threading.Lock = threading.Lock()
-    "Lock to coordinate polling, updates etc to Stream Decks"
+    "Lock to serialize the enumeration of Stream Decks"
+
+    deck_locks: Dict[str, threading.Lock] = {}
+    "Lookup with serial number for the lock that serializes reads and writes to each Stream Deck"
+
+    writers: Dict[str, StreamDeckWriter] = {}
+    "Lookup with serial number for the writer that owns the USB transport of each Stream Deck"
 
     display_handlers: Dict[str, DisplayGrid] = {}
     "Lookup with serial number for each Stream Deck display handler"
@@ -90,7 +108,14 @@ class StreamDeckServer:
         self.display_handlers: Dict[str, DisplayGrid] = {}
 
         self.lock: threading.Lock = threading.Lock()
+        self.deck_locks: Dict[str, threading.Lock] = {}
+        self.writers: Dict[str, StreamDeckWriter] = {}
         self.dimmers: Dict[str, Dimmer] = {}
+        self.state_writer = StateWriter(STATE_FILE, lambda: self.state)
+        # Writes the configuration in the background, once per burst of changes
+        self.action_table = ActionTable(self._button_multi_state_view)
+        self.action_executor = ActionExecutor()
+        # Runs the actions of the keys that would block the GUI
 
         # REVIEW: Should we just create one signal emitter for
         # plug events and key signals?
@@ -151,6 +176,27 @@ class StreamDeckServer:
         """
         self.plugevents.cpu_changed.emit(serial_number, cpu_usage)
 
+        display_handler = self.display_handlers.get(serial_number, None)
+        if display_handler:
+            logger.debug(f"Frame cache for {serial_number}: {display_handler.frame_cache.stats()}")
+            logger.debug(f"Pipeline cache for {serial_number}: {display_handler.output_cache_budget.stats()}")
+            logger.debug(f"Icon cache: {icon_cache.stats()}")
+            logger.debug(f"Frame store: {frame_store.stats()}")
+            logger.debug(f"Skipped key writes for {serial_number}: {display_handler.skipped_writes}")
+            writer = display_handler.writer
+            logger.debug(f"Key writes for {serial_number}: {writer.writes} written, {writer.replaced} replaced")
+            latency = writer.latency_stats()
+            logger.debug(
+                f"Key press feedback for {serial_number}: {latency.count} written, "
+                f"{latency.average * 1000:.1f} ms average, {latency.maximum * 1000:.1f} ms maximum"
+            )
+        actions = self.action_executor.get_stats()
+        logger.debug(
+            f"Key actions: {actions.count} run, {actions.pending} pending, {actions.running} running, "
+            f"{actions.cancelled} cancelled, {actions.average_wait * 1000:.1f} ms average wait, "
+            f"{actions.maximum_wait * 1000:.1f} ms maximum wait, {actions.average_run * 1000:.1f} ms average run"
+        )
+
     def _key_change_callback(self, serial_number: str, _deck: StreamDeck.StreamDeck, key: int, state: bool) -> None:
         """Callback whenever a key is pressed.
 
@@ -180,13 +226,35 @@ class StreamDeckServer:
         self.state[serial_number].display_timeout = timeout
         self.dimmers[serial_number].timeout = timeout
 
-        self._save_state()
+        self._save_state(self._deck_change(serial_number, "display_timeout"))
+
+    def _save_state(self, change: Optional[StateChange] = None):
+        """Schedules saving the configuration, after it changed. The compiled actions of the button
+        that changed are forgotten, or those of every button if it is not known which one changed.
 
-    def _save_state(self):
-        self.export_config(STATE_FILE)
+        :param change: The change that was made, when a single field changed. It allows saving only
+        the change, see StateWriter.
+        :type change: StateChange, optional
+        """
+        if change is None:
+            self.action_table.clear()
+        elif change.button is not None:
+            self.action_table.invalidate(change.deck, change.page, change.button)
+        self.state_writer.mark_dirty(change)
+
+    def _button_change(self, serial_number: str, page: int, button: int, field: str) -> StateChange:
+        """Describes the new value of a field of the current state of a button"""
+        multi_state = self._button_multi_state_view(serial_number, page, button)
+        value = getattr(self._button_state_view(serial_number, page, button), field)
+        return StateChange(serial_number, page, button, multi_state.state, field, value)
+
+    def _deck_change(self, serial_number: str, field: str) -> StateChange:
+        """Describes the new value of a field of a Stream Deck"""
+        return StateChange(serial_number, None, None, None, field, getattr(self.state[serial_number], field))
 
     def open_config(self, config_file: str):
         self.state = read_state_from_config(config_file)
+        self.action_table.clear()
 
         first_deck_id = next(iter(self.state))
 
@@ -203,6 +271,8 @@ class StreamDeckServer:
         self.start()
 
     def export_config(self, output_file: str) -> None:
+        # Changes that are not saved yet go to the state file first
+        self.state_writer.flush()
         write_state_to_config(output_file, self.state)
 
     def _on_steam_deck_attached(self, streamdeck_id: str, streamdeck: StreamDeck):
@@ -212,6 +282,8 @@ class StreamDeckServer:
 
         self.decks_map_id_to_serial[streamdeck_id] = serial_number
         self.decks_by_serial[serial_number] = streamdeck
+        self.writers[serial_number] = StreamDeckWriter(self._deck_lock(serial_number), streamdeck)
+        self.writers[serial_number].start()
 
         self.set_default_state(serial_number, streamdeck.deck_type())
         self._initialize_stream_deck_page_state(serial_number, 0, streamdeck.key_count())
@@ -223,7 +295,7 @@ class StreamDeckServer:
             self.get_display_timeout(serial_number),
             self.get_brightness(serial_number),
             self.get_brightness_dimmed(serial_number),
-            lambda brightness: self.decks_by_serial[serial_number].set_brightness(brightness),
+            partial(self._set_deck_brightness, serial_number),
         )
         self.dimmers[serial_number].reset()
 
@@ -256,7 +328,7 @@ class StreamDeckServer:
         """
         self.state[serial_number] = self.state.setdefault(serial_number, DeckState())
         for button in range(key_count):
-            self._button_state(serial_number, page, button)
+            self._button_multi_state(serial_number, page, button)
 
     def add_new_page(self, serial_number: str):
         """Adds a new page to the Stream Deck
@@ -271,6 +343,9 @@ class StreamDeckServer:
         self._initialize_stream_deck_page_state(
             serial_number, new_page_index, self.decks_by_serial[serial_number].key_count()
         )
+        # Pages are not journaled, so the state file is rewritten. This also forgets the actions
+        # of a page that was removed with the same index
+        self._save_state()
         self.synchronize_display_handlers(serial_number)
 
         return new_page_index
@@ -298,6 +373,7 @@ class StreamDeckServer:
             return
 
         del self.state[serial_number].buttons[page]
+        self._save_state()
         self.display_handlers[serial_number].remove_page(page)
 
     def _on_steam_deck_detached(self, deck_id: str):
@@ -307,6 +383,8 @@ class StreamDeckServer:
             self.plugevents.detached.emit(serial_number)
 
     def _cleanup(self, deck_id: str, serial_number: str):
+        self.action_executor.cancel(serial_number)
+
         display_grid = self.display_handlers[serial_number]
         display_grid.stop()
         del self.display_handlers[serial_number]
@@ -315,12 +393,16 @@ class StreamDeckServer:
         dimmer.stop()
         del self.dimmers[serial_number]
 
+        writer = self.writers.pop(serial_number)
+        writer.set_brightness(50)
+        writer.reset()
+        writer.stop()
+
         streamdeck = self.decks_by_serial[serial_number]
         try:
-            if streamdeck.connected():
-                streamdeck.set_brightness(50)
-                streamdeck.reset()
-                streamdeck.close()
+            with self._deck_lock(serial_number):
+                if streamdeck.connected():
+                    streamdeck.close()
         except TransportError:
             pass
 
@@ -328,57 +410,98 @@ class StreamDeckServer:
         del self.decks_map_id_to_serial[deck_id]
 
     def start(self):
+        if self.action_executor.stopped:
+            # Stopped by stop(), such as when a configuration is imported
+            self.action_executor = ActionExecutor()
         if not self.monitor:
             self.monitor = StreamDeckMonitor(self.lock, self._on_steam_deck_attached, self._on_steam_deck_detached)
         self.monitor.start()
 
     def stop(self):
+        self.action_executor.stop()
         self.monitor.stop()
+        self.state_writer.flush()
 
         if self.hass:
             self.hass.disconnect()
 
+    def _deck_lock(self, serial_number: str) -> threading.Lock:
+        """Returns the lock that serializes reads and writes to the given Stream Deck.
+        Each Stream Deck has its own lock, so that rendering and USB writes on one
+        Stream Deck do not block the others."""
+        return self.deck_locks.setdefault(serial_number, threading.Lock())
+
+    def _set_deck_brightness(self, serial_number: str, brightness: int) -> None:
+        """Sets the brightness of the Stream Deck device, without changing the configuration"""
+        writer = self.writers.get(serial_number, None)
+        if writer:
+            writer.set_brightness(brightness)
+            return
+        with self._deck_lock(serial_number):
+            self.decks_by_serial[serial_number].set_brightness(brightness)
+
     def get_deck_layout(self, serial_number: str) -> Tuple[int, int]:
         """Returns a tuple containing the number of rows and columns for the specified Stream Deck"""
         return self.decks_by_serial[serial_number].key_layout()
 
-    def _button_state(self, serial_number: str, page: int, button: int, state: Optional[int] = None) -> ButtonState:
-        multi_state = self._button_multi_state(serial_number, page, button)
+    def _button_state_view(
+        self, serial_number: str, page: int, button: int, state: Optional[int] = None
+    ) -> ButtonState:
+        """Returns a state of a button, to be read only. Nothing is added to the configuration: the
+        shared default state is returned for a button or state that does not exist."""
+        multi_state = self._button_multi_state_view(serial_number, page, button)
         # if no state is specified, use the current state
-        choose_state = state or multi_state.state
-        # if the choose state is not in the states dict, add it
-        multi_state.states[choose_state] = multi_state.states.setdefault(choose_state, ButtonState())
-        return multi_state.states[choose_state]
+        return multi_state.states.get(state or multi_state.state, DEFAULT_BUTTON_STATE)
+
+    def _editable_button_state(self, serial_number: str, page: int, button: int) -> ButtonState:
+        """Returns the current state of a button, to be changed. The button is added if it does not
+        exist, and a shared default state is copied first."""
+        multi_state = self._button_multi_state(serial_number, page, button)
+        return multi_state.editable_state(multi_state.state)
 
     def get_button_state_object(self, serial_number: str, page: int, button: int, state: int) -> ButtonState:
-        """Returns the ButtonState object for the given button"""
-        return self._button_state(serial_number, page, button, state)
+        """Returns the ButtonState object for the given button, to be read only"""
+        return self._button_state_view(serial_number, page, button, state)
+
+    def _button_multi_state_view(self, serial_number: str, page: int, button: int) -> ButtonMultiState:
+        """Returns the ButtonMultiState for the given button, to be read only. Nothing is added to
+        the configuration: a button that does not exist has the default state."""
+        buttons = self.state[serial_number].buttons
+        if page in buttons:
+            multi_state = buttons[page].get(button)
+            if multi_state is not None:
+                return multi_state
+        return _UNTOUCHED_BUTTON
 
     def _button_multi_state(self, serial_number: str, page: int, button: int) -> ButtonMultiState:
-        """Returns the ButtonMultiState for the given button"""
-        # if the page is not in the pages dict, add it
-        self.state[serial_number].buttons[page] = self.state[serial_number].buttons.setdefault(page, {})
-        # if the button is not in the buttons dict, add it with a default state
-        self.state[serial_number].buttons[page][button] = (
-            self.state[serial_number]
-            .buttons[page]
-            .setdefault(button, ButtonMultiState(state=0, states={0: ButtonState()}))
-        )
-        return self.state[serial_number].buttons[page][button]
+        """Returns the ButtonMultiState for the given button, to be changed. The page and the
+        button are added if they do not exist."""
+        buttons = self.state[serial_number].buttons.setdefault(page, {})
+        multi_state = buttons.get(button)
+        if multi_state is None:
+            multi_state = buttons[button] = ButtonMultiState(state=0, states={0: DEFAULT_BUTTON_STATE})
+        return multi_state
+
+    def get_button_actions(self, serial_number: str, page: int, button: int) -> KeyActions:
+        """Returns the compiled actions of the current state of a button, to be executed when it is pressed"""
+        state = self._button_multi_state_view(serial_number, page, button).state
+        return self.action_table.get(serial_number, page, button, state)
 
     def get_button_state(self, serial_number: str, page: int, button: int) -> int:
         """Returns the state of a button"""
-        return self._button_multi_state(serial_number, page, button).state
+        return self._button_multi_state_view(serial_number, page, button).state
 
     def get_button_states(self, serial_number: str, page: int, button: int) -> List[int]:
         """Returns the states of a button"""
-        return sorted(list(self._button_multi_state(serial_number, page, button).states.keys()))
+        return sorted(self._button_multi_state_view(serial_number, page, button).states.keys())
 
     def add_new_button_state(self, serial_number: str, page: int, button: int) -> int:
         """Adds a new button state"""
         states = self.get_button_states(serial_number, page, button)
         new_button_state_index = self._calculate_new_index(states)
-        self._button_multi_state(serial_number, page, button).states[new_button_state_index] = ButtonState()
+        self._button_multi_state(serial_number, page, button).states[new_button_state_index] = DEFAULT_BUTTON_STATE
+        # Button states are not journaled, so the state file is rewritten
+        self._save_state()
         return new_button_state_index
 
     def remove_button_state(self, serial_number: str, page: int, button: int, state: int) -> None:
@@ -386,6 +509,7 @@ class StreamDeckServer:
         if len(self.get_button_states(serial_number, page, button)) == 1:
             return
         del self._button_multi_state(serial_number, page, button).states[state]
+        self._save_state()
 
     def set_button_state(self, serial_number: str, page: int, button: int, state: int) -> None:
         """Sets the state of a button"""
@@ -393,25 +517,27 @@ class StreamDeckServer:
             states = self.get_button_states(serial_number, page, button)
             if state in states:
                 self._button_multi_state(serial_number, page, button).state = state
-                self._save_state()
+                self._save_state(StateChange(serial_number, page, button, None, "state", state))
                 self._update_button_filters(serial_number, page, button)
                 self.synchronize_display_handlers(serial_number)
 
     def get_button_switch_state(self, serial_number: str, page: int, button: int) -> int:
         """Returns the state switch set for the specified button. 0 implies no state switch."""
-        return self._button_state(serial_number, page, button).switch_state
+        return self._button_state_view(serial_number, page, button).switch_state
 
     def set_button_switch_state(self, serial_number: str, page: int, button: int, switch_state: int) -> None:
         """Sets the state switch associated with the button"""
         if self.get_button_switch_state(serial_number, page, button) != switch_state:
-            self._button_state(serial_number, page, button).switch_state = switch_state
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).switch_state = switch_state
+            self._save_state(self._button_change(serial_number, page, button, "switch_state"))
 
     def swap_buttons(self, serial_number: str, page: int, source_button: int, target_button: int) -> None:
         """Swaps the properties of the source and target buttons"""
-        temp = self.state[serial_number].buttons[page][source_button]
-        self.state[serial_number].buttons[page][source_button] = self.state[serial_number].buttons[page][target_button]
-        self.state[serial_number].buttons[page][target_button] = temp
+        # Buttons that were never changed are not in the configuration until they are swapped
+        source = self._button_multi_state(serial_number, page, source_button)
+        target = self._button_multi_state(serial_number, page, target_button)
+        buttons = self.state[serial_number].buttons[page]
+        buttons[source_button], buttons[target_button] = target, source
         self._save_state()
 
         # Update rendering for these two images
@@ -422,45 +548,45 @@ class StreamDeckServer:
     def set_button_text(self, deck_id: str, page: int, button: int, text: str) -> None:
         """Set the text associated with a button"""
         if self.get_button_text(deck_id, page, button) != text:
-            self._button_state(deck_id, page, button).text = text
-            self._save_state()
+            self._editable_button_state(deck_id, page, button).text = text
+            self._save_state(self._button_change(deck_id, page, button, "text"))
             self._update_button_filters(deck_id, page, button)
             self.synchronize_display_handlers(deck_id)
 
     def get_button_text(self, deck_id: str, page: int, button: int) -> str:
         """Returns the text set for the specified button"""
-        return self._button_state(deck_id, page, button).text
+        return self._button_state_view(deck_id, page, button).text
 
     def set_button_icon(self, deck_id: str, page: int, button: int, icon: str) -> None:
         """Sets the icon associated with a button"""
         if self.get_button_icon(deck_id, page, button) != icon:
-            self._button_state(deck_id, page, button).icon = icon
-            self._save_state()
+            self._editable_button_state(deck_id, page, button).icon = icon
+            self._save_state(self._button_change(deck_id, page, button, "icon"))
 
             self._update_button_filters(deck_id, page, button)
             self.synchronize_display_handlers(deck_id)
 
     def get_button_text_vertical_align(self, serial_number: str, page: int, button: int) -> str:
         """Gets the vertical text alignment. Values are bottom, middle-bottom, middle, middle-top, top"""
-        return self._button_state(serial_number, page, button).text_vertical_align
+        return self._button_state_view(serial_number, page, button).text_vertical_align
 
     def get_button_text_horizontal_align(self, serial_number: str, page: int, button: int) -> str:
         """Gets the horizontal text alignment. Values are left, center, right"""
-        return self._button_state(serial_number, page, button).text_horizontal_align
+        return self._button_state_view(serial_number, page, button).text_horizontal_align
 
     def set_button_text_horizontal_align(self, serial_number: str, page: int, button: int, alignment: str) -> None:
         """Gets the horizontal text alignment. Values are left, center, right"""
         if self.get_button_text_horizontal_align(serial_number, page, button) != alignment:
-            self._button_state(serial_number, page, button).text_horizontal_align = alignment
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).text_horizontal_align = alignment
+            self._save_state(self._button_change(serial_number, page, button, "text_horizontal_align"))
             self._update_button_filters(serial_number, page, button)
             self.synchronize_display_handlers(serial_number)
 
     def set_button_text_vertical_align(self, serial_number: str, page: int, button: int, alignment: str) -> None:
         """Gets the vertical text alignment. Values are bottom, middle-bottom, middle, middle-top, top"""
         if self.get_button_text_vertical_align(serial_number, page, button) != alignment:
-            self._button_state(serial_number, page, button).text_vertical_align = alignment
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).text_vertical_align = alignment
+            self._save_state(self._button_change(serial_number, page, button, "text_vertical_align"))
             self._update_button_filters(serial_number, page, button)
             self.synchronize_display_handlers(serial_number)
 
@@ -470,8 +596,8 @@ class StreamDeckServer:
             # Don't pollute .streamdeck_ui.json with entries of the default value
             if color == DEFAULT_FONT_COLOR:
                 color = ""
-            self._button_state(serial_number, page, button).font_color = color
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).font_color = color
+            self._save_state(self._button_change(serial_number, page, button, "font_color"))
             self._update_button_filters(serial_number, page, button)
 
             try:
@@ -481,7 +607,7 @@ class StreamDeckServer:
 
     def get_button_font_color(self, serial_number: str, page: int, button: int) -> str:
         """Returns the text color set for the specified button"""
-        return self._button_state(serial_number, page, button).font_color
+        return self._button_state_view(serial_number, page, button).font_color
 
     def set_button_background_color(self, serial_number: str, page: int, button: int, color: str) -> None:
         """Sets the background color associated with a button"""
@@ -489,8 +615,8 @@ class StreamDeckServer:
             # Don't pollute .streamdeck_ui.json with entries of the default value
             if color == DEFAULT_BACKGROUND_COLOR:
                 color = ""
-            self._button_state(serial_number, page, button).background_color = color
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).background_color = color
+            self._save_state(self._button_change(serial_number, page, button, "background_color"))
             self._update_button_filters(serial_number, page, button)
 
             try:
@@ -500,7 +626,7 @@ class StreamDeckServer:
 
     def get_button_background_color(self, serial_number: str, page: int, button: int) -> str:
         """Returns the background color set for the specified button"""
-        return self._button_state(serial_number, page, button).background_color
+        return self._button_state_view(serial_number, page, button).background_color
 
     def get_button_icon_pixmap(self, serial_number: str, page: int, button: int) -> Optional[QPixmap]:
         """Returns the QPixmap value for the given button (streamdeck, page, button)"""
@@ -513,27 +639,27 @@ class StreamDeckServer:
 
     def get_button_icon(self, serial_number: str, page: int, button: int) -> str:
         """Returns the icon path for the specified button"""
-        return self._button_state(serial_number, page, button).icon
+        return self._button_state_view(serial_number, page, button).icon
 
     def set_button_change_brightness(self, serial_number: str, page: int, button: int, amount: int) -> None:
         """Sets the brightness changing associated with a button"""
         if self.get_button_change_brightness(serial_number, page, button) != amount:
-            self._button_state(serial_number, page, button).brightness_change = amount
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).brightness_change = amount
+            self._save_state(self._button_change(serial_number, page, button, "brightness_change"))
 
     def get_button_change_brightness(self, serial_number: str, page: int, button: int) -> int:
         """Returns the brightness change set for a particular button"""
-        return self._button_state(serial_number, page, button).brightness_change
+        return self._button_state_view(serial_number, page, button).brightness_change
 
     def set_button_command(self, serial_number: str, page: int, button: int, command: str) -> None:
         """Sets the command associated with the button"""
         if self.get_button_command(serial_number, page, button) != command:
-            self._button_state(serial_number, page, button).command = command
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).command = command
+            self._save_state(self._button_change(serial_number, page, button, "command"))
 
     def get_button_command(self, serial_number: str, page: int, button: int) -> str:
         """Returns the command set for the specified button"""
-        return self._button_state(serial_number, page, button).command
+        return self._button_state_view(serial_number, page, button).command
 
     def set_button_hass_domain(self, serial_number: str, page: int, button: int, hass_domain: str) -> None:
         if self.button_clicked:
@@ -544,14 +670,14 @@ class StreamDeckServer:
         old = self.get_button_hass_domain(serial_number, page, button)
 
         if old != hass_domain:
-            self._button_state(serial_number, page, button).hass_domain = hass_domain
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).hass_domain = hass_domain
+            self._save_state(self._button_change(serial_number, page, button, "hass_domain"))
             self._update_button_filters(serial_number, page, button)
             self.synchronize_display_handlers(serial_number)
 
     def get_button_hass_domain(self, serial_number: str, page: int, button: int) -> str:
         """Returns the Home Assistant domain set for the specified button"""
-        return self._button_state(serial_number, page, button).hass_domain
+        return self._button_state_view(serial_number, page, button).hass_domain
 
     def set_button_hass_entity(self, serial_number: str, page: int, button: int, hass_entity: str) -> None:
         if self.button_clicked:
@@ -562,13 +688,13 @@ class StreamDeckServer:
         old = self.get_button_hass_entity(serial_number, page, button)
 
         if old != hass_entity:
-            self._button_state(serial_number, page, button).hass_entity = hass_entity
+            self._editable_button_state(serial_number, page, button).hass_entity = hass_entity
 
             if old:
                 self.hass.remove_tracked_entity(old, serial_number, page, button)
 
             self.hass.add_tracked_entity(hass_entity, serial_number, page, button)
-            self._save_state()
+            self._save_state(self._button_change(serial_number, page, button, "hass_entity"))
 
             if hass_entity:
                 entity_state = self.hass.get_state(hass_entity)
@@ -599,7 +725,7 @@ class StreamDeckServer:
 
     def get_button_hass_entity(self, serial_number: str, page: int, button: int) -> str:
         """Returns the Home Assistant entity set for the specified button"""
-        return self._button_state(serial_number, page, button).hass_entity
+        return self._button_state_view(serial_number, page, button).hass_entity
 
     def set_button_hass_service(self, serial_number: str, page: int, button: int, hass_service: str) -> None:
         if self.button_clicked:
@@ -610,8 +736,8 @@ class StreamDeckServer:
         old = self.get_button_hass_service(serial_number, page, button)
 
         if old != hass_service:
-            self._button_state(serial_number, page, button).hass_service = hass_service
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).hass_service = hass_service
+            self._save_state(self._button_change(serial_number, page, button, "hass_service"))
 
             hass_entity = self.get_button_hass_entity(serial_number, page, button)
             entity_state = self.hass.get_state(hass_entity)
@@ -633,72 +759,72 @@ class StreamDeckServer:
 
     def get_button_hass_service(self, serial_number: str, page: int, button: int) -> str:
         """Returns the Home Assistant service set for the specified button"""
-        return self._button_state(serial_number, page, button).hass_service
+        return self._button_state_view(serial_number, page, button).hass_service
 
     def set_button_switch_page(self, serial_number: str, page: int, button: int, switch_page: int) -> None:
         """Sets the page switch associated with the button"""
         if self.get_button_switch_page(serial_number, page, button) != switch_page:
-            self._button_state(serial_number, page, button).switch_page = switch_page
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).switch_page = switch_page
+            self._save_state(self._button_change(serial_number, page, button, "switch_page"))
 
     def get_button_switch_page(self, serial_number: str, page: int, button: int) -> int:
         """Returns the page switch set for the specified button. 0 implies no page switch."""
-        return self._button_state(serial_number, page, button).switch_page
+        return self._button_state_view(serial_number, page, button).switch_page
 
     def set_button_keys(self, serial_number: str, page: int, button: int, keys: str) -> None:
         """Sets the keys associated with the button"""
         if self.get_button_keys(serial_number, page, button) != keys:
-            self._button_state(serial_number, page, button).keys = keys
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).keys = keys
+            self._save_state(self._button_change(serial_number, page, button, "keys"))
 
     def set_button_font(self, serial_number: str, page: int, button: int, font: str) -> None:
         if self.get_button_font(serial_number, page, button) != font:
             # Don't pollute .streamdeck_ui.json with entries of the default value
             if font.endswith(DEFAULT_FONT):
                 font = ""
-            self._button_state(serial_number, page, button).font = font
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).font = font
+            self._save_state(self._button_change(serial_number, page, button, "font"))
             self._update_button_filters(serial_number, page, button)
             self.synchronize_display_handlers(serial_number)
 
     def get_button_font_size(self, serial_number: str, page: int, button: int) -> int:
         """Returns the font size set for the specified button"""
-        return self._button_state(serial_number, page, button).font_size
+        return self._button_state_view(serial_number, page, button).font_size
 
     def set_button_font_size(self, serial_number: str, page: int, button: int, font_size: int) -> None:
         if self.get_button_font_size(serial_number, page, button) != font_size:
             # Don't pollute .streamdeck_ui.json with entries of the default value
             if font_size == DEFAULT_FONT_SIZE:
                 font_size = 0
-            self._button_state(serial_number, page, button).font_size = font_size
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).font_size = font_size
+            self._save_state(self._button_change(serial_number, page, button, "font_size"))
             self._update_button_filters(serial_number, page, button)
             self.synchronize_display_handlers(serial_number)
 
     def get_button_keys(self, serial_number: str, page: int, button: int) -> str:
         """Returns the keys set for the specified button"""
-        return self._button_state(serial_number, page, button).keys
+        return self._button_state_view(serial_number, page, button).keys
 
     def get_button_font(self, serial_number: str, page: int, button: int) -> str:
         """Returns the font set for the specified button"""
-        return self._button_state(serial_number, page, button).font
+        return self._button_state_view(serial_number, page, button).font
 
     def set_button_write(self, serial_number: str, page: int, button: int, write: str) -> None:
         """Sets the text meant to be written when button is pressed"""
         if self.get_button_write(serial_number, page, button) != write:
-            self._button_state(serial_number, page, button).write = write
-            self._save_state()
+            self._editable_button_state(serial_number, page, button).write = write
+            self._save_state(self._button_change(serial_number, page, button, "write"))
 
     def get_button_write(self, serial_number: str, page: int, button: int) -> str:
         """Returns the text to be produced when the specified button is pressed"""
-        return self._button_state(serial_number, page, button).write
+        return self._button_state_view(serial_number, page, button).write
 
     def set_brightness(self, serial_number: str, brightness: int) -> None:
         """Sets the brightness for every button on the deck"""
         if self.get_brightness(serial_number) != brightness:
-            self.decks_by_serial[serial_number].set_brightness(brightness)
+            self._set_deck_brightness(serial_number, brightness)
             self.state[serial_number].brightness = brightness
-            self._save_state()
+            self._save_state(self._deck_change(serial_number, "brightness"))
 
     def get_brightness(self, serial_number: str) -> int:
         """Gets the brightness that is set for the specified stream deck"""
@@ -712,14 +838,14 @@ class StreamDeckServer:
     def set_brightness_dimmed(self, serial_number: str, brightness_dimmed: int) -> None:
         """Sets the percentage value that will be used for dimming the full brightness"""
         self.state[serial_number].brightness_dimmed = brightness_dimmed
-        self._save_state()
+        self._save_state(self._deck_change(serial_number, "brightness_dimmed"))
 
     def get_hass_url(self, serial_number: str) -> str:
         return self.state[serial_number].hass_url
 
     def set_hass_url(self, serial_number: str, hass_url: str) -> None:
         self.state[serial_number].hass_url = hass_url
-        self._save_state()
+        self._save_state(self._deck_change(serial_number, "hass_url"))
         self.hass.set_url(hass_url)
 
     def get_hass_token(self, serial_number: str) -> str:
@@ -727,7 +853,7 @@ class StreamDeckServer:
 
     def set_hass_token(self, serial_number: str, hass_token: str) -> None:
         self.state[serial_number].hass_token = hass_token
-        self._save_state()
+        self._save_state(self._deck_change(serial_number, "hass_token"))
         self.hass.set_token(hass_token)
 
     def get_hass_port(self, serial_number: str) -> str:
@@ -735,7 +861,7 @@ class StreamDeckServer:
 
     def set_hass_port(self, serial_number: str, hass_port: str) -> None:
         self.state[serial_number].hass_port = hass_port
-        self._save_state()
+        self._save_state(self._deck_change(serial_number, "hass_port"))
         self.hass.set_port(hass_port)
 
     def get_hass_ssl(self, serial_number: str) -> bool:
@@ -743,7 +869,7 @@ class StreamDeckServer:
 
     def set_hass_ssl(self, serial_number: str, hass_ssl: bool) -> None:
         self.state[serial_number].hass_ssl = hass_ssl
-        self._save_state()
+        self._save_state(self._deck_change(serial_number, "hass_ssl"))
         self.hass.set_ssl(hass_ssl)
 
     def change_brightness(self, deck_id: str, amount: int = 1) -> None:
@@ -767,15 +893,26 @@ class StreamDeckServer:
             if page not in self.get_pages(serial_number):
                 return
             self.state[serial_number].page = page
-            self._save_state()
+            self._save_state(self._deck_change(serial_number, "page"))
 
         display_handler = self.display_handlers[serial_number]
 
         # Let the display know to process new set of pipelines
         display_handler.set_page(page)
+        display_handler.prefetch(self._prefetch_targets(serial_number, page))
         # Wait for at least one cycle
         self.synchronize_display_handlers(serial_number)
 
+    def _prefetch_targets(self, serial_number: str, page: int) -> List[int]:
+        """Returns the pages the buttons of the given page switch to"""
+        pages = self.get_pages(serial_number)
+        targets = []
+        for button in self.state[serial_number].buttons.get(page, {}):
+            target = self._button_state_view(serial_number, page, button).switch_page - 1
+            if target != page and target in pages and target not in targets:
+                targets.append(target)
+        return targets
+
     def _update_streamdeck_filters(self, serial_number: str):
         """Updates the filters for all the StreamDeck buttons.
 
@@ -788,16 +925,27 @@ class StreamDeckServer:
             return
 
         pages = self.get_pages(serial_number)
-        display_handler = self.display_handlers.get(
-            serial_number, DisplayGrid(self.lock, self.decks_by_serial[serial_number], pages, self._cpu_usage_callback)
-        )
-        display_handler.set_page(self.get_page(serial_number))
-        self.display_handlers[serial_number] = display_handler
-
-        for page, buttons in self.state[serial_number].buttons.items():
-            for button in buttons:
-                self._update_button_filters(serial_number, page, button)
+        display_handler = self.display_handlers.get(serial_number, None)
+        if display_handler:
+            for page, buttons in self.state[serial_number].buttons.items():
+                for button in buttons:
+                    self._update_button_filters(serial_number, page, button)
+        else:
+            # Pages are built when they are shown, or prefetched when a button switches to them
+            display_handler = DisplayGrid(
+                self._deck_lock(serial_number),
+                self.decks_by_serial[serial_number],
+                pages,
+                self._cpu_usage_callback,
+                writer=self.writers.get(serial_number, None),
+                filter_factory=partial(self._button_filters, serial_number),
+                frame_store=frame_store,
+            )
+            self.display_handlers[serial_number] = display_handler
 
+        page = self.get_page(serial_number)
+        display_handler.set_page(page)
+        display_handler.prefetch(self._prefetch_targets(serial_number, page))
         display_handler.start()
 
     def _update_button_filters(self, serial_number: str, page: int, button: int):
@@ -812,10 +960,24 @@ class StreamDeckServer:
         """
         display_handler = self.display_handlers.get(serial_number, None)
 
-        if not display_handler:
+        if not display_handler or not display_handler.needs_replace(page, button):
+            # Pages that are not loaded are built with the current filters when they are needed,
+            # and pages being built replace the button once they are in place
             return
 
-        button_settings = self._button_state(serial_number, page, button)
+        display_handler.replace(page, button, self._button_filters(serial_number, page, button))
+
+    def _button_filters(self, serial_number: str, page: int, button: int) -> List[Filter]:
+        """Returns the filters that render the given button.
+
+        :param serial_number: The StreamDeck serial number
+        :type serial_number: str
+        :param page: The page number
+        :type page: int
+        :param button: The button
+        :type button: int
+        """
+        button_settings = self._button_state_view(serial_number, page, button)
         filters: List[Filter] = []
 
         background_color = button_settings.background_color or DEFAULT_BACKGROUND_COLOR
@@ -843,7 +1005,7 @@ class StreamDeckServer:
                 )
             )
 
-        display_handler.replace(page, button, filters)
+        return filters
 
     def synchronize_display_handlers(self, deck_id: str) -> None:
         handler = self.display_handlers.get(deck_id, None)
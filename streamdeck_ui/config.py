@@ -1,10 +1,18 @@
 """Defines shared configuration variables for the streamdeck_ui project"""
 
 import json
+import marshal
 import os
-from typing import Dict
+import sys
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional, Union
 
-from streamdeck_ui.model import ButtonMultiState, ButtonState, DeckState, DeckStateV1
+from streamdeck_ui.model import DEFAULT_BUTTON_STATE, ButtonMultiState, ButtonState, DeckState, DeckStateV1
+
+_DEFAULT_DECK_STATE = DeckState()
+_BUTTON_STATE_FIELDS = [button_field.name for button_field in fields(ButtonState)]
+_DEFAULT_BUTTON_VALUES = tuple(getattr(DEFAULT_BUTTON_STATE, name) for name in _BUTTON_STATE_FIELDS)
+_DECK_STATE_FIELDS = [deck_field.name for deck_field in fields(DeckState) if deck_field.name != "buttons"]
 
 PROJECT_PATH = os.path.dirname(os.path.abspath(__file__))
 APP_NAME = "StreamDeck UI"
@@ -19,16 +27,75 @@ DEFAULT_BACKGROUND_COLOR = "#000000"
 STATE_FILE = os.environ.get("STREAMDECK_UI_CONFIG", os.path.expanduser("~/.streamdeck_ui.json"))
 LOG_FILE = os.environ.get("STREAMDECK_UI_LOG_FILE", os.path.expanduser("~/.streamdeck_ui.log"))
 STATE_FILE_BACKUP = os.path.expanduser("~/.streamdeck_ui.json_old")
-CONFIG_FILE_VERSION = 2
+CONFIG_FILE_VERSION = 3
+"Only stores the fields that don't have their default value, and the buttons that were changed"
+CONFIG_FILE_FULL_VERSION = 2
+"Stores every field of every button"
 CONFIG_FILE_PREVIOUS_VERSION = 1
-CONFIG_FILE_SUPPORTED_VERSIONS = [CONFIG_FILE_VERSION, CONFIG_FILE_PREVIOUS_VERSION]
+"Buttons have a single state"
+CONFIG_FILE_SUPPORTED_VERSIONS = [CONFIG_FILE_VERSION, CONFIG_FILE_FULL_VERSION, CONFIG_FILE_PREVIOUS_VERSION]
 WARNING_ICON = os.path.join(PROJECT_PATH, "icons", "warning_icon_button.png")
+FRAME_CACHE_DECK_BUDGET = 8 * 1024 * 1024
+"Maximum number of bytes of native frames cached for a single Stream Deck"
+FRAME_CACHE_GLOBAL_BUDGET = 32 * 1024 * 1024
+"Maximum number of bytes of native frames cached for all Stream Decks combined"
+OUTPUT_CACHE_PIPELINE_BUDGET = 4 * 1024 * 1024
+"Maximum number of bytes of intermediate images cached by a single button pipeline"
+OUTPUT_CACHE_DECK_BUDGET = 24 * 1024 * 1024
+"Maximum number of bytes of intermediate images cached by all the pipelines of a Stream Deck"
+OUTPUT_CACHE_PIN_HITS = 2
+"Number of cache hits after which an intermediate image is considered hot (e.g. an animation frame)"
+ICON_CACHE_BUDGET = 32 * 1024 * 1024
+"Maximum number of bytes of decoded icons kept after no button uses them anymore"
+PAGE_EVICTION_TIME = 300
+"Number of seconds after which the pipelines of a page that is not shown are unloaded"
+FILTER_BUILD_WORKERS = 4
+"Number of threads that initialize filters (decode images, rasterize SVGs, load fonts)"
+FRAME_STORE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "streamdeck_ui", "frames"
+)
+"Directory where rendered key frames are kept between runs"
+FRAME_STORE_BUDGET = 64 * 1024 * 1024
+"Maximum number of bytes of rendered key frames kept on disk"
+STATE_SAVE_DELAY = 1.0
+"Number of seconds changes to the configuration are collected before the state file is written"
+STATE_JOURNAL_ENABLED = os.environ.get("STREAMDECK_UI_STATE_JOURNAL", "") == "1"
+"When True, changes to the configuration are appended to a journal instead of rewriting the state file"
+STATE_JOURNAL_SUFFIX = ".journal"
+"Appended to the path of the state file to get the path of its journal"
+STATE_JOURNAL_COMPACTION_SIZE = 256 * 1024
+"Size in bytes of the journal after which it is compacted into the state file"
+STATE_CACHE_SUFFIX = ".cache"
+"Appended to the path of the state file to get the path of its parsed snapshot"
+STATE_CACHE_VERSION = 1
+"Part of the header of the snapshot. Increment it when the layout of the snapshot changes"
+
+
+@dataclass
+class StateChange:
+    """A change to a single field of the configuration, as recorded in the journal"""
+
+    deck: str
+    """Serial number of the Stream Deck"""
+    page: Optional[int]
+    """Page of the button, or None for a field of the Stream Deck"""
+    button: Optional[int]
+    """Button, or None for a field of the Stream Deck"""
+    state: Optional[int]
+    """State of the button, or None for a field of the button itself (such as its current state)"""
+    field: str
+    """Name of the field"""
+    value: Any
+    """New value of the field"""
 
 
 def config_file_need_migration(config_file_path: str) -> bool:
     """Check if the config file need to be updated"""
     if not os.path.isfile(config_file_path):
         return False
+    if _state_cache_is_valid(config_file_path):
+        # Only files of the current version are cached
+        return False
     with open(config_file_path, "r") as config_file:
         config = json.load(config_file)
         file_version = config.get("streamdeck_ui_version", CONFIG_FILE_VERSION)
@@ -49,21 +116,88 @@ def do_config_file_migration() -> None:
 
 
 def read_state_from_config(config_file_path: str) -> Dict[str, DeckState]:
-    """Open the config file and return its content as a dict"""
-
-    with open(config_file_path, "r") as config_file:
-        config = json.load(config_file)
-        file_version = config.get("streamdeck_ui_version", 0)
-        if file_version not in CONFIG_FILE_SUPPORTED_VERSIONS:
-            raise ValueError(
-                f"Incompatible version of config file found: {file_version} does not match required version {CONFIG_FILE_VERSION}."
-            )
+    """Open the config file and return its content as a dict. Changes recorded in the journal
+    of the file are applied, and the journal is compacted into the file once it is large.
+
+    The parsed state is kept in a snapshot next to the file, which is used instead of the file
+    for as long as the file does not change."""
+
+    state = _read_state_cache(config_file_path)
+    if state is None:
+        # Taken before the file is read, so a snapshot never claims to match a newer file
+        header = _state_cache_header(config_file_path)
+        with open(config_file_path, "r") as config_file:
+            config = json.load(config_file)
+            file_version = config.get("streamdeck_ui_version", 0)
+            if file_version not in CONFIG_FILE_SUPPORTED_VERSIONS:
+                raise ValueError(
+                    f"Incompatible version of config file found: {file_version} does not match required version {CONFIG_FILE_VERSION}."
+                )
+            if file_version == CONFIG_FILE_PREVIOUS_VERSION:
+                state = _migrate_deck_state_from_previous_version(config["state"])
+            else:
+                state = _to_deck_states(config["state"])
         if file_version == CONFIG_FILE_PREVIOUS_VERSION:
-            return _migrate_deck_state_from_previous_version(config["state"])
-        state = _to_deck_states(config["state"])
-        validate_current_page(state)
-        validate_current_button_state(state)
-        return state
+            return state
+        if file_version == CONFIG_FILE_VERSION and header is not None:
+            # Older versions are not cached, so they are still offered a migration
+            _write_state_cache(config_file_path, state, header)
+    if replay_journal(config_file_path, state) and journal_size(config_file_path) > STATE_JOURNAL_COMPACTION_SIZE:
+        write_state_to_config(config_file_path, state)
+    validate_current_page(state)
+    validate_current_button_state(state)
+    return state
+
+
+def journal_size(config_file_path: str) -> int:
+    """Returns the size in bytes of the journal of a config file, 0 if there is none"""
+    try:
+        return os.path.getsize(config_file_path + STATE_JOURNAL_SUFFIX)
+    except OSError:
+        return 0
+
+
+def append_to_journal(config_file_path: str, changes: List[StateChange]) -> None:
+    """Append changes to the journal of a config file, one JSON record per line"""
+    records = "".join(json.dumps(asdict(change)) + "\n" for change in changes)
+    try:
+        with open(config_file_path + STATE_JOURNAL_SUFFIX, "a") as journal_file:
+            journal_file.write(records)
+    except OSError as error:
+        raise ValueError(f"The configuration journal of '{config_file_path}' was not updated. Error: {error}")
+
+
+def replay_journal(config_file_path: str, state: Dict[str, DeckState]) -> int:
+    """Apply the changes recorded in the journal of a config file to the state. Returns the
+    number of changes applied."""
+    try:
+        with open(config_file_path + STATE_JOURNAL_SUFFIX, "r") as journal_file:
+            lines = journal_file.readlines()
+    except OSError:
+        return 0
+    applied = 0
+    for line in lines:
+        try:
+            change = StateChange(**json.loads(line))
+        except (ValueError, TypeError):
+            # The last record may be incomplete if the application stopped while writing it
+            continue
+        if change.deck in state:
+            _apply_change(state[change.deck], change)
+            applied += 1
+    return applied
+
+
+def _apply_change(deck_state: DeckState, change: StateChange) -> None:
+    target: Union[DeckState, ButtonMultiState, ButtonState] = deck_state
+    if change.page is not None and change.button is not None:
+        # Buttons are created with their default state when they are first changed
+        buttons = deck_state.buttons.setdefault(change.page, {})
+        target = buttons.setdefault(change.button, ButtonMultiState(state=0, states={0: DEFAULT_BUTTON_STATE}))
+        if change.state is not None:
+            target = target.editable_state(change.state)
+    if hasattr(target, change.field):
+        setattr(target, change.field, change.value)
 
 
 def validate_current_page(state: Dict[str, DeckState]) -> None:
@@ -98,9 +232,133 @@ def write_state_to_config(config_file_path: str, state: Dict[str, DeckState]) ->
         raise ValueError(f"The configuration file '{config_file_path}' was not updated. Error: {error}")
     else:
         os.replace(temp_file_path, os.path.realpath(config_file_path))
+        # The file now includes every change recorded in the journal
+        try:
+            os.remove(config_file_path + STATE_JOURNAL_SUFFIX)
+        except FileNotFoundError:
+            pass
+        header = _state_cache_header(config_file_path)
+        if header is not None:
+            _write_state_cache(config_file_path, state, header)
+
+
+def _state_cache_header(config_file_path: str) -> Optional[tuple]:
+    """Returns what the snapshot of a config file must start with to be used, or None if the
+    config file does not exist. It identifies the layout of the snapshot and the content of
+    the config file, by its inode, modification time and size."""
+    try:
+        stat = os.stat(config_file_path)
+    except OSError:
+        return None
+    return (
+        STATE_CACHE_VERSION,
+        marshal.version,
+        tuple(_BUTTON_STATE_FIELDS),
+        tuple(_DECK_STATE_FIELDS),
+        stat.st_ino,
+        stat.st_mtime_ns,
+        stat.st_size,
+    )
+
+
+def _state_cache_is_valid(config_file_path: str) -> bool:
+    """Returns True if the snapshot of a config file exists and matches the config file"""
+    header = _state_cache_header(config_file_path)
+    if header is None:
+        return False
+    try:
+        return _load_state_cache(config_file_path)[0] == header
+    except (OSError, EOFError, ValueError, TypeError):
+        return False
+
+
+def _load_state_cache(config_file_path: str) -> tuple:
+    """Returns the header and the marshalled state of the snapshot of a config file"""
+    with open(config_file_path + STATE_CACHE_SUFFIX, "rb") as cache_file:
+        # Reading the whole file at once is much faster than letting marshal read from it
+        # The snapshot is written by this application, in the user's own config directory
+        header, data = marshal.loads(cache_file.read())  # nosec B302
+    return header, data
+
+
+def _read_state_cache(config_file_path: str) -> Optional[Dict[str, DeckState]]:
+    """Returns the state stored in the snapshot of a config file, or None if there is no snapshot,
+    or if the config file changed since it was taken."""
+    header = _state_cache_header(config_file_path)
+    if header is None:
+        return None
+    try:
+        cached_header, data = _load_state_cache(config_file_path)
+        if cached_header != header:
+            return None
+        # Only loaded once its header matches the config file
+        decks = marshal.loads(data)  # nosec B302
+        return {
+            deck_id: DeckState(
+                {
+                    page_of_buttons_id: {
+                        button_id: ButtonMultiState(
+                            state,
+                            {
+                                state_id: (
+                                    DEFAULT_BUTTON_STATE if values == _DEFAULT_BUTTON_VALUES else ButtonState(*values)
+                                )
+                                for state_id, values in states.items()
+                            },
+                        )
+                        for button_id, (state, states) in page_of_buttons_state.items()
+                    }
+                    for page_of_buttons_id, page_of_buttons_state in buttons.items()
+                },
+                *deck_values,
+            )
+            for deck_id, (deck_values, buttons) in decks.items()
+        }
+    except (OSError, EOFError, ValueError, TypeError):
+        # Missing or damaged, the config file is read instead
+        return None
+
+
+def _write_state_cache(config_file_path: str, state: Dict[str, DeckState], header: tuple) -> None:
+    """Writes the snapshot of a config file. Like the config file, it leaves out the buttons that
+    were never changed. Every object is stored as a tuple of its fields, in the order of the
+    dataclass, so it is created again without looking up any name."""
+    decks = {
+        deck_id: (
+            tuple(getattr(deck_state, name) for name in _DECK_STATE_FIELDS),
+            {
+                page_of_buttons_id: {
+                    button_id: (
+                        button.state,
+                        {
+                            state_id: tuple(getattr(button_state, name) for name in _BUTTON_STATE_FIELDS)
+                            for state_id, button_state in button.states.items()
+                        },
+                    )
+                    for button_id, button in page_of_buttons_state.items()
+                    if not _is_untouched(button)
+                }
+                for page_of_buttons_id, page_of_buttons_state in deck_state.buttons.items()
+            },
+        )
+        for deck_id, deck_state in state.items()
+    }
+    cache_file_path = config_file_path + STATE_CACHE_SUFFIX
+    temp_file_path = cache_file_path + ".tmp"
+    try:
+        # The state is marshalled on its own, so the header is checked before it is unmarshalled
+        data = marshal.dumps((header, marshal.dumps(decks)))
+        with open(temp_file_path, "wb") as cache_file:
+            cache_file.write(data)
+        os.replace(temp_file_path, cache_file_path)
+    except (OSError, ValueError, RuntimeError):
+        # Only startup is slower without it
+        pass
 
 
 def _to_deck_states(state: dict) -> Dict[str, DeckState]:
+    """Convert the state of a version 2 or 3 config file to DeckState objects. Missing fields
+    get their default value."""
     return {
         deck_id: DeckState(
             buttons={
@@ -110,15 +368,7 @@ def _to_deck_states(state: dict) -> Dict[str, DeckState]:
                 }
                 for page_of_buttons_id, page_of_buttons_state in deck_state["buttons"].items()
             },
-            display_timeout=deck_state["display_timeout"],
-            brightness=deck_state["brightness"],
-            brightness_dimmed=deck_state["brightness_dimmed"],
-            rotation=deck_state["rotation"],
-            page=deck_state["page"],
-            hass_url=deck_state["hass_url"],
-            hass_token=deck_state["hass_token"],
-            hass_port=deck_state["hass_port"],
-            hass_ssl=deck_state["hass_ssl"],
+            **{name: deck_state[name] for name in _DECK_STATE_FIELDS if name in deck_state},
         )
         for deck_id, deck_state in state.items()
     }
@@ -175,26 +425,30 @@ def _to_deck_states_v1(state: dict) -> Dict[str, DeckStateV1]:
 
 
 def _to_button_state(button: dict) -> ButtonState:
-    """Convert a dict to a ButtonState object"""
-    return ButtonState(
+    """Convert a dict to a ButtonState object. A state without any change is the shared default
+    state, and strings that many buttons have in common (fonts, colors...) are interned."""
+    button_state = ButtonState(
         text=button.get("text", ""),
-        icon=button.get("icon", ""),
+        icon=sys.intern(button.get("icon", "")),
         keys=button.get("keys", ""),
         write=button.get("write", ""),
         command=button.get("command", ""),
         switch_page=button.get("switch_page", 0),
         switch_state=button.get("switch_state", 0),
         brightness_change=button.get("brightness_change", 0),
-        text_vertical_align=button.get("text_vertical_align", ""),
-        text_horizontal_align=button.get("text_horizontal_align", ""),
-        font=button.get("font", ""),
-        font_color=button.get("font_color", ""),
+        text_vertical_align=sys.intern(button.get("text_vertical_align", "")),
+        text_horizontal_align=sys.intern(button.get("text_horizontal_align", "")),
+        font=sys.intern(button.get("font", "")),
+        font_color=sys.intern(button.get("font_color", "")),
         font_size=button.get("font_size", 0),
-        background_color=button.get("background_color", ""),
-        hass_domain=button.get("hass_domain", ""),
+        background_color=sys.intern(button.get("background_color", "")),
+        hass_domain=sys.intern(button.get("hass_domain", "")),
         hass_entity=button.get("hass_entity", ""),
-        hass_service=button.get("hass_service", ""),
+        hass_service=sys.intern(button.get("hass_service", "")),
     )
+    if button_state == DEFAULT_BUTTON_STATE:
+        return DEFAULT_BUTTON_STATE
+    return button_state
 
 
 def _to_button_multi_state(button: dict) -> ButtonMultiState:
@@ -205,54 +459,44 @@ def _to_button_multi_state(button: dict) -> ButtonMultiState:
 
 
 def _to_deck_config(state: Dict[str, DeckState]) -> dict:
+    """Convert DeckState objects to the state of a version 3 config file. Pages are always stored,
+    but buttons that were never changed are not, they are created again when they are used."""
     return {
         deck_id: {
             "buttons": {
                 page_of_buttons_id: {
                     button_id: _to_multi_state_button_config(button)
                     for button_id, button in page_of_buttons_state.items()
+                    if not _is_untouched(button)
                 }
                 for page_of_buttons_id, page_of_buttons_state in deck_state.buttons.items()
             },
-            "display_timeout": deck_state.display_timeout,
-            "brightness": deck_state.brightness,
-            "brightness_dimmed": deck_state.brightness_dimmed,
-            "rotation": deck_state.rotation,
-            "page": deck_state.page,
-            "hass_url": deck_state.hass_url,
-            "hass_token": deck_state.hass_token,
-            "hass_port": deck_state.hass_port,
-            "hass_ssl": deck_state.hass_ssl,
+            **{
+                name: getattr(deck_state, name)
+                for name in _DECK_STATE_FIELDS
+                if getattr(deck_state, name) != getattr(_DEFAULT_DECK_STATE, name)
+            },
         }
         for deck_id, deck_state in state.items()
     }
 
 
 def _to_button_config(button: ButtonState) -> dict:
-    """Convert a ButtonState object to a dict"""
+    """Convert a ButtonState object to a dict, leaving out the fields that have their default value"""
     return {
-        "text": button.text,
-        "icon": button.icon,
-        "keys": button.keys,
-        "write": button.write,
-        "command": button.command,
-        "brightness_change": button.brightness_change,
-        "switch_page": button.switch_page,
-        "switch_state": button.switch_state,
-        "text_vertical_align": button.text_vertical_align,
-        "text_horizontal_align": button.text_horizontal_align,
-        "font": button.font,
-        "font_color": button.font_color,
-        "font_size": button.font_size,
-        "background_color": button.background_color,
-        "hass_domain": button.hass_domain,
-        "hass_entity": button.hass_entity,
-        "hass_service": button.hass_service,
+        name: getattr(button, name)
+        for name in _BUTTON_STATE_FIELDS
+        if getattr(button, name) != getattr(DEFAULT_BUTTON_STATE, name)
     }
 
 
 def _to_multi_state_button_config(button: ButtonMultiState) -> dict:
-    return {
-        "state": button.state,
-        "states": {state_id: _to_button_config(state) for state_id, state in button.states.items()},
-    }
+    config: dict = {"states": {state_id: _to_button_config(state) for state_id, state in button.states.items()}}
+    if button.state:
+        config["state"] = button.state
+    return config
+
+
+def _is_untouched(button: ButtonMultiState) -> bool:
+    """Returns True if the button has a single state, with default values"""
+    return button.state == 0 and button.states == {0: DEFAULT_BUTTON_STATE}
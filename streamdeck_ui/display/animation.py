@@ -0,0 +1,38 @@
+import bisect
+import itertools
+from typing import Dict, List, Tuple
+
+
+class Animation:
+    """
+    A loop of frames in the native Stream Deck format (JPEG/BMP), rendered ahead of time and
+    played back by selecting the frame for the current time.
+
+    :param frames: The frames of the loop, as tuples of the native frame, the pipeline hash
+    that produced it and its duration in seconds.
+    :param float start: The time at which the first frame is shown.
+    """
+
+    def __init__(self, frames: List[Tuple[bytes, int, float]], start: float):
+        self.frames = frames
+        self.ends = list(itertools.accumulate(duration for _, _, duration in frames))
+        # The time at which each frame ends, relative to the start of the loop
+        self.duration = self.ends[-1]
+        self.start = start
+
+    def frame_at(self, time: float) -> Tuple[bytes, int, float]:
+        """Returns the frame to show at the given time.
+
+        :param float time: The current time in seconds
+        :return: The native frame, the pipeline hash that produced it and the time at which the next
+        frame should be shown.
+        :rtype: Tuple[bytes, int, float]
+        """
+        position = (time - self.start) % self.duration
+        index = min(bisect.bisect_right(self.ends, position), len(self.frames) - 1)
+        native_image, hashcode, _ = self.frames[index]
+        return (native_image, hashcode, time - position + self.ends[index])
+
+    def frame_sizes(self) -> Dict[int, int]:
+        """Returns the number of bytes used by each frame, by the pipeline hash that produced it."""
+        return {hashcode: len(native_image) for native_image, hashcode, _ in self.frames}
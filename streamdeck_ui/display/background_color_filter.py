@@ -3,7 +3,7 @@ from typing import Callable, Optional, Tuple
 
 from PIL import Image, ImageColor
 
-from streamdeck_ui.display.filter import Filter
+from streamdeck_ui.display.filter import Filter, stable_hash
 
 
 class BackgroundColorFilter(Filter):
@@ -13,12 +13,15 @@ class BackgroundColorFilter(Filter):
         super(BackgroundColorFilter, self).__init__()
         self.image = None
         self.color = to_rgb(color)
-        self.hashcode = hash((self.__class__, self.color))
+        self.hashcode = stable_hash(self.inputs())
 
     def initialize(self, size: Tuple[int, int]):
         self.image = Image.new("RGB", size)
         self.image.paste(self.color, (0, 0, size[0], size[1]))
 
+    def inputs(self) -> Optional[tuple]:
+        return (self.__class__.__name__, self.color)
+
     def transform(
         self,
         get_input: Callable[[], Image.Image],
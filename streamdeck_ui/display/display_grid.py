@@ -1,17 +1,24 @@
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from fractions import Fraction
 from time import sleep, time
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from PIL import Image
 from StreamDeck.Devices.StreamDeck import StreamDeck
 from StreamDeck.Devices.StreamDeckOriginal import StreamDeckOriginal
 from StreamDeck.ImageHelpers import PILHelper
-from StreamDeck.Transport.Transport import TransportError
 
+from streamdeck_ui.config import FILTER_BUILD_WORKERS, PAGE_EVICTION_TIME
+from streamdeck_ui.display.animation import Animation
 from streamdeck_ui.display.empty_filter import EmptyFilter
-from streamdeck_ui.display.filter import Filter
+from streamdeck_ui.display.filter import Filter, stable_hash
+from streamdeck_ui.display.frame_cache import FrameCache
+from streamdeck_ui.display.frame_store import FrameStore
 from streamdeck_ui.display.keypress_filter import KeypressFilter
+from streamdeck_ui.display.output_cache import OutputCacheBudget
 from streamdeck_ui.display.pipeline import Pipeline
+from streamdeck_ui.stream_deck_writer import StreamDeckWriter
 
 
 class DisplayGrid:
@@ -23,6 +30,9 @@ class DisplayGrid:
     _empty_filter: EmptyFilter = EmptyFilter()
     "Static instance of EmptyFilter shared by all pipelines"
 
+    _builder: ThreadPoolExecutor = ThreadPoolExecutor(FILTER_BUILD_WORKERS, thread_name_prefix="filter-builder")
+    "Worker pool shared by all displays to initialize filters without holding any lock"
+
     lock: threading.Lock
 
     def __init__(
@@ -32,12 +42,16 @@ class DisplayGrid:
         pages: List[int],
         cpu_callback: Callable[[str, int], None],
         fps: int = 25,
+        event_driven: bool = True,
+        writer: Optional[StreamDeckWriter] = None,
+        filter_factory: Optional[Callable[[int, int], List[Filter]]] = None,
+        frame_store: Optional[FrameStore] = None,
     ):
         """Creates a new display instance
 
-        :param lock: A lock object that will be used to get exclusive access while enumerating
-        Stream Decks. This lock must be shared by any object that will read or write to the
-        Stream Deck.
+        :param lock: A lock object that will be used to get exclusive access to this Stream Deck
+        and its pipelines. This lock must be shared by any object that will read or write to the
+        Stream Deck, but not with other Stream Decks, so they can render and upload in parallel.
         :type lock: threading.Lock
         :param streamdeck: The StreamDeck instance associated with this display
         :type streamdeck: StreamDeck
@@ -47,12 +61,28 @@ class DisplayGrid:
         :type cpu_callback: Callable[[str, int], None]
         :param fps: The desired FPS, defaults to 25
         :type fps: int, optional
+        :param event_driven: When True, the display sleeps until a button changes or an animated
+        filter needs a new frame, instead of processing every button at the desired FPS, defaults to True
+        :type event_driven: bool, optional
+        :param writer: The writer that owns the USB transport of the Stream Deck. If not provided,
+        the display creates its own and starts and stops it with the display, defaults to None
+        :type writer: StreamDeckWriter, optional
+        :param filter_factory: A function that returns the filters of a button, given the page and the
+        button. When provided, the pipelines of a page are only built when the page is shown or prefetched,
+        and pages that have not been shown for a while are unloaded, defaults to None
+        :type filter_factory: Callable[[int, int], List[Filter]], optional
+        :param frame_store: Where static key frames are kept between runs. When provided, the stored
+        frames of a page are shown before its filters are initialized, defaults to None
+        :type frame_store: FrameStore, optional
         """
         self.streamdeck = streamdeck
         # Reference to the actual device, used to update icons
 
+        self.device_type: tuple = ()
+        # Identifies the native format of the frames in the frame store
         if streamdeck.is_visual():
             self.size = streamdeck.key_image_format()["size"]
+            self.device_type = (streamdeck.deck_type(), tuple(sorted(streamdeck.key_image_format().items())))
         else:
             self.size = (StreamDeckOriginal.KEY_PIXEL_WIDTH, StreamDeckOriginal.KEY_PIXEL_HEIGHT)
             # Default to original stream deck size - even though we're not actually going to display anything
@@ -69,38 +99,372 @@ class DisplayGrid:
         # Configure the maximum frame rate we want to achieve
         self.time_per_frame = 1 / fps
         self.lock = lock
-        self.sync = threading.Event()
+        self.sync = threading.Condition()
+        self.cycle = 0
+        # The sync condition is notified every time all the buttons have been processed
+        self.event_driven = event_driven
+        self.wake = threading.Event()
+        # Set whenever something changes that requires the buttons to be processed
         self.cpu_callback = cpu_callback
+        self.frame_cache = FrameCache()
+        # Native (device format) frames, keyed by the pipeline hash that produced them
+        self.output_cache_budget = OutputCacheBudget()
+        # Memory budget shared by the intermediate image caches of all the pipelines
+        self.key_hashes: Dict[int, int] = {}
+        # The pipeline hash of the image last written to each key of the Stream Deck
+        self.stale_keys: Set[int] = set()
+        # Keys whose frame was dropped because they were pressed or released while it was
+        # rendered. The next pass renders them again, even if their pipeline did not change
+        self.skipped_writes = 0
+        # Number of key images that were not written because the key already shows them
+        self.owns_writer = writer is None
+        self.writer = writer or StreamDeckWriter(lock, streamdeck)
+        # Key images are queued to the writer, so rendering does not wait on USB writes
+        self.pressed_keys: Dict[int, float] = {}
+        # When the press state of keys changed since the last pass. Those keys are written first
+        self.press_counts: Dict[int, int] = {}
+        # Incremented every time a key is pressed or released
+        self.feedback_frames: Dict[Tuple[int, bool], Tuple[int, int, bytes]] = {}
+        # Native frames of the visible static keys when pressed and released, rendered ahead of
+        # time so key presses can be shown without waiting for a pass. Keyed by (button, pressed),
+        # the values are the pipeline hash of the input of the KeypressFilter, the final hash and the frame
+        self.filter_factory = filter_factory
+        self.page_visits: Dict[int, float] = {}
+        # When each loaded page was last shown or prefetched
+        self.load_lock = threading.Lock()
+        # Serializes building pages, so a page is not built twice at the same time
+        self.building: Dict[int, Set[int]] = {}
+        # The pages being built, with the buttons that changed since their filters were read.
+        # Those buttons are replaced once the page is in place
+        self.generations: Dict[Tuple[int, int], int] = {}
+        # Incremented every time the filters of a (page, button) are replaced, so a pipeline
+        # that finishes building after a newer one was requested is discarded
+        self.pending_builds: Set[Future] = set()
+        # Pipelines being built by replace
+        self.prefetch_queue: List[int] = []
+        self.prefetch_thread: Optional[threading.Thread] = None
+        self.frame_store = frame_store
+        self.stored_frames: Dict[int, str] = {}
+        # The frame store key of the frames that were written to keys straight from the frame store
 
-        # Initialize with a pipeline per key for all pages
-        for page in pages:
-            self.initialize_page(page)
-        # The sync event allows a caller to wait until all the buttons have been processed
         DisplayGrid._empty_filter.initialize(self.size)
+        # Initialize with a pipeline per key for all pages, unless they are built on demand
+        if not filter_factory:
+            for page in pages:
+                self.initialize_page(page)
+
+    def initialize_page(self, page: int, show_stored: bool = False):
+        """Builds the pipelines of all the buttons of a page. Without a filter factory, the
+        pipelines are empty.
+
+        :param int page: The page
+        :param bool show_stored: If True, the frames of the page found in the frame store are
+        written to the keys before the filters are initialized
+        """
+        buttons = range(self.streamdeck.key_count())
+        filter_factory = self.filter_factory
+        with self.lock:
+            self.building[page] = set()
+        try:
+            filters = list(
+                DisplayGrid._builder.map(lambda button: filter_factory(page, button) if filter_factory else [], buttons)
+            )
+            if show_stored:
+                self._show_stored(dict(zip(buttons, filters)))
+            built = DisplayGrid._builder.map(self._build_pipeline, filters)
+            pipelines = dict(zip(buttons, built))
+        except BaseException:
+            with self.lock:
+                self.building.pop(page, None)
+            raise
+
+        with self.lock:
+            previous = self.pages.get(page, {})
+            self.pages[page] = pipelines
+            self.page_visits[page] = time()
+            changed = self.building.pop(page, set())
+        for pipeline in previous.values():
+            pipeline.release()
+        if filter_factory:
+            for button in sorted(changed):
+                self.replace(page, button, filter_factory(page, button))
+        self.wake.set()
+
+    def is_page_loaded(self, page: int) -> bool:
+        """Returns True if the pipelines of the page are built."""
+        with self.lock:
+            return page in self.pages
+
+    def needs_replace(self, page: int, button: int) -> bool:
+        """Tells whether the filters of a button that changed must be replaced. They must not when
+        its page is not loaded, as it is built with the current filters when it is needed. When its
+        page is being built, the button is replaced once the page is in place, since its filters
+        may have been read before the change.
+
+        :param int page: The page of the button
+        :param int button: The button
+        :return: True if the page is loaded, and replace must be called
+        :rtype: bool
+        """
+        with self.lock:
+            if page in self.building:
+                self.building[page].add(button)
+                return False
+            return page in self.pages
+
+    def load_page(self, page: int, show_stored: bool = False):
+        """Builds the pipelines of a page, unless they are already built."""
+        with self.load_lock:
+            if not self.is_page_loaded(page):
+                self.initialize_page(page, show_stored)
+
+    def _store_key(self, filters: List[Filter]) -> Optional[str]:
+        """Returns the frame store key of the static output of the given filters, or None if it
+        cannot be stored."""
+        if self.frame_store is None or not self.streamdeck.is_visual():
+            return None
+        inputs = [pipeline_filter.inputs() for pipeline_filter in filters]
+        if any(filter_inputs is None for filter_inputs in inputs):
+            return None
+        return self.frame_store.key(self.device_type, tuple(inputs))
+
+    def _show_stored(self, filters: Dict[int, List[Filter]]):
+        """Writes the frames found in the frame store to the keys. Once the pipelines are built,
+        the first pass skips the keys whose stored frame is still up to date."""
+        stored: Dict[int, Tuple[str, bytes]] = {}
+        for button, button_filters in filters.items():
+            key = self._store_key(button_filters)
+            frame = self.frame_store.get(key) if self.frame_store and key else None
+            if key and frame:
+                stored[button] = (key, frame)
+        with self.lock:
+            for button, (key, frame) in stored.items():
+                self.writer.set_key_image(button, frame)
+                self.key_hashes.pop(button, None)
+                self.stored_frames[button] = key
 
-    def initialize_page(self, page: int):
-        self.pages[page] = {}
-        for button in range(self.streamdeck.key_count()):
-            self.pages[page][button] = Pipeline()
-            self.replace(page, button, [])
+    def prefetch(self, pages: List[int]):
+        """Builds the pipelines of the given pages on a background thread, so switching to one of
+        them does not have to wait. Only applies when pages are built on demand.
 
-    def remove_page(self, page: int):
+        :param pages: The pages that are likely to be shown next
+        :type pages: List[int]
+        """
+        if not self.filter_factory:
+            return
         with self.lock:
-            del self.pages[page]
+            now = time()
+            for page in pages:
+                if page in self.pages:
+                    # Keep it loaded for a while longer
+                    self.page_visits[page] = now
+            self.prefetch_queue = [page for page in pages if page not in self.pages]
+            if self.prefetch_queue and self.prefetch_thread is None:
+                self.prefetch_thread = threading.Thread(target=self._prefetch)
+                self.prefetch_thread.daemon = True
+                self.prefetch_thread.start()
+
+    def _prefetch(self):
+        """Runs on a background thread and builds the queued pages."""
+        while True:
+            with self.lock:
+                if not self.prefetch_queue:
+                    self.prefetch_thread = None
+                    return
+                page = self.prefetch_queue.pop(0)
+            try:
+                self.load_page(page)
+            except KeyError:
+                # The page was removed in the meantime
+                pass
+
+    def _evict_pages(self, now: float):
+        """Unloads the pages that have not been shown for a while."""
+        if not self.filter_factory:
+            return
+        released: List[Pipeline] = []
+        with self.lock:
+            for page, visited in list(self.page_visits.items()):
+                if page != self.current_page and now - visited > PAGE_EVICTION_TIME:
+                    released.extend(self.pages.pop(page, {}).values())
+                    del self.page_visits[page]
+        for pipeline in released:
+            pipeline.release()
 
-    def replace(self, page: int, button: int, filters: List[Filter]):
+    def remove_page(self, page: int):
         with self.lock:
-            pipeline = Pipeline()
-            pipeline.add(DisplayGrid._empty_filter)
-            for pipeline_filter in filters:
+            for pipeline in self.pages.pop(page, {}).values():
+                pipeline.release()
+            self.page_visits.pop(page, None)
+            if page in self.prefetch_queue:
+                self.prefetch_queue.remove(page)
+
+    def replace(self, page: int, button: int, filters: List[Filter]) -> "Future[None]":
+        """Replaces the filters of a button. The filters are initialized on a worker thread and
+        the new pipeline is swapped in once it is ready. Until then, the button keeps showing
+        its previous frame.
+
+        :param page: The page of the button
+        :type page: int
+        :param button: The button
+        :type button: int
+        :param filters: The new filters, not initialized yet
+        :type filters: List[Filter]
+        :return: A future that is done once the new pipeline is in place
+        :rtype: Future[None]
+        """
+        with self.lock:
+            if page not in self.pages:
+                # Pages that are not loaded are built from the filter factory when they are needed
+                future: "Future[None]" = Future()
+                future.set_result(None)
+                return future
+            generation = self.generations.get((page, button), 0) + 1
+            self.generations[(page, button)] = generation
+            future = DisplayGrid._builder.submit(self._build_and_swap, page, button, filters, generation)
+            self.pending_builds.add(future)
+        future.add_done_callback(self._build_done)
+        return future
+
+    def _build_and_swap(self, page: int, button: int, filters: List[Filter], generation: int):
+        """Runs on a worker thread. Builds the pipeline, reusing the filters of the current pipeline
+        whose inputs did not change, then swaps it in under the lock."""
+        with self.lock:
+            current = self.pages.get(page, {}).get(button, None)
+            # The filters between the EmptyFilter and the KeypressFilter
+            current_filters = [pipeline_filter for pipeline_filter, _ in current.filters[1:-1]] if current else []
+        pipeline = self._build_pipeline(filters, current_filters)
+        stale: Optional[Pipeline] = pipeline
+        with self.lock:
+            if self.generations.get((page, button), 0) != generation or page not in self.pages:
+                # The filters were replaced again, or the page was unloaded, while building
+                stale = pipeline
+            else:
+                stale = self.pages[page].get(button, None)
+                self.pages[page][button] = pipeline
+                if stale:
+                    pipeline.inherit_cache(stale)
+        if stale:
+            stale.release()
+        self.wake.set()
+
+    def _build_done(self, future: "Future[None]"):
+        with self.lock:
+            self.pending_builds.discard(future)
+        error = future.exception()
+        if error:
+            print(f"Unable to update the button filters: {error}")
+
+    def _build_pipeline(self, filters: List[Filter], current_filters: Optional[List[Filter]] = None) -> Pipeline:
+        """Builds the pipeline of a button from filters that are not initialized yet.
+
+        :param filters: The filters of the button
+        :type filters: List[Filter]
+        :param current_filters: The filters of the pipeline being replaced. Those whose inputs are
+        the same as the filter at the same position are used instead of initializing it again.
+        :type current_filters: List[Filter], optional
+        """
+        pipeline = Pipeline(self.output_cache_budget)
+        pipeline.add(DisplayGrid._empty_filter)
+        current_filters = current_filters or []
+        for index, pipeline_filter in enumerate(filters):
+            current = current_filters[index] if index < len(current_filters) else None
+            if current and self._can_reuse(current, pipeline_filter):
+                pipeline_filter = current
+            else:
                 pipeline_filter.initialize(self.size)
-                pipeline.add(pipeline_filter)
-            keypress = KeypressFilter()
-            keypress.initialize(self.size)
-            pipeline.add(keypress)
-            self.pages[page][button] = pipeline
+            pipeline.add(pipeline_filter)
+        keypress = KeypressFilter()
+        keypress.initialize(self.size)
+        pipeline.add(keypress)
+        self._prepare_animation(pipeline)
+        if pipeline.animation is None:
+            pipeline.store_key = self._store_key(filters)
+        return pipeline
+
+    @staticmethod
+    def _can_reuse(current: Filter, replacement: Filter) -> bool:
+        """Returns True if an initialized filter produces the same output as its replacement. Only
+        filters that don't change over time are reused, as they are briefly shared by the pipeline
+        being replaced and the new one."""
+        inputs = replacement.inputs()
+        return (
+            inputs is not None
+            and type(current) is type(replacement)
+            and current.inputs() == inputs
+            and current.next_deadline() is None
+            and current.frame_durations() is None
+        )
+
+    def _prepare_animation(self, pipeline: Pipeline) -> None:
+        """Renders and encodes all the frames of a looping animation (such as an animated GIF),
+        so playing it back only selects the frame for the current time.
+
+        The encoded frames of the animations of a Stream Deck are counted against the budget of
+        its frame cache, and shared through it with the other keys showing the same frames. When
+        an animation does not fit, its frames are rendered on every tick instead."""
+        if not self.streamdeck.is_visual():
+            return
+        start = time()
+        frames = pipeline.render_loop(Fraction(start))
+        if not frames:
+            return
+        native_frames = []
+        for image, hashcode, duration in frames:
+            native_image = self.frame_cache.get(hashcode)
+            if native_image is None:
+                native_image = PILHelper.to_native_format(self.streamdeck, image)
+                self.frame_cache.put(hashcode, native_image)
+            # Frames without a duration are shown for one frame of the display, as they were before
+            native_frames.append((native_image, hashcode, max(duration, self.time_per_frame)))
+        animation = Animation(native_frames, start)
+        animation_frames = self._animation_frames()
+        animation_frames.update(animation.frame_sizes())
+        if sum(animation_frames.values()) > self.frame_cache.budget:
+            return
+        pipeline.animation = animation
+
+    def _animation_frames(self) -> Dict[int, int]:
+        """Returns the size of the encoded frames of the animations of the loaded pages, by
+        pipeline hash, so frames shared by several keys are counted once."""
+        frames: Dict[int, int] = {}
+        with self.lock:
+            for pipelines in self.pages.values():
+                for pipeline in pipelines.values():
+                    if pipeline.animation is not None:
+                        frames.update(pipeline.animation.frame_sizes())
+        return frames
+
+    @staticmethod
+    def _is_pressed(pipeline: Pipeline) -> bool:
+        keypress = pipeline.filters[-1][0] if pipeline.filters else None
+        return isinstance(keypress, KeypressFilter) and keypress.active
+
+    def _queue_frame(
+        self, button: int, hashcode: int, native_image: bytes, press_count: int, pressed_keys: Dict[int, float]
+    ) -> None:
+        """Queues a frame to be written to a key, unless the key was pressed or released after
+        the frame was rendered."""
+        with self.lock:
+            if self.press_counts.get(button, 0) != press_count:
+                # The frame is already stale. The next pass renders the key again, even if the
+                # key was pressed and released, which leaves its pipeline as it was
+                self.key_hashes.pop(button, None)
+                self.stale_keys.add(button)
+                self.wake.set()
+                return
+            self.writer.set_key_image(
+                button,
+                native_image,
+                priority=button in pressed_keys,
+                pressed_at=pressed_keys.get(button, None),
+            )
+            self.key_hashes[button] = hashcode
+            self.stored_frames.pop(button, None)
 
     def get_image(self, page: int, button: int) -> Image.Image:
+        if self.filter_factory:
+            self.load_page(page)
         with self.lock:
             # REVIEW: Consider returning not the last result, but a thumbnail
             # or something that represents the current "static" look of
@@ -109,19 +473,77 @@ class DisplayGrid:
             return self.pages[page][button].last_result()
 
     def set_keypress(self, button: int, active: bool):
+        pressed_at = time()
         with self.lock:
-            for filter in self.pages[self.current_page][button].filters:
+            pipeline = self.pages[self.current_page][button]
+            for filter in pipeline.filters:
                 if isinstance(filter[0], KeypressFilter):
                     filter[0].active = active
+            self.press_counts[button] = self.press_counts.get(button, 0) + 1
+
+            feedback = self.feedback_frames.get((button, active), None)
+            if feedback and pipeline.stage_hashes[-2:-1] == [feedback[0]]:
+                # The frame was rendered ahead of time, send it right away. The next pass
+                # renders the same frame and skips writing it again.
+                _, hashcode, native_image = feedback
+                self.writer.set_key_image(button, native_image, priority=True, pressed_at=pressed_at)
+                self.key_hashes[button] = hashcode
+                self.stored_frames.pop(button, None)
+            else:
+                self.pressed_keys[button] = pressed_at
+        self.wake.set()
+
+    def _feedback_input(self, button: int, pipeline: Pipeline) -> Optional[Tuple[KeypressFilter, Image.Image, int]]:
+        """Returns what is needed to render the pressed and released frames of a key, or None if
+        they are already rendered or cannot be. Must be called with the lock held, after the
+        pipeline has been executed."""
+        if not self.streamdeck.is_visual() or len(pipeline.stage_hashes) < 2:
+            return None
+        keypress = pipeline.filters[-1][0]
+        if not isinstance(keypress, KeypressFilter):
+            return None
+        input_hash = pipeline.stage_hashes[-2]
+        feedback = self.feedback_frames.get((button, True), None)
+        if feedback and feedback[0] == input_hash:
+            return None
+        return (keypress, pipeline.filters[-2][1], input_hash)
+
+    def _render_feedback(self, button: int, keypress: KeypressFilter, input: Image.Image, input_hash: int):
+        """Renders the frames of a key when pressed and released, so set_keypress can send them
+        without waiting for the next pass.
+
+        :param int button: The button
+        :param KeypressFilter keypress: The KeypressFilter at the end of the pipeline of the button
+        :param PIL.Image input: The input image of the KeypressFilter
+        :param int input_hash: The pipeline hash of the input image
+        """
+        for active in (True, False):
+            hashcode = stable_hash(keypress.frame_hash(active), input_hash)
+            native_image = self.frame_cache.get(hashcode)
+            if native_image is None:
+                image = keypress.render(input.copy(), active)
+                native_image = PILHelper.to_native_format(self.streamdeck, image)
+                self.frame_cache.put(hashcode, native_image)
+            self.feedback_frames[(button, active)] = (input_hash, hashcode, native_image)
 
     def synchronize(self):
         # Wait until the next cycle is complete.
-        # To *guarantee* that you have one complete pass, two waits are needed.
+        # To *guarantee* that you have one complete pass, two cycles are needed.
         # The first gets you to the end of one cycle (you could have called it
         # mid cycle). The second gets you one pass through. Worst case, you
         # do two full cycles. Best case, you do 1 full and one partial.
-        self.sync.wait()
-        self.sync.wait()
+        # The display may be sleeping, so keep waking it up until we are done.
+        # Pipelines that are being built must be in place first.
+        with self.lock:
+            pending_builds = list(self.pending_builds)
+        wait(pending_builds)
+        with self.sync:
+            target_cycle = self.cycle + 2
+            while self.cycle < target_cycle and self.pipeline_thread is not None and not self.quit.is_set():
+                self.wake.set()
+                self.sync.wait(self.time_per_frame)
+        # Wait for the images of that pass to reach the Stream Deck
+        self.writer.flush()
 
     def _run(self):
         """Method that runs on background thread and updates the pipelines."""
@@ -129,13 +551,20 @@ class DisplayGrid:
         start = time()
         last_page = -1
         execution_time = 0
-        frame_cache = {}
 
         while not self.quit.isSet():
+            self.wake.clear()
             current_time = time()
 
+            if self.writer.failed.is_set():
+                # The Stream Deck can no longer be written to
+                self.stop()
+                return
+
             with self.lock:
                 page = self.pages[self.current_page]
+                pressed_keys = self.pressed_keys
+                self.pressed_keys = {}
 
             force_update = False
 
@@ -145,17 +574,43 @@ class DisplayGrid:
                 last_page = page
 
             pipeline_cache_count = 0
+            deadline: Optional[float] = None
 
             for button, pipeline in page.items():
                 # Process all the steps in the pipeline and return the resulting image
                 with self.lock:
-                    image, hashcode = pipeline.execute(current_time)
+                    press_count = self.press_counts.get(button, 0)
+                    stale = button in self.stale_keys
+                    self.stale_keys.discard(button)
+                    pressed = self._is_pressed(pipeline)
+                    animation = None if pressed else pipeline.animation
+                    if animation is None:
+                        image, hashcode = pipeline.execute(current_time)
+                        pipeline_deadline = pipeline.next_deadline()
+                        feedback_input = self._feedback_input(button, pipeline) if pipeline_deadline is None else None
 
                 pipeline_cache_count += len(pipeline.output_cache)
 
+                if animation:
+                    # The frames were rendered and encoded ahead of time, pick the one for now
+                    native_image, hashcode, pipeline_deadline = animation.frame_at(current_time)
+                    if deadline is None or pipeline_deadline < deadline:
+                        deadline = pipeline_deadline
+                    if self.key_hashes.get(button) == hashcode:
+                        self.skipped_writes += 1
+                    else:
+                        self._queue_frame(button, hashcode, native_image, press_count, pressed_keys)
+                    continue
+
+                if feedback_input:
+                    self._render_feedback(button, *feedback_input)
+
+                if pipeline_deadline is not None and (deadline is None or pipeline_deadline < deadline):
+                    deadline = pipeline_deadline
+
                 # If none of the filters in the pipeline yielded a change, use
                 # the last known result
-                if force_update and image is None:
+                if (force_update or stale) and image is None:
                     image = pipeline.last_result()
 
                 if image:
@@ -178,28 +633,46 @@ class DisplayGrid:
                     # be checked and final bytes will be ready to pipe to the device.
 
                     if self.streamdeck.is_visual():
-                        # FIXME: This will be unbounded, old frames will need to be evicted
-                        if hashcode not in frame_cache:
-                            image = PILHelper.to_native_format(self.streamdeck, image)
-                            frame_cache[hashcode] = image
-                        else:
-                            image = frame_cache[hashcode]
-
-                        try:
-                            with self.lock:
-                                self.streamdeck.set_key_image(button, image)
-                        except TransportError:
-                            # Review - deadlock if you wait on yourself?
-                            self.stop()
-                            pass
-                            return
-
-            self.sync.set()
-            self.sync.clear()
+                        # The output can be stored if it does not change over time and the key is not pressed
+                        store_key = pipeline.store_key if pipeline_deadline is None and not pressed else None
+                        with self.lock:
+                            shows_stored = store_key is not None and self.stored_frames.get(button) == store_key
+                            if shows_stored:
+                                # The frame written from the frame store is up to date
+                                del self.stored_frames[button]
+                                self.key_hashes[button] = hashcode
+                        if shows_stored:
+                            self.skipped_writes += 1
+                            continue
+
+                        if self.key_hashes.get(button) == hashcode:
+                            # The key already shows this frame (for example, the same icon on
+                            # both pages), so don't send it over USB again
+                            self.skipped_writes += 1
+                            continue
+
+                        native_image = self.frame_cache.get(hashcode)
+                        if native_image is None:
+                            native_image = PILHelper.to_native_format(self.streamdeck, image)
+                            self.frame_cache.put(hashcode, native_image)
+                        if store_key is not None and self.frame_store:
+                            self.frame_store.put(store_key, native_image)
+                        self._queue_frame(button, hashcode, native_image, press_count, pressed_keys)
+
+            self.output_cache_budget.entries = pipeline_cache_count
+
+            with self.sync:
+                self.cycle += 1
+                self.sync.notify_all()
             # Calculate how long we took to process the pipeline
             elapsed_time = time() - current_time
             execution_time += elapsed_time
 
+            # Frames rendered faster than the Stream Deck can take them would only be replaced
+            # before being written, so give the writer up to a frame to catch up
+            self.writer.flush(self.time_per_frame)
+            elapsed_time = time() - current_time
+
             # Calculate how much we have to sleep between processing cycles to maintain the desired FPS
             # If we have less than 5ms left, don't bother sleeping, as the context switch and
             # overhead of sleeping/waking up is consumed
@@ -214,12 +687,22 @@ class DisplayGrid:
                     self.cpu_callback(self.serial_number, int(execution_time_ms / 1000 * 100))
                 # execution_time_ms = int(execution_time * 1000)
                 # print(f"FPS: {frames} Execution time: {execution_time_ms} ms Execution %: {int(execution_time_ms/1000 * 100)}")
-                # print(f"Output cache size: {len(frame_cache)}")
-                # print(f"Pipeline cache size: {pipeline_cache_count}")
+                # print(f"Output cache: {self.frame_cache.stats()}")
+                # print(f"Pipeline cache: {self.output_cache_budget.stats()}")
+                self._evict_pages(time())
                 execution_time = 0
                 frames = 0
                 start = time()
 
+            if self.event_driven:
+                # Sleep until something changes, or an animated filter needs a new frame.
+                # Wake up at least once per second to keep reporting the CPU usage.
+                timeout = start + 1.0 - time()
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time())
+                if timeout > 0:
+                    self.wake.wait(timeout)
+
     def set_page(self, page: int):
         """Switches to the given page. Pipelines for that page starts running,
         other page pipelines stop.
@@ -227,8 +710,14 @@ class DisplayGrid:
         Args:
             page (int): The page number to switch to.
         """
+        if self.filter_factory:
+            # Show what the frame store has while the filters of the page are initialized
+            self.load_page(page, show_stored=True)
         with self.lock:
-            if self.current_page >= 0:
+            self.page_visits[page] = time()
+            if self.current_page in self.pages:
+                # The page stays loaded for a while after it is left
+                self.page_visits[self.current_page] = time()
                 # Ensure none of the button filters are active anymore
                 old_page = self.pages[self.current_page]
                 for _, pipeline in old_page.items():
@@ -238,16 +727,23 @@ class DisplayGrid:
             # REVIEW: We could detect the active key on the last page, and make it active
             # on the target page
             self.current_page = page
+        self.wake.set()
 
     def start(self):
         if self.pipeline_thread is not None:
             self.quit.set()
+            self.wake.set()
             try:
                 self.pipeline_thread.join()
             except RuntimeError:
                 pass
 
         self.quit.clear()
+        if self.owns_writer:
+            self.writer.start()
+        # The Stream Deck may have been reset, so don't trust what the keys are showing
+        self.key_hashes.clear()
+        self.stale_keys.clear()
         self.pipeline_thread = threading.Thread(target=self._run)
         self.pipeline_thread.daemon = True
         self.pipeline_thread.start()
@@ -257,8 +753,13 @@ class DisplayGrid:
     def stop(self):
         if self.pipeline_thread is not None:
             self.quit.set()
+            self.wake.set()
             try:
                 self.pipeline_thread.join()
             except RuntimeError:
                 pass
             self.pipeline_thread = None
+        if self.owns_writer:
+            self.writer.stop()
+        self.frame_cache.clear()
+        self.stored_frames.clear()
@@ -1,9 +1,9 @@
 from fractions import Fraction
-from typing import Callable, Tuple
+from typing import Callable, Optional, Tuple
 
 from PIL import Image
 
-from .filter import Filter
+from .filter import Filter, stable_hash
 
 
 class EmptyFilter(Filter):
@@ -20,11 +20,14 @@ class EmptyFilter(Filter):
         # This will create "some value" that uniquely identifies this filter output
         # Since it never changes, this works.
         # Calculate it once for speed
-        self.hashcode = hash(self.__class__)
+        self.hashcode = stable_hash(self.inputs())
 
     def initialize(self, size: Tuple[int, int]):
         self.image = Image.new("RGB", size)
 
+    def inputs(self) -> Optional[tuple]:
+        return (self.__class__.__name__,)
+
     def transform(
         self,
         get_input: Callable[[], Image.Image],
@@ -1,15 +1,33 @@
+import hashlib
 from abc import ABC, abstractmethod
 from fractions import Fraction
-from typing import Callable, Tuple
+from typing import Callable, List, Optional, Tuple
 
 from PIL import Image
 
 
+def stable_hash(*parts) -> int:
+    """
+    Returns a hash of the given values that is the same in every process and from one run to the
+    next, unlike hash() which is salted for strings and uses the identity of classes. Use it for
+    the hashcodes of filters, so the pipeline hashes can key caches that are shared across runs.
+
+    :param parts: Strings, numbers, booleans, None, and tuples of them. Their repr is hashed.
+    :rtype: int
+    :return: A signed 64-bit hash
+    """
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
 class Filter(ABC):
     """
     A filter transforms a given input image to the desired output image. A filter can signal that it
     is complete and will be removed from the pipeline.
 
+    The hashcodes a filter returns must only depend on what it draws, and must be computed with
+    stable_hash, typically from the values returned by inputs.
+
     :param str name: The name of the filter. The name is useful for debugging purposes.
     """
 
@@ -63,3 +81,47 @@ class Filter(ABC):
         pipeline manager that there was no change and a cached version will be moved to the next stage.
         """
         pass
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Returns the time (in the same clock as the time passed to transform) at which this filter
+        will produce a different output on its own, for example the next frame of an animation.
+        Filters whose output only changes when their input changes return None, which allows the
+        display to sleep until something else happens.
+
+        :rtype: Optional[float]
+        :return: The time of the next change, or None if the output does not change over time.
+        """
+        return None
+
+    def frame_durations(self) -> Optional[List[float]]:
+        """
+        Returns the duration in seconds of each frame, for filters whose output loops over a fixed
+        sequence of frames, such as an animated GIF. This allows the display to render the whole
+        loop once and play it back. Other filters return None.
+
+        :rtype: Optional[List[float]]
+        :return: The duration of each frame of the loop, or None if the output is not a loop.
+        """
+        return None
+
+    def inputs(self) -> Optional[tuple]:
+        """
+        Returns the values that determine the output of the filter, such as the text, the font and
+        the colors. With the native format of the Stream Deck, they make up the key of the frames
+        kept on disk in the frame store. Filters whose output also depends on time return None.
+
+        :rtype: Optional[tuple]
+        :return: A tuple of strings, numbers and tuples of them, or None if the output cannot be cached.
+        """
+        return None
+
+    def seek(self, index: int, time: Fraction) -> None:
+        """
+        Shows the given frame of the loop from the given time on. Only called on filters that
+        return frame durations.
+
+        :param int index: The index of the frame
+        :param Fraction time: The current time in seconds
+        """
+        pass
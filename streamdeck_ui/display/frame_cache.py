@@ -0,0 +1,118 @@
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import ClassVar, Optional
+
+from streamdeck_ui.config import FRAME_CACHE_DECK_BUDGET, FRAME_CACHE_GLOBAL_BUDGET
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    """Number of lookups that found a cached frame"""
+    misses: int = 0
+    """Number of lookups that did not find a cached frame"""
+    evictions: int = 0
+    """Number of frames removed to stay within the budget"""
+    entries: int = 0
+    """Number of frames currently cached"""
+    size: int = 0
+    """Number of bytes currently cached"""
+
+
+class FrameCache:
+    """
+    A least recently used cache of frames in the native Stream Deck format (JPEG/BMP),
+    keyed by the pipeline hash that produced them.
+
+    The memory used is bounded by a byte budget for this cache (one per Stream Deck) and by
+    a global byte budget that is shared by all caches. When the global budget is exceeded,
+    the oldest frames of the largest cache are evicted first.
+
+    :param int budget: The maximum number of bytes this cache may hold.
+    """
+
+    global_budget: ClassVar[int] = FRAME_CACHE_GLOBAL_BUDGET
+    "The maximum number of bytes all the caches may hold combined"
+
+    _instances: ClassVar["weakref.WeakSet[FrameCache]"] = weakref.WeakSet()
+
+    def __init__(self, budget: int = FRAME_CACHE_DECK_BUDGET):
+        self.budget = budget
+        self.frames: "OrderedDict[int, bytes]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # The cache is used by the display thread of its Stream Deck, but frames
+        # can be evicted by any display thread when the global budget is exceeded.
+        self.lock = threading.Lock()
+        FrameCache._instances.add(self)
+
+    def get(self, key: int) -> Optional[bytes]:
+        """Returns the cached frame for the given key, or None if it is not cached."""
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self.frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key: int, frame: bytes) -> None:
+        """Adds a frame to the cache, evicting the least recently used frames if
+        the cache, or all the caches combined, exceed their budget."""
+        with self.lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                return
+            self.frames[key] = frame
+            self.size += len(frame)
+            # Always keep the most recent frame, even if it alone exceeds the budget
+            while self.size > self.budget and len(self.frames) > 1:
+                self._evict_oldest()
+
+        FrameCache._trim_to_global_budget()
+
+    def evict_oldest(self) -> bool:
+        """Evicts the least recently used frame.
+
+        :return: True if a frame was evicted, False if the cache is empty.
+        :rtype: bool
+        """
+        with self.lock:
+            if not self.frames:
+                return False
+            self._evict_oldest()
+            return True
+
+    def clear(self) -> None:
+        """Removes all the frames and releases their share of the global budget."""
+        with self.lock:
+            self.size = 0
+            self.frames.clear()
+
+    def stats(self) -> CacheStats:
+        """Returns a snapshot of the cache counters."""
+        with self.lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self.frames), self.size)
+
+    def _evict_oldest(self) -> None:
+        _, frame = self.frames.popitem(last=False)
+        self.size -= len(frame)
+        self.evictions += 1
+
+    @classmethod
+    def global_size(cls) -> int:
+        """Returns the number of bytes held by all the caches combined. It is summed over the live
+        caches, so the frames of a cache that was garbage collected are no longer counted."""
+        return sum(cache.size for cache in list(cls._instances))
+
+    @classmethod
+    def _trim_to_global_budget(cls) -> None:
+        while cls.global_size() > cls.global_budget:
+            largest = max(list(cls._instances), key=lambda cache: cache.size, default=None)
+            if largest is None or not largest.evict_oldest():
+                break
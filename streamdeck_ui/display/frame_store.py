@@ -0,0 +1,131 @@
+import hashlib
+import os
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+from streamdeck_ui.config import FRAME_STORE_BUDGET, FRAME_STORE_PATH
+from streamdeck_ui.display.frame_cache import CacheStats
+
+FRAME_STORE_VERSION = 1
+"Part of every key. Increment it when a change to the filters makes the stored frames look different"
+
+_SUFFIX = ".frame"
+
+
+class FrameStore:
+    """
+    A persistent cache of frames in the native Stream Deck format, kept on disk between runs so
+    the keys can be shown as soon as a Stream Deck is attached, before any filter is initialized.
+
+    Frames are content addressed: each one is stored in a file named after a digest of the
+    filter inputs that produced it and of the type of Stream Deck (see key). Reading a frame
+    updates its modification time, and once the budget is exceeded, the least recently used
+    frames are deleted.
+
+    :param str directory: The directory where the frames are stored. It is created when needed.
+    :param int budget: The maximum number of bytes of frames to keep.
+    """
+
+    def __init__(self, directory: str = FRAME_STORE_PATH, budget: int = FRAME_STORE_BUDGET):
+        self.directory = directory
+        self.budget = budget
+        self.size: Optional[int] = None
+        # Number of bytes stored, only known once the directory has been scanned
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Returns the key of a frame, given what determines its content.
+
+        :param parts: Strings, numbers and tuples of them, such as the inputs of the filters
+        and the type of Stream Deck
+        :return: A digest that is the same from one run to the next
+        :rtype: str
+        """
+        data = repr((FRAME_STORE_VERSION,) + parts).encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the stored frame, or None if there is none."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as frame_file:
+                frame = frame_file.read()
+            # Mark it as recently used
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return frame
+
+    def put(self, key: str, frame: bytes) -> None:
+        """Stores a frame, unless it is already stored."""
+        path = self._path(key)
+        with self.lock:
+            if os.path.exists(path):
+                return
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                # Write to a temporary file first, so other processes never read a partial frame
+                handle, temporary_path = tempfile.mkstemp(dir=self.directory)
+                with os.fdopen(handle, "wb") as frame_file:
+                    frame_file.write(frame)
+                os.replace(temporary_path, path)
+            except OSError as error:
+                print(f"Unable to store a key frame in {self.directory}: {error}")
+                return
+
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self._scan())
+            else:
+                self.size += len(frame)
+            if self.size > self.budget:
+                self._trim()
+
+    def stats(self) -> CacheStats:
+        """Returns a snapshot of the store counters. The number of entries is not tracked."""
+        with self.lock:
+            return CacheStats(self.hits, self.misses, self.evictions, 0, self.size or 0)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """Returns the modification time, size and path of every stored frame."""
+        frames = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(_SUFFIX):
+                        stat = entry.stat()
+                        frames.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return frames
+
+    def _trim(self) -> None:
+        """Deletes the least recently used frames until three quarters of the budget are used,
+        so the directory is not scanned again on every new frame."""
+        frames = sorted(self._scan())
+        self.size = sum(size for _, size, _ in frames)
+        target = self.budget * 3 // 4
+        for _, size, path in frames:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.size -= size
+            self.evictions += 1
+
+
+frame_store = FrameStore()
+"The frame store shared by all the Stream Decks"
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Tuple
+
+from PIL.Image import Image
+
+from streamdeck_ui.config import ICON_CACHE_BUDGET
+from streamdeck_ui.display.frame_cache import CacheStats
+from streamdeck_ui.display.output_cache import image_size
+
+Frames = List[Tuple[Image, int, int]]
+"The decoded frames of an icon, as tuples of the frame, its duration in milliseconds and its hashcode"
+
+
+class _Entry:
+    __slots__ = ("frames", "size", "references")
+
+    def __init__(self, frames: Frames):
+        self.frames = frames
+        self.size = sum(image_size(frame) for frame, _, _ in frames)
+        self.references = 0
+
+
+class IconCache:
+    """
+    A process-wide cache of decoded and scaled icons, shared by all the buttons of all the pages
+    and Stream Decks. The key identifies the icon content and the target size, typically the path,
+    size and modification time of the file and the key size.
+
+    Icons are reference counted. An icon stays cached while a button uses it, and once unused,
+    it is kept until the budget is exceeded, least recently used first.
+
+    :param int budget: The maximum number of bytes of unused icons to keep.
+    """
+
+    def __init__(self, budget: int = ICON_CACHE_BUDGET):
+        self.budget = budget
+        self.entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.loading: Dict[Hashable, threading.Lock] = {}
+        # One lock per icon being loaded, so an icon is decoded once even when
+        # several buttons ask for it at the same time
+
+    def acquire(self, key: Hashable, load: Callable[[], Frames]) -> Frames:
+        """Returns the frames of an icon, loading them if they are not cached. Every call must be
+        matched by a call to release once the frames are no longer used.
+
+        :param Hashable key: Identifies the icon content and the target size
+        :param Callable[[], Frames] load: Decodes and scales the icon
+        """
+        with self.lock:
+            entry = self._reference(key)
+            if entry:
+                return entry.frames
+            loading = self.loading.setdefault(key, threading.Lock())
+
+        with loading:
+            with self.lock:
+                entry = self._reference(key)
+                if entry:
+                    return entry.frames
+                self.misses += 1
+
+            frames = load()
+
+            with self.lock:
+                entry = _Entry(frames)
+                entry.references = 1
+                self.entries[key] = entry
+                self.size += entry.size
+                self.loading.pop(key, None)
+                self._trim()
+                return frames
+
+    def release(self, key: Hashable) -> None:
+        """Releases a reference to an icon obtained with acquire."""
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is None:
+                return
+            entry.references -= 1
+            self._trim()
+
+    def stats(self) -> CacheStats:
+        """Returns a snapshot of the cache counters."""
+        with self.lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self.entries), self.size)
+
+    def _reference(self, key: Hashable):
+        entry = self.entries.get(key, None)
+        if entry is None:
+            return None
+        self.hits += 1
+        entry.references += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def _trim(self) -> None:
+        # Icons in use can't be evicted, so only the unused ones count against the budget
+        unused_size = sum(entry.size for entry in self.entries.values() if entry.references <= 0)
+        for key in list(self.entries):
+            if unused_size <= self.budget:
+                break
+            entry = self.entries[key]
+            if entry.references > 0:
+                continue
+            del self.entries[key]
+            self.size -= entry.size
+            unused_size -= entry.size
+            self.evictions += 1
+
+
+icon_cache = IconCache()
+"The icon cache shared by all the image filters"
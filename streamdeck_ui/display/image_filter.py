@@ -1,16 +1,17 @@
-import datetime
 import itertools
 import os
+import weakref
 from fractions import Fraction
 from io import BytesIO
-from typing import Callable, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import cairosvg
 import filetype
 from PIL import Image, ImageSequence
 
 from streamdeck_ui.config import WARNING_ICON
-from streamdeck_ui.display.filter import Filter
+from streamdeck_ui.display.filter import Filter, stable_hash
+from streamdeck_ui.display.icon_cache import Frames, icon_cache
 
 
 class ImageFilter(Filter):
@@ -24,7 +25,9 @@ class ImageFilter(Filter):
         if file.startswith("<svg "):
             self.file = file
             file_size = len(file)
-            mod_time = datetime.datetime.utcnow().timestamp()
+            # Inline SVG icons are identified by their code alone, so an icon that is shown again
+            # (such as a light toggled back on) reuses its rasterized frames and cached outputs
+            mod_time = 0.0
         else:
             self.file = os.path.expanduser(file)
             try:
@@ -38,10 +41,27 @@ class ImageFilter(Filter):
 
         # Create a tuple of the file metadata for creating a hashcode.
         self.metadata = (self.__class__, self.file, file_size, mod_time)
+        self.icon_key: Optional[tuple] = None
+        self.release_icon: Optional[weakref.finalize] = None
 
     def initialize(self, size: Tuple[int, int]):
+        # The decoded frames are shared with every other filter showing the same icon at the same size
+        icon_key = (self.metadata, tuple(size))
+        if icon_key != self.icon_key:
+            if self.release_icon:
+                self.release_icon()
+            self.frames = icon_cache.acquire(icon_key, lambda: self._load(size))
+            self.icon_key = icon_key
+            self.release_icon = weakref.finalize(self, icon_cache.release, icon_key)
+
+        self.frame_cycle = itertools.cycle(self.frames)
+        self.current_frame = next(self.frame_cycle)
+        self.frame_time = Fraction()
+
+    def _load(self, size: Tuple[int, int]) -> Frames:
+        """Decodes the icon and scales its frames to the given size."""
         # Each frame needs to have a unique hashcode.
-        image_hash = hash(self.metadata)
+        image_hash = stable_hash(self.__class__.__name__, *self.metadata[1:])
         frame_duration = []
         frame_hash = []
 
@@ -70,7 +90,7 @@ class ImageFilter(Filter):
                         try:
                             frame_duration.append(image.info["duration"])
                             # Create tuple and hash it, to combine the image and frame hashcodes
-                            frame_hash.append(hash((image_hash, frame_number)))
+                            frame_hash.append(stable_hash(image_hash, frame_number))
                             image.seek(image.tell() + 1)
                             frame_number += 1
                         except EOFError:
@@ -92,7 +112,7 @@ class ImageFilter(Filter):
         frames = ImageSequence.Iterator(image)
 
         # Scale all the frames to the target size
-        self.frames = []
+        scaled_frames = []
         for frame, milliseconds, hashcode in zip(frames, frame_duration, frame_hash):
             frame = frame.copy()
             if frame.has_transparency_data and frame.mode != "RGBA":
@@ -101,11 +121,33 @@ class ImageFilter(Filter):
                 except BaseException:
                     pass
             frame.thumbnail(size, Image.LANCZOS)
-            self.frames.append((frame, milliseconds, hashcode))
+            scaled_frames.append((frame, milliseconds, hashcode))
+        return scaled_frames
 
-        self.frame_cycle = itertools.cycle(self.frames)
+    def next_deadline(self) -> Optional[float]:
+        """
+        Animated images change when the current frame has been shown for its duration.
+        """
+        _, duration, _ = self.current_frame
+        if duration < 0 or len(self.frames) < 2:
+            return None
+        return self.frame_time + duration / 1000
+
+    def frame_durations(self) -> Optional[List[float]]:
+        """
+        Animated images loop over their frames.
+        """
+        if len(self.frames) < 2 or any(duration < 0 for _, duration, _ in self.frames):
+            return None
+        return [duration / 1000 for _, duration, _ in self.frames]
+
+    def inputs(self) -> Optional[tuple]:
+        return (self.__class__.__name__,) + self.metadata[1:]
+
+    def seek(self, index: int, time: Fraction) -> None:
+        self.frame_cycle = itertools.cycle(self.frames[index:] + self.frames[:index])
         self.current_frame = next(self.frame_cycle)
-        self.frame_time = Fraction()
+        self.frame_time = time
 
     def transform(
         self,
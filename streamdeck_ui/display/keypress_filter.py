@@ -3,7 +3,7 @@ from typing import Callable, Tuple
 
 from PIL import Image, ImageEnhance
 
-from .filter import Filter
+from .filter import Filter, stable_hash
 
 
 class KeypressFilter(Filter):
@@ -20,7 +20,9 @@ class KeypressFilter(Filter):
         self.last_time = Fraction()
         self.brightness = 1
         self.dim_brightness = 0.5
-        self.filter_hash = hash(self.__class__)
+        self.filter_hash = stable_hash(self.__class__.__name__)
+        self.frame_hashes = {active: stable_hash(self.filter_hash, active) for active in (True, False)}
+        # The hash of the frame when the key is pressed or not, computed once as it is needed on every pass
         self.active = False
         self.last_state = False
 
@@ -29,6 +31,32 @@ class KeypressFilter(Filter):
         self.size = size
         pass
 
+    def frame_hash(self, active: bool) -> int:
+        """Returns the hash of the frame this filter produces when the key is pressed or not."""
+        return self.frame_hashes[active]
+
+    def render(self, input: Image.Image, active: bool) -> Image.Image:
+        """Returns the input image as it is shown when the key is pressed or not.
+
+        :param PIL.Image input: The input image. It is modified, so pass a copy.
+        :param bool active: True if the key is pressed
+        """
+        if not active:
+            return input
+
+        background = self.blank_image.copy()
+        input.thumbnail((self.size[0] - 10, self.size[1] - 10), Image.LANCZOS)
+        # Reduce the image by 10px
+
+        enhancer = ImageEnhance.Brightness(input)
+        input = enhancer.enhance(2)
+        # Light it up a bit
+
+        background.paste(input, (5, 5))
+        # Center the image
+
+        return background
+
     def transform(
         self,
         get_input: Callable[[], Image.Image],
@@ -36,28 +64,12 @@ class KeypressFilter(Filter):
         input_changed: bool,
         time: Fraction,
     ) -> Tuple[Image.Image, int]:
-        frame_hash = hash((self.filter_hash, self.active))
+        frame_hash = self.frame_hash(self.active)
         if input_changed or self.active != self.last_state:
             self.last_state = self.active
             image = get_output(frame_hash)
             if image:
                 return (image, frame_hash)
 
-            input = get_input()
-            if self.active:
-                input = get_input()
-                background = self.blank_image.copy()
-                input.thumbnail((self.size[0] - 10, self.size[1] - 10), Image.LANCZOS)
-                # Reduce the image by 10px
-
-                enhancer = ImageEnhance.Brightness(input)
-                input = enhancer.enhance(2)
-                # Light it up a bit
-
-                background.paste(input, (5, 5))
-                # Center the image
-
-                return (background, frame_hash)
-            else:
-                return (input, frame_hash)
+            return (self.render(get_input(), self.active), frame_hash)
         return (None, frame_hash)
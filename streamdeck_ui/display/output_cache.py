@@ -0,0 +1,156 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional
+
+from PIL.Image import Image
+
+from streamdeck_ui.config import OUTPUT_CACHE_DECK_BUDGET, OUTPUT_CACHE_PIN_HITS, OUTPUT_CACHE_PIPELINE_BUDGET
+from streamdeck_ui.display.frame_cache import CacheStats
+
+
+def image_size(image: Image) -> int:
+    """Returns an estimate of the number of bytes used by the pixels of an image."""
+    return image.width * image.height * len(image.getbands())
+
+
+class _Entry:
+    __slots__ = ("image", "size", "hits")
+
+    def __init__(self, image: Image, size: int):
+        self.image = image
+        self.size = size
+        self.hits = 0
+
+
+class OutputCacheBudget:
+    """
+    Tracks the memory used by the output caches of all the pipelines of a Stream Deck. When the
+    budget is exceeded, images are evicted from the largest pipeline cache first.
+
+    :param int budget: The maximum number of bytes all the pipeline caches may hold combined.
+    """
+
+    def __init__(self, budget: int = OUTPUT_CACHE_DECK_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = 0
+        "Number of images cached by the pipelines of the current page, as last counted by the display"
+        self.lock = threading.RLock()
+        # Shared by all the caches of the Stream Deck, so eviction can reach across pipelines
+        self.caches: "weakref.WeakSet[OutputCache]" = weakref.WeakSet()
+
+    def stats(self) -> CacheStats:
+        """Returns a snapshot of the counters for all the pipeline caches."""
+        with self.lock:
+            return CacheStats(self.hits, self.misses, self.evictions, self.entries, self.size)
+
+    def trim(self, current: Optional["OutputCache"] = None) -> None:
+        """Evicts images from the largest caches until the budget is respected.
+
+        :param OutputCache current: The cache that just grew. On a tie, other caches are trimmed first.
+        """
+        with self.lock:
+            while self.size > self.budget:
+                largest = max(list(self.caches), key=lambda cache: (cache.size, cache is not current), default=None)
+                if largest is None or not largest.evict():
+                    break
+
+
+class OutputCache:
+    """
+    A bounded cache of the intermediate images produced by a pipeline, keyed by pipeline hash.
+
+    The least recently used images are evicted first, but images that keep being requested (such as
+    the frames of a looping animation) are pinned and only evicted when nothing else is left. Pins
+    wear off: every eviction that passes over a pinned image halves its hits, so it stays pinned
+    only if it is requested again in between.
+
+    :param OutputCacheBudget budget: The budget shared with the other pipelines of the Stream Deck.
+    If not provided, the cache only enforces its own limit.
+    :param int limit: The maximum number of bytes this cache may hold.
+    """
+
+    def __init__(self, budget: Optional[OutputCacheBudget] = None, limit: int = OUTPUT_CACHE_PIPELINE_BUDGET):
+        self.budget = budget or OutputCacheBudget(limit)
+        self.limit = limit
+        self.size = 0
+        self.entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self.released = False
+        self.budget.caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.entries
+
+    def get(self, key: int, default: Optional[Image] = None) -> Optional[Image]:
+        with self.budget.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.budget.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            entry.hits += 1
+            self.budget.hits += 1
+            return entry.image
+
+    def put(self, key: int, image: Image) -> None:
+        if image is None:
+            return
+        with self.budget.lock:
+            if self.released or key in self.entries:
+                return
+            entry = _Entry(image, image_size(image))
+            self.entries[key] = entry
+            self._resize(entry.size)
+            while self.size > self.limit and len(self.entries) > 1:
+                self.evict()
+            self.budget.trim(self)
+
+    def evict(self) -> bool:
+        """Evicts the least recently used image that is not pinned. If every image is
+        pinned, the least recently used one is evicted anyway. The hits of the pinned images
+        that are passed over are halved.
+
+        :return: True if an image was evicted, False if the cache is empty.
+        :rtype: bool
+        """
+        with self.budget.lock:
+            if not self.entries:
+                return False
+            victim = None
+            for key, entry in self.entries.items():
+                if entry.hits < OUTPUT_CACHE_PIN_HITS:
+                    victim = key
+                    break
+                entry.hits //= 2
+            if victim is None:
+                victim = next(iter(self.entries))
+            entry = self.entries.pop(victim)
+            self._resize(-entry.size)
+            self.budget.evictions += 1
+            return True
+
+    def reset_hits(self) -> None:
+        """Unpins every image. Called when the cache is taken over by the pipeline of a button that
+        changed, so images of the previous button are only pinned again if they are still requested."""
+        with self.budget.lock:
+            for entry in self.entries.values():
+                entry.hits = 0
+
+    def release(self) -> None:
+        """Removes all the images and stops caching. Called when the pipeline is discarded."""
+        with self.budget.lock:
+            self._resize(-self.size)
+            self.entries.clear()
+            self.released = True
+            self.budget.caches.discard(self)
+
+    def _resize(self, delta: int) -> None:
+        self.size += delta
+        self.budget.size += delta
@@ -1,16 +1,24 @@
 from fractions import Fraction
-from typing import Dict, List, Tuple
+from typing import List, Optional, Tuple
 
 from PIL.Image import Image
 
-from .filter import Filter
+from .animation import Animation
+from .filter import Filter, stable_hash
+from .output_cache import OutputCache, OutputCacheBudget
 
 
 class Pipeline:
-    def __init__(self) -> None:
+    def __init__(self, budget: Optional[OutputCacheBudget] = None) -> None:
         self.filters: List[Tuple[Filter, Image]] = []
         self.first_run = True
-        self.output_cache: Dict[int, Image] = {}
+        self.output_cache = OutputCache(budget)
+        self.stage_hashes: List[int] = []
+        # The pipeline hash after each filter, as of the last execution
+        self.animation: Optional[Animation] = None
+        # The output of the pipeline rendered ahead of time, when it loops over a fixed set of frames
+        self.store_key: Optional[str] = None
+        # The key of the static output of the pipeline in the frame store, if it can be stored
 
     def add(self, filter: Filter) -> None:
         self.filters.append((filter, None))
@@ -24,6 +32,7 @@ class Pipeline:
         image: Image = None
         is_modified = False
         pipeline_hash = 0
+        stage_hashes = []
 
         # To avoid flake8 B023 (https://docs.python-guide.org/writing/gotchas/#late-binding-closures), we need to
         # capture the variable going into the lambda. However, as a result of that, we have a lambda that
@@ -34,12 +43,13 @@ class Pipeline:
         for i, (current_filter, cached) in enumerate(self.filters):
             (image, hashcode) = current_filter.transform(
                 lambda input_image=image: input_image.copy(),  # type: ignore [misc]
-                lambda output_hash, pipeline_hash=pipeline_hash: self.output_cache.get(hash((output_hash, pipeline_hash)), None),  # type: ignore [misc]
+                lambda output_hash, pipeline_hash=pipeline_hash: self.output_cache.get(stable_hash(output_hash, pipeline_hash), None),  # type: ignore [misc]
                 is_modified | self.first_run,
                 time,
             )
 
-            pipeline_hash = hash((hashcode, pipeline_hash))
+            pipeline_hash = stable_hash(hashcode, pipeline_hash)
+            stage_hashes.append(pipeline_hash)
 
             if not image:
                 # Filter indicated that it did NOT change anything, pull up the last
@@ -53,7 +63,9 @@ class Pipeline:
 
             # Store this image with pipeline hash if we haven't seen it.
             if pipeline_hash not in self.output_cache:
-                self.output_cache[pipeline_hash] = image
+                self.output_cache.put(pipeline_hash, image)
+
+        self.stage_hashes = stage_hashes
 
         if self.first_run:
             # Force an update the first time the pipeline runs
@@ -69,3 +81,63 @@ class Pipeline:
         if not self.filters:
             return None
         return self.filters[-1][1]
+
+    def render_loop(self, time: Fraction) -> Optional[List[Tuple[Image, int, float]]]:
+        """
+        Renders every frame of the output when exactly one filter loops over a fixed set of frames (such
+        as an animated GIF) and no other filter changes over time. Returns None otherwise.
+
+        Returns a list of tuples of the frame, the pipeline hash and the duration of the frame in seconds.
+        """
+        looping = [current_filter for current_filter, _ in self.filters if current_filter.frame_durations()]
+        if len(looping) != 1:
+            return None
+        animated = looping[0]
+        if any(
+            current_filter.next_deadline() is not None
+            for current_filter, _ in self.filters
+            if current_filter is not animated
+        ):
+            return None
+
+        frames = []
+        for index, duration in enumerate(animated.frame_durations() or []):
+            animated.seek(index, time)
+            self.first_run = True
+            image, hashcode = self.execute(time)
+            frames.append((image, hashcode, duration))
+
+        # Leave the pipeline on the first frame
+        animated.seek(0, time)
+        self.first_run = True
+        self.execute(time)
+        return frames
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Returns the earliest time at which one of the filters will change the output on its own,
+        or None if the output only changes when the pipeline is modified.
+        """
+        deadlines = [
+            deadline
+            for deadline in (current_filter.next_deadline() for current_filter, _ in self.filters)
+            if deadline is not None
+        ]
+        return min(deadlines, default=None)
+
+    def inherit_cache(self, previous: "Pipeline") -> None:
+        """
+        Takes over the cached images of the pipeline this one replaces, unless this one already
+        has some. Stages whose filters and inputs did not change find their output in the cache,
+        so only the stages from the first change on are rendered again. The images are unpinned,
+        since the pipeline may no longer request them.
+        """
+        if not len(self.output_cache):
+            self.output_cache, previous.output_cache = previous.output_cache, self.output_cache
+            self.output_cache.reset_hits()
+
+    def release(self) -> None:
+        """
+        Releases the cached images. Called when the pipeline is replaced or removed.
+        """
+        self.output_cache.release()
@@ -1,9 +1,9 @@
 from fractions import Fraction
-from typing import Callable, Tuple
+from typing import Callable, Optional, Tuple
 
 from PIL import Image, ImageEnhance
 
-from .filter import Filter
+from .filter import Filter, stable_hash
 
 
 class PulseFilter(Filter):
@@ -19,11 +19,14 @@ class PulseFilter(Filter):
         self.pulse_delay = 0.5
         self.brightness = 1
         self.dim_brightness = 0.5
-        self.filter_hash = hash(self.__class__)
+        self.filter_hash = stable_hash(self.__class__.__name__)
 
     def initialize(self, size: Tuple[int, int]):
         pass
 
+    def next_deadline(self) -> Optional[float]:
+        return self.last_time + self.pulse_delay
+
     def transform(
         self,
         get_input: Callable[[], Image.Image],
@@ -41,7 +44,7 @@ class PulseFilter(Filter):
             else:
                 self.brightness = self.dim_brightness
 
-        frame_hash = hash((self.filter_hash, self.brightness))
+        frame_hash = stable_hash(self.filter_hash, self.brightness)
         if input_changed or brightness_changed:
             image = get_output(frame_hash)
             if image:
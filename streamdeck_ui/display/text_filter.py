@@ -1,10 +1,10 @@
 from fractions import Fraction
-from typing import Callable, Tuple
+from typing import Callable, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
 
 from streamdeck_ui.config import DEFAULT_FONT_FALLBACK_PATH
-from streamdeck_ui.display.filter import Filter
+from streamdeck_ui.display.filter import Filter, stable_hash
 
 
 class TextFilter(Filter):
@@ -21,8 +21,8 @@ class TextFilter(Filter):
         self.vertical_align = vertical_align
         self.horizontal_align = horizontal_align
         self.font_color = font_color
-        self.fallback_font = ImageFont.truetype(DEFAULT_FONT_FALLBACK_PATH, font_size)
-        self.true_font = ImageFont.truetype(font, font_size)
+        self.font = font
+        self.font_size = font_size
         # fmt: off
         kernel = [
             0, 1, 2, 1, 0,
@@ -37,9 +37,13 @@ class TextFilter(Filter):
         self.image = None
 
         # Hashcode should be created for anything that makes this frame unique
-        self.hashcode = hash((self.__class__, text, font, font_size, font_color, vertical_align, horizontal_align))
+        self.hashcode = stable_hash(self.inputs())
 
     def initialize(self, size: Tuple[int, int]):
+        # Fonts are loaded here rather than in the constructor, so filters that are only compared
+        # with the ones already shown (and then dropped) don't load them
+        self.fallback_font = ImageFont.truetype(DEFAULT_FONT_FALLBACK_PATH, self.font_size)
+        self.true_font = ImageFont.truetype(self.font, self.font_size)
         self.image = Image.new("RGBA", size)
         foreground_draw = ImageDraw.Draw(self.image)
         # Split the text by newline to determine label height
@@ -72,12 +76,13 @@ class TextFilter(Filter):
             label_y = size[1] - label_h
             # Default or "bottom"
 
-        if self.horizontal_align == "left":
+        align = self.horizontal_align
+        if align == "left":
             label_x = 0
-        elif self.horizontal_align == "right":
+        elif align == "right":
             label_x = size[0] - label_w
         else:
-            self.horizontal_align = "center"
+            align = "center"
             label_x = (size[0] - label_w) // 2
             # Default or "center"
 
@@ -89,7 +94,7 @@ class TextFilter(Filter):
                 text=self.text,
                 font=self.true_font,
                 fill=self.font_color,
-                align=self.horizontal_align,
+                align=align,
                 spacing=0,
                 stroke_fill="black",
                 stroke_width=2,
@@ -101,12 +106,23 @@ class TextFilter(Filter):
                 text=self.text,
                 font=self.fallback_font,
                 fill=self.font_color,
-                align=self.horizontal_align,
+                align=align,
                 spacing=0,
                 stroke_fill="black",
                 stroke_width=2,
             )
 
+    def inputs(self) -> Optional[tuple]:
+        return (
+            self.__class__.__name__,
+            self.text,
+            self.font,
+            self.font_size,
+            self.font_color,
+            self.vertical_align,
+            self.horizontal_align,
+        )
+
     def transform(
         self,
         get_input: Callable[[], Image.Image],
@@ -131,7 +147,7 @@ class TextFilter(Filter):
 
 def is_a_valid_text_filter_font(font) -> bool:
     try:
-        TextFilter("", font, 12, "white", "top", "left")
+        ImageFont.truetype(font, 12)
         return True
     except BaseException:
         return False
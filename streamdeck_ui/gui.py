@@ -1,9 +1,9 @@
 """Defines the QT powered interface for configuring Stream Decks"""
 
 import os
-import shlex
 import signal
 import sys
+import threading
 from functools import partial
 from subprocess import Popen  # nosec - Need to allow users to specify arbitrary commands
 from typing import Dict, List, Optional, Union
@@ -28,6 +28,8 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from streamdeck_ui.action_executor import BACKGROUND_LANE, KEYBOARD_LANE
+from streamdeck_ui.actions import KeyActions
 from streamdeck_ui.api import StreamDeckServer
 from streamdeck_ui.cli.server import CLIStreamDeckServer
 from streamdeck_ui.config import (
@@ -45,7 +47,12 @@ from streamdeck_ui.config import (
 from streamdeck_ui.display.text_filter import is_a_valid_text_filter_font
 from streamdeck_ui.homeassistant import HomeAssistant
 from streamdeck_ui.modules.fonts import DEFAULT_FONT_FAMILY, FONTS_DICT, find_font_info
-from streamdeck_ui.modules.keyboard import KeyPressAutoComplete, keyboard_press_keys, keyboard_write
+from streamdeck_ui.modules.keyboard import (
+    KeyPressAutoComplete,
+    keyboard_press_keycodes,
+    keyboard_write,
+    prewarm_keyboard,
+)
 from streamdeck_ui.modules.utils.timers import debounce
 from streamdeck_ui.semaphore import Semaphore, SemaphoreAcquireError
 from streamdeck_ui.ui_button import Ui_ButtonForm
@@ -179,6 +186,38 @@ class DraggableButton(QToolButton):
         self.setStyleSheet(BUTTON_STYLE)
 
 
+def _run_command(actions: KeyActions, _cancelled: threading.Event) -> None:
+    try:
+        if actions.command_error:
+            raise ValueError(actions.command_error)
+        Popen(actions.command_args)  # nosec, need to allow execution of arbitrary commands
+    except Exception as error:
+        print(f"The command '{actions.command}' failed: {error}")
+        api.streamdeck_keys.action_failed.emit("The command failed to execute.")
+
+
+def _press_keys(actions: KeyActions, cancelled: threading.Event) -> None:
+    try:
+        if actions.keys_error:
+            raise ValueError(actions.keys_error)
+        keyboard_press_keycodes(actions.keycodes, cancelled)
+    except Exception as error:
+        print(f"Could not press keys '{actions.keys}': {error}")
+        api.streamdeck_keys.action_failed.emit(f"Unable to perform key press action. {error}")
+
+
+def _write(actions: KeyActions, cancelled: threading.Event) -> None:
+    try:
+        keyboard_write(actions.write, cancelled)
+    except Exception as error:
+        print(f"Could not complete the write command: {error}")
+        api.streamdeck_keys.action_failed.emit("Unable to perform write action.")
+
+
+def _call_hass_service(actions: KeyActions, _cancelled: threading.Event) -> None:
+    api.hass.call_service(actions.hass_entity, actions.hass_service)
+
+
 def handle_keypress(ui, deck_id: str, key: int, state: bool) -> None:
     # TODO: Handle both key down and key up events in future.
     if state:
@@ -186,43 +225,28 @@ def handle_keypress(ui, deck_id: str, key: int, state: bool) -> None:
             return
 
         page = api.get_page(deck_id)
-        command = api.get_button_command(deck_id, page, key)
-        keys = api.get_button_keys(deck_id, page, key)
-        write = api.get_button_write(deck_id, page, key)
-        brightness_change = api.get_button_change_brightness(deck_id, page, key)
-        switch_page = api.get_button_switch_page(deck_id, page, key)
-        switch_state = api.get_button_switch_state(deck_id, page, key)
-
-        if command:
-            try:
-                Popen(shlex.split(command))  # nosec, need to allow execution of arbitrary commands
-            except Exception as error:
-                print(f"The command '{command}' failed: {error}")
-                show_tray_warning_message("The command failed to execute.")
+        actions = api.get_button_actions(deck_id, page, key)
 
-        if keys:
-            try:
-                keyboard_press_keys(keys)
-            except Exception as error:
-                print(f"Could not press keys '{keys}': {error}")
-                show_tray_warning_message(f"Unable to perform key press action. {error}")
+        # Commands, keys, text and Home Assistant services run on the action executor, in the
+        # order of the key presses, so the GUI does not wait for them
+        if actions.command:
+            api.action_executor.submit(deck_id, key, BACKGROUND_LANE, partial(_run_command, actions))
 
-        if write:
-            try:
-                keyboard_write(write)
-            except Exception as error:
-                print(f"Could not complete the write command: {error}")
-                show_tray_warning_message("Unable to perform write action.")
+        if actions.keys:
+            api.action_executor.submit(deck_id, key, KEYBOARD_LANE, partial(_press_keys, actions))
 
-        if brightness_change:
+        if actions.write:
+            api.action_executor.submit(deck_id, key, KEYBOARD_LANE, partial(_write, actions))
+
+        if actions.brightness_change:
             try:
-                api.change_brightness(deck_id, brightness_change)
+                api.change_brightness(deck_id, actions.brightness_change)
             except Exception as error:
                 print(f"Could not change brightness: {error}")
                 show_tray_warning_message("Unable to change brightness.")
 
-        if switch_page:
-            switch_page_index = switch_page - 1
+        if actions.switch_page_index is not None:
+            switch_page_index = actions.switch_page_index
             if switch_page_index in api.get_pages(deck_id):
                 api.set_page(deck_id, switch_page_index)
                 if _deck() == deck_id:
@@ -232,11 +256,11 @@ def handle_keypress(ui, deck_id: str, key: int, state: bool) -> None:
                             break
             else:
                 show_tray_warning_message(
-                    f"Unable to perform switch page, the page {switch_page} does not exist in your current settings"  # noqa: E713
+                    f"Unable to perform switch page, the page {actions.switch_page} does not exist in your current settings"  # noqa: E713
                 )
 
-        if switch_state:
-            switch_state_index = switch_state - 1
+        if actions.switch_state_index is not None:
+            switch_state_index = actions.switch_state_index
             if switch_state_index in api.get_button_states(deck_id, page, key):
                 api.set_button_state(deck_id, page, key, switch_state_index)
                 if _deck() == deck_id:
@@ -248,13 +272,11 @@ def handle_keypress(ui, deck_id: str, key: int, state: bool) -> None:
                     redraw_button(key)
             else:
                 show_tray_warning_message(
-                    f"Unable to perform switch button state, the button state {switch_state} does not exist in your current settings"  # noqa: E713
+                    f"Unable to perform switch button state, the button state {actions.switch_state} does not exist in your current settings"  # noqa: E713
                 )
 
-        hass_entity = api.get_button_hass_entity(deck_id, page, key)
-        hass_service = api.get_button_hass_service(deck_id, page, key)
-        if hass_entity and hass_service:
-            api.hass.call_service(hass_entity, hass_service)
+        if actions.hass_entity and actions.hass_service:
+            api.action_executor.submit(deck_id, key, BACKGROUND_LANE, partial(_call_hass_service, actions))
 
 
 def _deck() -> Optional[str]:
@@ -1328,6 +1350,7 @@ def create_main_window(api: StreamDeckServer, app: QApplication) -> MainWindow:
     ui.redraw_button = redraw_button  # type: ignore [attr-defined]
 
     api.streamdeck_keys.key_pressed.connect(partial(handle_keypress, ui))
+    api.streamdeck_keys.action_failed.connect(show_tray_warning_message)
 
     ui.device_list.currentIndexChanged.connect(partial(build_device, ui))
     ui.pages.currentChanged.connect(lambda: handle_change_page())
@@ -1476,6 +1499,9 @@ def start(_exit: bool = False) -> None:
         with Semaphore("/tmp/streamdeck_ui.lock"):  # nosec - this file is only observed with advisory lock
             # The semaphore was created, so this is the first instance
 
+            # create the virtual keyboard in the background, while the window is created
+            prewarm_keyboard()
+
             # set up hass
             hass = HomeAssistant()
             api.set_hass(hass)
@@ -17,6 +17,7 @@ class StreamDeckMock(StreamDeck.StreamDeck):
     KEY_ROTATION = 0
 
     DECK_TYPE = "Stream Deck Original"
+    DECK_VISUAL = True
 
     IMAGE_REPORT_LENGTH = 8191
     IMAGE_REPORT_HEADER_LENGTH = 16
@@ -59,6 +60,16 @@ class StreamDeckMock(StreamDeck.StreamDeck):
 
         return None
 
+    def _read_control_states(self):
+        """
+        Reads the control states of the StreamDeck. The mock has no controls to read.
+
+        :rtype: dict
+        :return: None, as no control changed.
+        """
+
+        return None
+
     def __del__(self):
         """
         Delete handler for the StreamDeck, automatically closing the transport
@@ -186,6 +197,12 @@ class StreamDeckMock(StreamDeck.StreamDeck):
         # return self._extract_string(version[5:])
         return "1.0"
 
+    def set_touchscreen_image(self, image, x_pos=0, y_pos=0, width=0, height=0):
+        """
+        Draws an image on the touchscreen. The mock has no touchscreen.
+        """
+        pass
+
     def set_key_image(self, key, image):
         """
         Sets the image of a button on the StreamDeck to the given image. The
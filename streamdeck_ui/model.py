@@ -1,7 +1,22 @@
-from dataclasses import dataclass, field
+from dataclasses import FrozenInstanceError, dataclass, field, fields
 from typing import Dict
 
 
+def _slotted(cls):
+    """Recreates a dataclass with __slots__, so its instances have no __dict__. This is what
+    dataclass(slots=True) does, which is not available before Python 3.10."""
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(class_field.name for class_field in fields(cls))
+    cls_dict["__slots__"] = field_names
+    for field_name in field_names:
+        # The defaults are already part of the generated __init__, and would conflict with the slots
+        cls_dict.pop(field_name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@_slotted
 @dataclass
 class ButtonState:
     text: str = ""
@@ -40,6 +55,34 @@ class ButtonState:
     """Home Assistant service of the button"""
 
 
+class _SharedButtonState(ButtonState):
+    """The type of DEFAULT_BUTTON_STATE. It is equal to ButtonState(), but cannot be changed."""
+
+    __slots__ = ()
+
+    def __init__(self):
+        for button_field in fields(ButtonState):
+            object.__setattr__(self, button_field.name, button_field.default)
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field '{name}' of the shared default button state")
+
+    def __eq__(self, other):
+        if not isinstance(other, ButtonState):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in ButtonState.__slots__)
+
+    def __reduce__(self):
+        # Copies, deep copies and pickles all refer to the same instance
+        return "DEFAULT_BUTTON_STATE"
+
+
+DEFAULT_BUTTON_STATE: ButtonState = _SharedButtonState()
+"""State of every button that was never changed. It is shared, so it is replaced by a copy before
+a button is changed (see ButtonMultiState.editable_state)"""
+
+
+@_slotted
 @dataclass
 class ButtonMultiState:
     state: int = 0
@@ -47,7 +90,16 @@ class ButtonMultiState:
     states: Dict[int, ButtonState] = field(default_factory=dict)
     """States of the button"""
 
+    def editable_state(self, state: int) -> ButtonState:
+        """Returns a state of the button that can be changed. If it is the shared default state,
+        or if it does not exist, a new ButtonState is stored for it first."""
+        button_state = self.states.get(state)
+        if button_state is None or button_state is DEFAULT_BUTTON_STATE:
+            button_state = self.states[state] = ButtonState()
+        return button_state
+
 
+@_slotted
 @dataclass
 class DeckState:
     buttons: Dict[int, Dict[int, ButtonMultiState]] = field(default_factory=dict)
@@ -1,5 +1,8 @@
+import threading
 import time
-from typing import List
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from evdev import InputDevice, UInput
 from evdev import ecodes as e
@@ -9,6 +12,10 @@ from PySide6.QtWidgets import QCompleter
 
 _DEFAULT_KEY_PRESS_DELAY = 0.05
 _DEFAULT_KEY_SECTION_DELAY = 0.5
+_DEFAULT_CHARACTERS_PER_SECOND = 100
+_DEFAULT_CHARACTERS_PER_FRAME = 4
+_CAPS_LOCK_RESCAN_INTERVAL = 10.0
+_COMPILED_TEXT_CACHE_SIZE = 64
 
 # fmt: off
 _SPECIAL_KEYS = {
@@ -206,130 +213,308 @@ _SHIFT_KEY_MAPPING = {
     'Y': e.KEY_Y,
     'Z': e.KEY_Z,
 }
-# we remove KEY_ from the key names to make it easier to type
-_SUPPORTED_KEYS = [key.replace("KEY_", "").lower() for key in dir(e) if key.startswith("KEY_") and key not in _BAD_ECODES]
-_SUPPORTED_KEY_CONSTANTS = [value for name, value in vars(e).items() if name.startswith('KEY_') and name not in _BAD_ECODES]
 # fmt: on
 
 
+@dataclass
+class KeyTables:
+    """The names and the codes of the keys"""
+
+    names: List[str]
+    """The valid key names, sorted, as suggested when the keys of a button are typed"""
+    keycodes_by_name: Dict[str, int]
+    """The key code of each name that can be used in the keys of a button"""
+    supported_keycodes: List[int]
+    """The key codes of the virtual keyboard"""
+
+
+def _build_key_tables() -> KeyTables:
+    key_constants = {name: value for name, value in vars(e).items() if name.startswith("KEY_")}
+    supported = {name: value for name, value in key_constants.items() if name not in _BAD_ECODES}
+
+    # we remove KEY_ from the key names to make it easier to type
+    names = [name.replace("KEY_", "").lower() for name in supported]
+    names.extend(_SPECIAL_KEYS.keys())
+    names.extend(_OLD_NUMPAD_KEYS.keys())
+    names.extend(_OLD_PYNPUT_KEYS.keys())
+    names.extend(_MODIFIER_KEYS.keys())
+
+    # a name is replaced by e.KEY_<name>, then by the special keys, the old numpad keys, the old
+    # media keys, the modifier keys and the characters, until it is a key code
+    keycodes_by_name: Dict[str, int] = {}
+    candidates = [name.replace("KEY_", "").lower() for name in key_constants]
+    candidates.extend(names)
+    candidates.extend(_KEY_MAPPING.keys())
+    for name in candidates:
+        if name != name.lower():
+            continue
+        key: Union[int, str] = key_constants.get(f"KEY_{name.upper()}", name)
+        for mapping in (_SPECIAL_KEYS, _OLD_NUMPAD_KEYS, _OLD_PYNPUT_KEYS, _MODIFIER_KEYS, _KEY_MAPPING):
+            if isinstance(key, str):
+                key = mapping.get(key, key)
+        if isinstance(key, int):
+            keycodes_by_name[name] = key
+
+    return KeyTables(sorted(names), keycodes_by_name, list(supported.values()))
+
+
+_KEY_TABLES: Optional[KeyTables] = None
+_KEY_TABLES_LOCK = threading.Lock()
+
+
+def get_key_tables() -> KeyTables:
+    """Returns the names and the codes of the keys. They are built the first time they are needed,
+    and shared afterwards, so they must not be changed."""
+    global _KEY_TABLES
+    key_tables = _KEY_TABLES
+    if key_tables is None:
+        with _KEY_TABLES_LOCK:
+            key_tables = _KEY_TABLES
+            if key_tables is None:
+                key_tables = _KEY_TABLES = _build_key_tables()
+    return key_tables
+
+
 # Initialize UInput in a global variable so that we don't initialize each time a key is pressed
 class UInputWrapper:
     def __init__(self):
         self.initialized = False
         self.device = None
+        self.lock = threading.Lock()
+        # Serializes the creation of the device, so a key press during the warm up waits for it
+        self.created_in = 0.0
+        "Time it took to create the device, in seconds"
 
     def initialize(self):
-        if not self.initialized:
-            print("Initializing UInput...")
-            self.device = UInput({e.EV_KEY: _SUPPORTED_KEY_CONSTANTS})
-            self.initialized = True
+        if self.initialized:
+            return
+        with self.lock:
+            if not self.initialized:
+                print("Initializing UInput...")
+                start = time.monotonic()
+                self.device = UInput({e.EV_KEY: get_key_tables().supported_keycodes})
+                self.created_in = time.monotonic() - start
+                self.initialized = True
 
 
 _UINPUT = UInputWrapper()
 
 
-def parse_keys_as_keycodes(keys: str) -> List[List[str]]:
+def parse_keys_as_keycodes(keys: str) -> List[List[int]]:
     stripped = keys.strip().replace(" ", "").lower()
     if not stripped:
         return []
     # split by , for sections
     sections = stripped.split(",")
-    parsed_keys = []
+    parsed_keys: List[List[int]] = []
+    keycodes_by_name = get_key_tables().keycodes_by_name
     for section in sections:
-        # split by + for individual keys
-        individual = section.split("+")
-        # filter empty strings
-        individual = list(filter(None, individual))
-        # replace any string with e.KEY_<string>
-        individual = [getattr(e, f"KEY_{key.upper()}", key) for key in individual]
-        # replace special keys
-        individual = [_SPECIAL_KEYS.get(key, key) for key in individual]
-        # replace old numpad keys
-        individual = [_OLD_NUMPAD_KEYS.get(key, key) for key in individual]
-        # replace old media keys
-        individual = [_OLD_PYNPUT_KEYS.get(key, key) for key in individual]
-        # replace modifier keys
-        individual = [_MODIFIER_KEYS.get(key, key) for key in individual]
-        # replace key names with key codes
-        individual = [_KEY_MAPPING.get(key, key) for key in individual]
-
-        # if any value is not an int, raise an error
-        if not all(isinstance(key, int) for key in individual):
-            invalid_keys = [key for key in individual if not isinstance(key, int)]
+        # split by + for individual keys, and filter empty strings
+        individual = list(filter(None, section.split("+")))
+
+        # if any key has no key code, raise an error
+        invalid_keys = [key for key in individual if key not in keycodes_by_name]
+        if invalid_keys:
             raise ValueError(f"Invalid keys: {invalid_keys}")
 
         if len(individual) > 0:
-            parsed_keys.append(individual)
+            parsed_keys.append([keycodes_by_name[key] for key in individual])
 
     return parsed_keys
 
 
-def keyboard_write(string: str):
-    _UINPUT.initialize()
-    _ui = _UINPUT.device
-    caps_lock_is_on = check_caps_lock()
-    for char in string:
-        is_unicode = False
-        unicode_bytes = char.encode("unicode_escape")
-        # '\u' or '\U' for unicode, or '\x' for UTF-8
-        if unicode_bytes[0] == 92 and unicode_bytes[1] in [85, 117, 120]:
-            is_unicode = True
-
-        if char in _KEY_MAPPING:
-            keycode = _KEY_MAPPING[char]
-            need_shift = False
-
-            if char in _SHIFT_KEY_MAPPING:
-                need_shift = True
-
-            if char.isalpha() and caps_lock_is_on:
-                need_shift = not need_shift
-
-            if need_shift:
-                _ui.write(e.EV_KEY, e.KEY_LEFTSHIFT, 1)
-
-            _ui.write(e.EV_KEY, keycode, 1)
-            _ui.write(e.EV_KEY, keycode, 0)
-
-            if need_shift:
-                _ui.write(e.EV_KEY, e.KEY_LEFTSHIFT, 0)
-
-            # send keys
-            _ui.syn()
-            time.sleep(_DEFAULT_KEY_PRESS_DELAY)
-        elif is_unicode:
-            unicode_hex = hex(int(unicode_bytes[2:], 16))
-            unicode_hex_keys = unicode_hex[2:]
-
-            # hold shift + ctrl
-            _ui.write(e.EV_KEY, e.KEY_LEFTSHIFT, 1)
-            _ui.write(e.EV_KEY, e.KEY_LEFTCTRL, 1)
-
-            # press 'U' to initiate unicode sequence
-            _ui.write(e.EV_KEY, e.KEY_U, 1)
-            _ui.write(e.EV_KEY, e.KEY_U, 0)
-
-            # press unicode codepoint keys
-            for hex_char in unicode_hex_keys:
-                keycode = _KEY_MAPPING[hex_char]
-                _ui.write(e.EV_KEY, keycode, 1)
-                _ui.write(e.EV_KEY, keycode, 0)
-
-            # release shift + ctrl
-            _ui.write(e.EV_KEY, e.KEY_LEFTSHIFT, 0)
-            _ui.write(e.EV_KEY, e.KEY_LEFTCTRL, 0)
-
-            # send keys
-            _ui.syn()
-        else:
+Stroke = Tuple[Tuple[int, int], ...]
+"The key events (key code, 1 for down or 0 for up) that type a character"
+
+
+def _character_stroke(char: str, caps_lock_is_on: bool) -> Optional[Stroke]:
+    """Returns the key events that type a character, None if it cannot be typed"""
+    if char in _KEY_MAPPING:
+        keycode = _KEY_MAPPING[char]
+        need_shift = char in _SHIFT_KEY_MAPPING
+        if char.isalpha() and caps_lock_is_on:
+            need_shift = not need_shift
+        if need_shift:
+            return (e.KEY_LEFTSHIFT, 1), (keycode, 1), (keycode, 0), (e.KEY_LEFTSHIFT, 0)
+        return (keycode, 1), (keycode, 0)
+
+    unicode_bytes = char.encode("unicode_escape")
+    # '\u' or '\U' for unicode, or '\x' for UTF-8
+    if unicode_bytes[0] == 92 and unicode_bytes[1] in [85, 117, 120]:
+        # hold shift + ctrl, press 'U' to initiate the unicode sequence, press the codepoint keys,
+        # then release shift + ctrl
+        events = [(e.KEY_LEFTSHIFT, 1), (e.KEY_LEFTCTRL, 1), (e.KEY_U, 1), (e.KEY_U, 0)]
+        for hex_char in f"{ord(char):x}":
+            events += [(_KEY_MAPPING[hex_char], 1), (_KEY_MAPPING[hex_char], 0)]
+        events += [(e.KEY_LEFTSHIFT, 0), (e.KEY_LEFTCTRL, 0)]
+        return tuple(events)
+
+    return None
+
+
+@lru_cache(maxsize=_COMPILED_TEXT_CACHE_SIZE)
+def compile_text(text: str, caps_lock_is_on: bool) -> Tuple[Tuple[Stroke, ...], Tuple[str, ...]]:
+    """Returns the key events that type each character of a text, and the characters that cannot
+    be typed, which are left out. The texts of the keys do not change often, so the last ones are
+    cached."""
+    strokes = []
+    unsupported = []
+    for char in text:
+        stroke = _character_stroke(char, caps_lock_is_on)
+        if stroke is None:
+            unsupported.append(char)
+            continue
+        strokes.append(stroke)
+    return tuple(strokes), tuple(unsupported)
+
+
+class CapsLockState:
+    """Tells whether Caps Lock is on, from the LEDs of a keyboard.
+
+    The keyboard is looked for once, and kept open, so reading the state is a single request to
+    the device rather than opening every input device. When there is no keyboard with LEDs, the
+    input devices are looked at again at most every rescan_interval seconds.
+    """
+
+    def __init__(self, rescan_interval: float = _CAPS_LOCK_RESCAN_INTERVAL):
+        self.rescan_interval = rescan_interval
+        self.device: Optional[InputDevice] = None
+        self.scanned_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def is_on(self) -> bool:
+        """Returns True if Caps Lock is on, False if it is off, and False if it cannot be determined."""
+        with self.lock:
+            if self.device is not None:
+                try:
+                    return e.LED_CAPSL in self.device.leds()
+                except OSError:
+                    # The keyboard was unplugged, look for another one
+                    self.device.close()
+                    self.device = None
+                    self.scanned_at = None
+            now = time.monotonic()
+            if self.scanned_at is not None and now - self.scanned_at < self.rescan_interval:
+                return False
+            self.scanned_at = now
+            self.device = self._find_keyboard()
+            if self.device is None:
+                return False
+            return e.LED_CAPSL in self.device.leds()
+
+    @staticmethod
+    def _find_keyboard() -> Optional[InputDevice]:
+        """Returns the first input device with LEDs, None if there is none that can be read"""
+        for path in list_devices():
+            try:
+                device = InputDevice(path)
+            except OSError:
+                continue
+            if device.capabilities().get(e.EV_LED):
+                return device
+            device.close()
+        return None
+
+
+class TypingEngine:
+    """Types texts on a virtual keyboard.
+
+    The characters are typed in frames of characters_per_frame characters, with a pause between
+    the frames so that characters_per_second are typed, rather than pausing after every
+    character. The key events of a text are computed before it is typed.
+    """
+
+    def __init__(
+        self,
+        characters_per_second: float = _DEFAULT_CHARACTERS_PER_SECOND,
+        characters_per_frame: int = _DEFAULT_CHARACTERS_PER_FRAME,
+        caps_lock: Optional[CapsLockState] = None,
+    ):
+        """Creates a new TypingEngine instance
+
+        :param characters_per_second: How fast the characters are typed, 0 to type them as fast as
+        possible
+        :type characters_per_second: float
+        :param characters_per_frame: How many characters are typed without pausing
+        :type characters_per_frame: int
+        :param caps_lock: Tells whether Caps Lock is on. By default, it is read from the keyboard.
+        :type caps_lock: Optional[CapsLockState]
+        """
+        self.characters_per_second = characters_per_second
+        self.characters_per_frame = max(1, characters_per_frame)
+        self.caps_lock = caps_lock or CapsLockState()
+
+    def write(self, device: Any, text: str, cancelled: Optional[threading.Event] = None) -> None:
+        """Types a text. If the cancelled event is set, the frames that are left are not typed.
+
+        :param device: The virtual keyboard, an evdev UInput device (or anything with the same
+        write and syn methods)
+        :type device: Any
+        :param text: The text to type
+        :type text: str
+        :param cancelled: Set to stop typing
+        :type cancelled: Optional[threading.Event]
+        """
+        strokes, unsupported = compile_text(text, self.caps_lock.is_on())
+        for char in unsupported:
             print(f"Unsupported character: {char}")
+        interval = 0.0
+        if self.characters_per_second > 0:
+            interval = self.characters_per_frame / self.characters_per_second
+        next_frame_at = time.monotonic()
+        for start in range(0, len(strokes), self.characters_per_frame):
+            if cancelled is not None and cancelled.is_set():
+                return
+            if interval and start:
+                # Pace the frames from the start of the text, so the time spent writing does not add up
+                next_frame_at += interval
+                delay = next_frame_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            for stroke in strokes[start : start + self.characters_per_frame]:
+                for keycode, value in stroke:
+                    device.write(e.EV_KEY, keycode, value)
+                # send keys
+                device.syn()
+
+
+_TYPING_ENGINE = TypingEngine()
+
+
+def prewarm_keyboard() -> threading.Thread:
+    """Builds the key tables, creates the virtual keyboard and looks for the Caps Lock LED on a
+    background thread, so the first key press after startup does not wait for them. If the virtual
+    keyboard cannot be created, the first key press tries again and reports the error."""
+
+    def warm_up():
+        get_key_tables()
+        try:
+            _UINPUT.initialize()
+            print(f"UInput initialized in {_UINPUT.created_in * 1000:.0f} ms")
+            _TYPING_ENGINE.caps_lock.is_on()
+        except Exception as error:
+            print(f"Could not initialize UInput: {error}")
+
+    thread = threading.Thread(target=warm_up, name="keyboard-warm-up")
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def keyboard_write(string: str, cancelled: Optional[threading.Event] = None):
+    """Writes a text. If the cancelled event is set, the characters that are left are not written."""
+    _UINPUT.initialize()
+    _TYPING_ENGINE.write(_UINPUT.device, string, cancelled)
 
 
-def keyboard_press_keys(keys: str):
+def keyboard_press_keycodes(sections: List[List[int]], cancelled: Optional[threading.Event] = None):
+    """Presses sections of keys, as returned by parse_keys_as_keycodes. If the cancelled event is
+    set, the sections that are left are not pressed."""
     _UINPUT.initialize()
     _ui = _UINPUT.device
-    sections = parse_keys_as_keycodes(keys)
     for section_of_keycodes in sections:
+        if cancelled is not None and cancelled.is_set():
+            return
         for keycode in section_of_keycodes:
             _ui.write(e.EV_KEY, keycode, 1)
             _ui.syn()
@@ -346,29 +531,15 @@ def keyboard_press_keys(keys: str):
 
 def get_valid_key_names() -> List[str]:
     """Returns a list of valid key names."""
-    key_names = [key for key in _SUPPORTED_KEYS]
-    key_names.extend(_SPECIAL_KEYS.keys())
-    key_names.extend(_OLD_NUMPAD_KEYS.keys())
-    key_names.extend(_OLD_PYNPUT_KEYS.keys())
-    key_names.extend(_MODIFIER_KEYS.keys())
-    return sorted(key_names)
-
-
-def check_caps_lock() -> bool:
-    """Returns True if Caps Lock is on, False if it is off, and False if it cannot be determined."""
-    devices = [InputDevice(path) for path in list_devices()]
-    for device in devices:
-        if device.capabilities().get(e.EV_LED):
-            return e.LED_CAPSL in device.leds()
-    return False
+    return list(get_key_tables().names)
 
 
 class KeyPressAutoComplete(QCompleter):
     special_keys = _SPECIAL_KEYS.values()
-    allowed_keys = get_valid_key_names()
 
     def __init__(self, parent=None):
         super(KeyPressAutoComplete, self).__init__(parent)
+        self.allowed_keys = get_key_tables().names
         model = QStringListModel()
         model.setStringList(self.allowed_keys)
         self.setModel(model)
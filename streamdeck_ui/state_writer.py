@@ -0,0 +1,138 @@
+import os
+import threading
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+
+from streamdeck_ui.config import (
+    STATE_JOURNAL_COMPACTION_SIZE,
+    STATE_JOURNAL_ENABLED,
+    STATE_SAVE_DELAY,
+    StateChange,
+    append_to_journal,
+    journal_size,
+    write_state_to_config,
+)
+from streamdeck_ui.model import DeckState
+
+WRITE_ATTEMPTS = 3
+"Number of times the state is serialized before giving up, when it keeps changing while it is written"
+
+
+class StateWriter:
+    """Writes the configuration to the state file on a background thread. Changes are collected
+    for a short while after the first one, so a burst of changes (such as Home Assistant updates)
+    results in a single write. Every write replaces the state file atomically.
+
+    In journal mode, changes to a single field are appended to the journal of the state file
+    instead, and the state file is only rewritten for other changes (such as a new page), or
+    once the journal is large.
+    """
+
+    writer_thread: Optional[threading.Thread]
+    "The thread that writes the state file"
+
+    def __init__(
+        self,
+        config_file_path: str,
+        get_state: Callable[[], Dict[str, DeckState]],
+        delay: float = STATE_SAVE_DELAY,
+        journal: bool = STATE_JOURNAL_ENABLED,
+    ):
+        """Creates a new StateWriter instance
+
+        :param config_file_path: The path of the state file
+        :type config_file_path: str
+        :param get_state: Returns the state to write
+        :type get_state: Callable[[], Dict[str, DeckState]]
+        :param delay: The number of seconds changes are collected before the state file is written,
+        defaults to STATE_SAVE_DELAY
+        :type delay: float, optional
+        :param journal: When True, changes to a single field are appended to the journal, defaults
+        to STATE_JOURNAL_ENABLED
+        :type journal: bool, optional
+        """
+        self.config_file_path = config_file_path
+        self.get_state = get_state
+        self.delay = delay
+        self.condition = threading.Condition()
+        # Protects dirty_since, and is notified whenever it changes
+        self.dirty_since: Optional[float] = None
+        # When the first change that is not written yet was made, or None if there is none
+        self.journal = journal
+        self.changes: List[StateChange] = []
+        # Changes to append to the journal, in the order they were made
+        self.rewrite = False
+        # True if the state file must be rewritten, because a change cannot be journaled
+        self.write_lock = threading.Lock()
+        # Serializes writes to the state file
+        self.writer_thread = None
+        self.writes = 0
+        "Number of times the state file was written"
+
+    def mark_dirty(self, change: Optional[StateChange] = None) -> None:
+        """Schedules a write of the state file. Returns right away.
+
+        :param change: The change that was made, if it is a change to a single field. Otherwise
+        the whole state file is rewritten.
+        :type change: StateChange, optional
+        """
+        with self.condition:
+            if self.journal and change is not None:
+                self.changes.append(change)
+            else:
+                self.rewrite = True
+            if self.dirty_since is None:
+                self.dirty_since = monotonic()
+            if self.writer_thread is None:
+                self.writer_thread = threading.Thread(target=self._run)
+                self.writer_thread.daemon = True
+                self.writer_thread.start()
+            self.condition.notify_all()
+
+    def flush(self) -> None:
+        """Writes the pending changes, if any, on the calling thread.
+
+        :raises ValueError: If the state file could not be written
+        """
+        with self.write_lock:
+            with self.condition:
+                if self.dirty_since is None:
+                    return
+                self.dirty_since = None
+                changes = self.changes
+                self.changes = []
+                rewrite = self.rewrite
+                self.rewrite = False
+            if not rewrite and os.path.isfile(self.config_file_path):
+                append_to_journal(self.config_file_path, changes)
+                if journal_size(self.config_file_path) <= STATE_JOURNAL_COMPACTION_SIZE:
+                    return
+            # Rewriting the state file also empties the journal
+            self._write()
+
+    def _write(self) -> None:
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                write_state_to_config(self.config_file_path, self.get_state())
+                break
+            except RuntimeError:
+                # A page or button was added or removed while the state was serialized
+                if attempt == WRITE_ATTEMPTS - 1:
+                    raise
+        self.writes += 1
+
+    def _run(self) -> None:
+        """Runs on the writer thread, and writes the state file once changes have been collected
+        for the configured delay."""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.dirty_since is not None)
+                remaining = (self.dirty_since or 0) + self.delay - monotonic()
+                if remaining > 0:
+                    # Woken up early by another change, or by the timeout. Check again.
+                    self.condition.wait(remaining)
+                    continue
+            try:
+                self.flush()
+            except (ValueError, RuntimeError) as error:
+                print(f"Unable to save the configuration: {error}")
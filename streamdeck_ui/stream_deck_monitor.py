@@ -26,8 +26,8 @@ class StreamDeckMonitor:
         """Creates a new StreamDeckMonitor instance
 
         :param lock: A lock object that will be used to get exclusive access while enumerating
-        Stream Decks. This lock must be shared by any object that will read or write to the
-        Stream Deck.
+        Stream Decks. Reads and writes to an attached Stream Deck are serialized by a separate
+        lock per Stream Deck, so this lock only needs to be shared by code that enumerates.
         :type lock: threading.Lock
         :param attached: A callback function that is called when a new StreamDeck is attached. Note
         this runs on a background thread.
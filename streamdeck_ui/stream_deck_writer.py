@@ -0,0 +1,216 @@
+import threading
+from dataclasses import dataclass
+from time import time
+from typing import Dict, Optional
+
+from StreamDeck.Devices.StreamDeck import StreamDeck
+from StreamDeck.Transport.Transport import TransportError
+
+
+@dataclass
+class LatencyStats:
+    count: int = 0
+    """Number of key presses whose feedback was written"""
+    average: float = 0
+    """Average time from the key press to the feedback being written, in seconds"""
+    maximum: float = 0
+    """Longest time from the key press to the feedback being written, in seconds"""
+
+
+class StreamDeckWriter:
+    """Owns the USB transport of a Stream Deck. Key images and device commands are
+    queued by the callers and written to the Stream Deck on a background thread, so
+    rendering never waits on USB latency.
+
+    Only the latest image of a key is kept: an image that has not been written yet
+    is replaced when a newer one for the same key is queued. Priority images (such as
+    key press feedback) are written before the others.
+    """
+
+    writer_thread: Optional[threading.Thread]
+    "The thread that writes to the Stream Deck"
+
+    def __init__(self, lock: threading.Lock, streamdeck: StreamDeck):
+        """Creates a new StreamDeckWriter instance
+
+        :param lock: The lock that serializes reads and writes to the Stream Deck. It is
+        held while a single image or command is written.
+        :type lock: threading.Lock
+        :param streamdeck: The Stream Deck to write to
+        :type streamdeck: StreamDeck
+        """
+        self.lock = lock
+        self.streamdeck = streamdeck
+        self.condition = threading.Condition()
+        # Protects the queues below, and is notified whenever they change
+        self.images: Dict[int, bytes] = {}
+        # Images waiting to be written, in native format, by key
+        self.priority_images: Dict[int, bytes] = {}
+        # Images that are written before any other image, by key
+        self.pressed_at: Dict[int, float] = {}
+        # When the key press was detected, for keys whose press feedback is queued
+        self.brightness: Optional[int] = None
+        self.reset_pending = False
+        self.writer_thread = None
+        self.quit = False
+        self.failed = threading.Event()
+        "Set when the Stream Deck could not be written to. Nothing else is written afterwards"
+        self.busy = False
+        self.writes = 0
+        "Number of key images written to the Stream Deck"
+        self.replaced = 0
+        "Number of key images that were replaced by a newer image before being written"
+        self.latency = LatencyStats()
+        self.latency_total = 0.0
+
+    def set_key_image(self, key: int, image: bytes, priority: bool = False, pressed_at: Optional[float] = None) -> None:
+        """Queues an image to be written to a key.
+
+        :param int key: The key to write to
+        :param bytes image: The image, in the native format of the Stream Deck
+        :param bool priority: If True, the image is written before the other queued images
+        :param float pressed_at: For key press feedback, the time the key press was detected.
+        The time it takes to write the feedback is included in the latency statistics.
+        """
+        with self.condition:
+            if self.failed.is_set():
+                return
+            replaced = self.images.pop(key, None) or self.priority_images.pop(key, None)
+            if replaced is not None:
+                self.replaced += 1
+            if priority:
+                self.priority_images[key] = image
+            else:
+                self.images[key] = image
+            if pressed_at is not None:
+                # If feedback for an earlier press is still queued, measure from that press
+                self.pressed_at.setdefault(key, pressed_at)
+            self.condition.notify_all()
+
+    def set_brightness(self, brightness: int) -> None:
+        """Queues a brightness change. Only the latest brightness is applied."""
+        with self.condition:
+            if self.failed.is_set():
+                return
+            self.brightness = brightness
+            self.condition.notify_all()
+
+    def reset(self) -> None:
+        """Queues a reset of the Stream Deck. Images queued before the reset are discarded."""
+        with self.condition:
+            if self.failed.is_set():
+                return
+            self.replaced += len(self.images) + len(self.priority_images)
+            self.images.clear()
+            self.priority_images.clear()
+            self.pressed_at.clear()
+            self.reset_pending = True
+            self.condition.notify_all()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Waits until everything that has been queued is written.
+
+        :param float timeout: The maximum time to wait, in seconds
+        :return: True if the queues were emptied, False if the timeout expired
+        :rtype: bool
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: not self._pending() or self.writer_thread is None or self.failed.is_set(), timeout
+            )
+
+    def latency_stats(self) -> LatencyStats:
+        """Returns the time it took from key presses to their feedback being written."""
+        with self.condition:
+            return LatencyStats(self.latency.count, self.latency.average, self.latency.maximum)
+
+    def start(self) -> None:
+        """Starts the writer thread. If it is already running, nothing happens."""
+        with self.condition:
+            if self.writer_thread is not None:
+                return
+            self.quit = False
+            self.writer_thread = threading.Thread(target=self._run)
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+
+    def stop(self) -> None:
+        """Writes what is still queued, then stops the writer thread. Only start and stop change
+        writer_thread; when the Stream Deck cannot be written to, the thread sets failed and ends."""
+        with self.condition:
+            thread = self.writer_thread
+            if thread is None:
+                return
+            self.quit = True
+            self.condition.notify_all()
+        try:
+            thread.join()
+        except RuntimeError:
+            pass
+        with self.condition:
+            if self.writer_thread is thread:
+                self.writer_thread = None
+
+    def _pending(self) -> bool:
+        return bool(
+            self.busy or self.reset_pending or self.brightness is not None or self.priority_images or self.images
+        )
+
+    def _run(self) -> None:
+        """Runs on the writer thread and writes one image or command at a time, so newer
+        images and priority images can still be queued in between."""
+        while True:
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+                self.condition.wait_for(lambda: self.quit or self._pending())
+                if not self._pending():
+                    break
+
+                self.busy = True
+                reset = self.reset_pending
+                self.reset_pending = False
+                brightness = None
+                key: Optional[int] = None
+                image: Optional[bytes] = None
+                pressed_at: Optional[float] = None
+                if not reset:
+                    brightness = self.brightness
+                    self.brightness = None
+                if not reset and brightness is None:
+                    queue = self.priority_images or self.images
+                    key = next(iter(queue))
+                    image = queue.pop(key)
+                    pressed_at = self.pressed_at.pop(key, None)
+
+            try:
+                with self.lock:
+                    if reset:
+                        self.streamdeck.reset()
+                    elif brightness is not None:
+                        self.streamdeck.set_brightness(brightness)
+                    else:
+                        self.streamdeck.set_key_image(key, image)
+            except TransportError:
+                with self.condition:
+                    self.failed.set()
+                    self.images.clear()
+                    self.priority_images.clear()
+                    self.pressed_at.clear()
+                    self.brightness = None
+                    self.reset_pending = False
+                    self.busy = False
+                    self.condition.notify_all()
+                return
+
+            if key is not None:
+                self.writes += 1
+            if pressed_at is not None:
+                self._record_latency(time() - pressed_at)
+
+    def _record_latency(self, latency: float) -> None:
+        with self.condition:
+            self.latency_total += latency
+            self.latency.count += 1
+            self.latency.average = self.latency_total / self.latency.count
+            self.latency.maximum = max(self.latency.maximum, latency)
@@ -1,3 +1,10 @@
+from functools import partial
+from unittest.mock import MagicMock
+
+from streamdeck_ui.api import StreamDeckServer
+from streamdeck_ui.config import read_state_from_config
+from streamdeck_ui.model import DEFAULT_BUTTON_STATE
+from streamdeck_ui.state_writer import StateWriter
 from tests.api.helpers import assert_display_handler_not_used, assert_display_handler_used, assert_state_saved
 
 
@@ -148,3 +155,83 @@ def test_remove_button_state_cannot_delete_last_button_state(api_server, streamd
     api_server.remove_button_state(streamdeck_serial, 0, 0, 0)
 
     assert api_server.get_button_states(streamdeck_serial, 0, 0) == [0]
+
+
+def test_button_default_state_is_copied_on_write(api_server, streamdeck_serial):
+    """Test that changing a button that has the shared default state does not change the other buttons."""
+    assert api_server.get_button_state_object(streamdeck_serial, 0, 5, 0) is DEFAULT_BUTTON_STATE
+    assert api_server.get_button_state_object(streamdeck_serial, 0, 6, 0) is DEFAULT_BUTTON_STATE
+
+    api_server.set_button_text(streamdeck_serial, 0, 5, "changed")
+
+    assert api_server.get_button_text(streamdeck_serial, 0, 5) == "changed"
+    assert api_server.get_button_text(streamdeck_serial, 0, 6) == ""
+    assert DEFAULT_BUTTON_STATE.text == ""
+
+
+def test_button_getters_do_not_add_buttons(api_server, streamdeck_serial):
+    """Test that reading a button that does not exist does not add it, or its page."""
+    buttons = api_server.state[streamdeck_serial].buttons
+    pages = list(buttons)
+
+    assert api_server.get_button_text(streamdeck_serial, 0, 10) == ""
+    assert api_server.get_button_states(streamdeck_serial, 0, 10) == [0]
+    assert api_server.get_button_command(streamdeck_serial, 7, 0) == ""
+
+    assert 10 not in buttons[0]
+    assert list(buttons) == pages
+
+    api_server.set_button_text(streamdeck_serial, 7, 0, "added")
+    assert api_server.get_button_text(streamdeck_serial, 7, 0) == "added"
+    assert 7 in buttons
+
+
+def test_swap_with_untouched_button(api_server, streamdeck_serial):
+    """Test that a button can be swapped with a button that is not in the configuration."""
+    api_server.set_button_text(streamdeck_serial, 0, 0, "moved")
+    assert 10 not in api_server.state[streamdeck_serial].buttons[0]
+
+    api_server.swap_buttons(streamdeck_serial, 0, 0, 10)
+    assert api_server.get_button_text(streamdeck_serial, 0, 10) == "moved"
+    assert api_server.get_button_text(streamdeck_serial, 0, 0) == ""
+
+    api_server.swap_buttons(streamdeck_serial, 7, 11, 10)
+    assert api_server.get_button_text(streamdeck_serial, 7, 10) == ""
+
+
+def test_button_actions_follow_changes(api_server, streamdeck_serial):
+    """Test that the compiled actions of a button are compiled again when the button changes."""
+    # Restore the real _save_state, without writing the state file
+    api_server._save_state = partial(StreamDeckServer._save_state, api_server)
+    api_server.state_writer = MagicMock()
+
+    api_server.set_button_command(streamdeck_serial, 0, 0, "echo first")
+    assert api_server.get_button_actions(streamdeck_serial, 0, 0).command_args == ["echo", "first"]
+
+    api_server.set_button_command(streamdeck_serial, 0, 0, "echo second")
+    api_server.set_button_switch_page(streamdeck_serial, 0, 0, 2)
+    actions = api_server.get_button_actions(streamdeck_serial, 0, 0)
+    assert actions.command_args == ["echo", "second"]
+    assert actions.switch_page_index == 1
+
+    api_server.set_button_state(streamdeck_serial, 0, 0, 1)
+    assert api_server.get_button_actions(streamdeck_serial, 0, 0).command == ""
+
+
+def test_added_button_state_is_saved_with_the_journal(api_server, streamdeck_serial, tmp_path):
+    """Test that a new button state, and switching to it, are read back when the journal is used."""
+    config_file = str(tmp_path / "config.json")
+    api_server._save_state = partial(StreamDeckServer._save_state, api_server)
+    api_server.state_writer = StateWriter(config_file, lambda: api_server.state, delay=60, journal=True)
+    api_server._save_state()
+    api_server.state_writer.flush()
+
+    new_state = api_server.add_new_button_state(streamdeck_serial, 0, 0)
+    api_server.set_button_state(streamdeck_serial, 0, 0, new_state)
+    api_server.remove_page(streamdeck_serial, 1)
+    api_server.state_writer.flush()
+
+    state = read_state_from_config(config_file)[streamdeck_serial]
+    assert new_state in state.buttons[0][0].states
+    assert state.buttons[0][0].state == new_state
+    assert 1 not in state.buttons
@@ -1,5 +1,7 @@
+import threading
 from unittest.mock import MagicMock
 
+from streamdeck_ui.action_executor import BACKGROUND_LANE
 from tests.api.helpers import assert_state_saved
 
 
@@ -33,3 +35,15 @@ def test_display_timeout(api_server, streamdeck_serial):
     api_server.set_display_timeout(streamdeck_serial, 10)
     assert api_server.get_display_timeout(streamdeck_serial) == 10
     assert_state_saved(api_server)
+
+
+def test_actions_run_after_restart(api_server, streamdeck_serial):
+    """Test that key actions still run after the server is stopped and started again, as on import."""
+    api_server.monitor = MagicMock()
+    api_server.stop()
+    api_server.start()
+
+    ran = threading.Event()
+    api_server.action_executor.submit(streamdeck_serial, 0, BACKGROUND_LANE, lambda _cancelled: ran.set())
+    assert ran.wait(2)
+    api_server.action_executor.stop()
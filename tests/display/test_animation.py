@@ -0,0 +1,81 @@
+from fractions import Fraction
+from typing import Callable, List, Optional, Tuple
+
+from PIL import Image
+
+from streamdeck_ui.display.animation import Animation
+from streamdeck_ui.display.background_color_filter import BackgroundColorFilter
+from streamdeck_ui.display.empty_filter import EmptyFilter
+from streamdeck_ui.display.filter import Filter
+from streamdeck_ui.display.pipeline import Pipeline
+from streamdeck_ui.display.pulse_filter import PulseFilter
+
+SIZE = (10, 10)
+
+
+class LoopFilter(Filter):
+    """Loops over solid colors, like an animated GIF."""
+
+    def __init__(self, colors: List[str], duration: float):
+        super().__init__()
+        self.colors = colors
+        self.duration = duration
+        self.index = 0
+
+    def initialize(self, size: Tuple[int, int]):
+        self.size = size
+
+    def transform(
+        self,
+        get_input: Callable[[], Image.Image],
+        get_output: Callable[[int], Image.Image],
+        input_changed: bool,
+        time: Fraction,
+    ) -> Tuple[Image.Image, int]:
+        hashcode = hash((self.__class__, self.index))
+        if not input_changed:
+            return (None, hashcode)
+        return (Image.new("RGB", self.size, self.colors[self.index]), hashcode)
+
+    def frame_durations(self) -> Optional[List[float]]:
+        return [self.duration] * len(self.colors)
+
+    def seek(self, index: int, time: Fraction) -> None:
+        self.index = index
+
+
+def create_pipeline(*filters) -> Pipeline:
+    pipe = Pipeline()
+    for pipeline_filter in filters:
+        pipeline_filter.initialize(SIZE)
+        pipe.add(pipeline_filter)
+    return pipe
+
+
+def test_frame_at_loops():
+    animation = Animation([(b"first", 1, 0.1), (b"second", 2, 0.3)], start=10)
+
+    assert animation.frame_at(10.05) == (b"first", 1, 10.1)
+    assert animation.frame_at(10.2)[:2] == (b"second", 2)
+    assert animation.frame_at(10.45)[:2] == (b"first", 1)
+    assert animation.frame_at(10.45)[2] == 10.5
+
+
+def test_render_loop_renders_every_frame():
+    pipe = create_pipeline(EmptyFilter(), LoopFilter(["red", "green", "blue"], 0.1))
+    frames = pipe.render_loop(Fraction(0))
+
+    assert frames is not None
+    assert [image.getpixel((0, 0)) for image, _, _ in frames] == [(255, 0, 0), (0, 128, 0), (0, 0, 255)]
+    assert len({hashcode for _, hashcode, _ in frames}) == 3
+    # The pipeline is left on the first frame
+    assert pipe.last_result().getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_render_loop_needs_a_loop():
+    assert create_pipeline(EmptyFilter(), BackgroundColorFilter("#ff0000")).render_loop(Fraction(0)) is None
+
+
+def test_render_loop_with_other_animated_filter():
+    pipe = create_pipeline(EmptyFilter(), LoopFilter(["red", "green"], 0.1), PulseFilter())
+    assert pipe.render_loop(Fraction(0)) is None
@@ -0,0 +1,307 @@
+import os
+import threading
+from time import sleep, time
+from typing import List, Tuple
+
+import pytest
+
+from streamdeck_ui.config import DEFAULT_FONT_FALLBACK_PATH, PAGE_EVICTION_TIME
+from streamdeck_ui.display.background_color_filter import BackgroundColorFilter
+from streamdeck_ui.display.display_grid import DisplayGrid
+from streamdeck_ui.display.empty_filter import EmptyFilter
+from streamdeck_ui.display.frame_store import FrameStore
+from streamdeck_ui.display.text_filter import TextFilter
+from streamdeck_ui.mock_streamdeck import StreamDeckMock
+from tests.display.test_animation import LoopFilter
+
+
+class RecordingStreamDeck(StreamDeckMock):
+    """A mock Stream Deck that records the keys written to."""
+
+    def __init__(self):
+        super().__init__(None)
+        self.writes: List[int] = []
+
+    def set_key_image(self, key, image):
+        self.writes.append(key)
+
+
+@pytest.fixture
+def deck() -> RecordingStreamDeck:
+    return RecordingStreamDeck()
+
+
+@pytest.fixture
+def display_grid(deck):
+    grid = DisplayGrid(threading.Lock(), deck, [0, 1], lambda serial, cpu: None)
+    grid.set_page(0)
+    yield grid
+    grid.stop()
+
+
+def test_unchanged_keys_are_not_written_on_page_switch(deck, display_grid):
+    for button in range(deck.key_count()):
+        display_grid.replace(0, button, [BackgroundColorFilter("#ff0000")])
+        display_grid.replace(1, button, [BackgroundColorFilter("#ff0000")])
+    display_grid.replace(1, 0, [BackgroundColorFilter("#00ff00")])
+    display_grid.start()
+    assert len(deck.writes) == deck.key_count()
+
+    deck.writes.clear()
+    display_grid.set_page(1)
+    display_grid.synchronize()
+
+    assert deck.writes == [0]
+    assert display_grid.skipped_writes == deck.key_count() - 1
+
+
+def test_restart_rewrites_all_keys(deck, display_grid):
+    display_grid.start()
+    display_grid.stop()
+    deck.writes.clear()
+    display_grid.start()
+
+    assert len(deck.writes) == deck.key_count()
+
+
+def test_key_press_feedback_is_written_without_waiting_for_a_pass(deck, display_grid):
+    for button in range(deck.key_count()):
+        display_grid.replace(0, button, [BackgroundColorFilter("#ff0000")])
+    display_grid.start()
+    display_grid.stop()
+    deck.writes.clear()
+
+    # With the display stopped, only the frame rendered ahead of time can reach the key
+    display_grid.writer.start()
+    display_grid.set_keypress(3, True)
+    display_grid.writer.flush()
+
+    assert deck.writes == [3]
+    assert display_grid.writer.latency_stats().count == 1
+
+
+def test_key_press_feedback_is_not_written_twice(deck, display_grid):
+    display_grid.replace(0, 0, [BackgroundColorFilter("#ff0000")])
+    display_grid.start()
+    deck.writes.clear()
+
+    display_grid.set_keypress(0, True)
+    display_grid.synchronize()
+    display_grid.set_keypress(0, False)
+    display_grid.synchronize()
+
+    assert deck.writes == [0, 0]
+
+
+def test_frame_dropped_by_a_key_press_is_rendered_again(deck, display_grid):
+    display_grid.replace(0, 0, [BackgroundColorFilter("#ff0000")])
+    display_grid.start()
+    deck.writes.clear()
+
+    # The key was pressed and released while its frame was rendered, so the frame is dropped,
+    # while the pipeline is left as it was
+    with display_grid.lock:
+        press_count = display_grid.press_counts.get(0, 0)
+        display_grid.press_counts[0] = press_count + 2
+    display_grid._queue_frame(0, 0, b"", press_count, {})
+    display_grid.synchronize()
+
+    assert deck.writes == [0]
+
+
+class FilterFactory:
+    """Records the buttons whose filters are built."""
+
+    def __init__(self):
+        self.built: List[Tuple[int, int]] = []
+
+    def __call__(self, page: int, button: int):
+        self.built.append((page, button))
+        return [BackgroundColorFilter("#ff0000")]
+
+
+@pytest.fixture
+def lazy_display_grid(deck):
+    factory = FilterFactory()
+    grid = DisplayGrid(threading.Lock(), deck, [0, 1, 2], lambda serial, cpu: None, filter_factory=factory)
+    grid.set_page(0)
+    yield grid, factory
+    grid.stop()
+
+
+def test_only_shown_pages_are_built(deck, lazy_display_grid):
+    grid, factory = lazy_display_grid
+    grid.start()
+
+    assert {page for page, _ in factory.built} == {0}
+    assert grid.is_page_loaded(0)
+    assert not grid.is_page_loaded(1)
+
+    # Filters of pages that are not loaded are not needed
+    grid.replace(1, 0, [BackgroundColorFilter("#00ff00")])
+    assert not grid.is_page_loaded(1)
+
+    grid.set_page(2)
+    assert {page for page, _ in factory.built} == {0, 2}
+
+
+def test_prefetch_builds_pages_in_background(deck, lazy_display_grid):
+    grid, factory = lazy_display_grid
+    grid.prefetch([1])
+    deadline = time() + 5
+    while not grid.is_page_loaded(1) and time() < deadline:
+        sleep(0.01)
+
+    assert grid.is_page_loaded(1)
+    assert len(factory.built) == 2 * deck.key_count()
+
+
+def test_pages_not_shown_for_a_while_are_unloaded(lazy_display_grid):
+    grid, _ = lazy_display_grid
+    grid.set_page(1)
+    grid.set_page(2)
+    grid._evict_pages(time() + PAGE_EVICTION_TIME + 1)
+
+    assert not grid.is_page_loaded(0)
+    assert not grid.is_page_loaded(1)
+    assert grid.is_page_loaded(2)
+
+
+def test_button_changed_while_its_page_is_built(deck):
+    """Ensure that a button changed after the filters of its page were read is replaced once the
+    page is in place"""
+    colors = {button: "#ff0000" for button in range(deck.key_count())}
+    reading = threading.Event()
+    changed = threading.Event()
+
+    def factory(page, button):
+        color = colors[button]
+        if button == 0:
+            reading.set()
+            changed.wait(5)
+        return [BackgroundColorFilter(color)]
+
+    grid = DisplayGrid(threading.Lock(), deck, [0, 1], lambda serial, cpu: None, filter_factory=factory)
+    loader = threading.Thread(target=grid.load_page, args=(1,))
+    loader.start()
+    assert reading.wait(5)
+
+    # A setter changes the button while the page is being built
+    colors[0] = "#00ff00"
+    assert not grid.needs_replace(1, 0)
+    changed.set()
+    loader.join(5)
+    for future in list(grid.pending_builds):
+        future.result(5)
+
+    assert grid.is_page_loaded(1)
+    assert grid.pages[1][0].filters[1][0].color == BackgroundColorFilter("#00ff00").color
+    assert grid.needs_replace(1, 0)
+    assert not grid.needs_replace(0, 0)
+    grid.stop()
+
+
+class SlowFilter(EmptyFilter):
+    """A filter whose initialization waits until it is released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def initialize(self, size):
+        self.release.wait(5)
+        super().initialize(size)
+
+
+def test_filters_are_initialized_without_blocking_the_display(display_grid):
+    display_grid.start()
+    previous = display_grid.pages[0][0]
+    slow = SlowFilter()
+    future = display_grid.replace(0, 0, [slow])
+
+    # The display keeps running with the previous pipeline
+    cycle = display_grid.cycle
+    display_grid.set_keypress(1, True)
+    deadline = time() + 5
+    while display_grid.cycle == cycle and time() < deadline:
+        sleep(0.01)
+    assert display_grid.cycle > cycle
+    assert display_grid.pages[0][0] is previous
+
+    slow.release.set()
+    future.result(5)
+    assert display_grid.pages[0][0] is not previous
+
+
+def test_latest_replace_wins(display_grid):
+    slow = SlowFilter()
+    first = display_grid.replace(0, 0, [slow])
+    second = display_grid.replace(0, 0, [BackgroundColorFilter("#00ff00")])
+    slow.release.set()
+    first.result(5)
+    second.result(5)
+
+    filters = [pipeline_filter for pipeline_filter, _ in display_grid.pages[0][0].filters]
+    assert slow not in filters
+    assert any(isinstance(pipeline_filter, BackgroundColorFilter) for pipeline_filter in filters)
+
+
+def test_stored_frames_are_shown_before_the_filters_are_built(deck, tmp_path):
+    store = FrameStore(str(tmp_path))
+    grid = DisplayGrid(
+        threading.Lock(), deck, [0], lambda serial, cpu: None, filter_factory=FilterFactory(), frame_store=store
+    )
+    grid.set_page(0)
+    grid.start()
+    grid.stop()
+    assert len(os.listdir(tmp_path)) == 1
+
+    # Another run finds the frames in the store, and does not write them again once rendered
+    deck.writes.clear()
+    grid = DisplayGrid(
+        threading.Lock(), deck, [0], lambda serial, cpu: None, filter_factory=FilterFactory(), frame_store=store
+    )
+    grid.writer.start()
+    grid.set_page(0)
+    grid.writer.flush()
+    assert len(deck.writes) == deck.key_count()
+
+    grid.start()
+    grid.stop()
+    assert len(deck.writes) == deck.key_count()
+    assert grid.skipped_writes == deck.key_count()
+
+
+def test_unchanged_filters_are_reused(display_grid):
+    background = BackgroundColorFilter("#ff0000")
+    text = TextFilter("1", DEFAULT_FONT_FALLBACK_PATH, 14, "white", "bottom", "center")
+    display_grid.replace(0, 0, [background, text]).result(5)
+    display_grid.start()
+    cache = display_grid.pages[0][0].output_cache
+
+    # Only the text changes, as when a sensor reports a new value
+    new_text = TextFilter("2", DEFAULT_FONT_FALLBACK_PATH, 14, "white", "bottom", "center")
+    display_grid.replace(0, 0, [BackgroundColorFilter("#ff0000"), new_text]).result(5)
+
+    filters = [pipeline_filter for pipeline_filter, _ in display_grid.pages[0][0].filters]
+    assert filters[1] is background
+    assert filters[2] is new_text
+    # The images rendered by the unchanged stages are kept
+    assert display_grid.pages[0][0].output_cache is cache
+
+
+def test_animations_share_frames_within_the_frame_cache_budget(display_grid):
+    display_grid.replace(0, 0, [BackgroundColorFilter("#000000"), LoopFilter(["red", "blue"], 0.1)]).result(5)
+    animation = display_grid.pages[0][0].animation
+    assert animation is not None
+    display_grid.frame_cache.budget = sum(animation.frame_sizes().values())
+
+    # The same frames are shared with another key, so they fit
+    display_grid.replace(0, 1, [BackgroundColorFilter("#000000"), LoopFilter(["red", "blue"], 0.1)]).result(5)
+    shared = display_grid.pages[0][1].animation
+    assert shared is not None
+    assert all(frame[0] is other[0] for frame, other in zip(shared.frames, animation.frames))
+
+    # Other frames do not fit, and are rendered on every tick instead
+    display_grid.replace(0, 2, [BackgroundColorFilter("#ffffff"), LoopFilter(["red", "blue"], 0.1)]).result(5)
+    assert display_grid.pages[0][2].animation is None
@@ -0,0 +1,94 @@
+import gc
+
+import pytest
+
+from streamdeck_ui.display.frame_cache import FrameCache
+
+
+@pytest.fixture
+def global_budget():
+    """Restore the global budget shared by all caches after each test."""
+    budget = FrameCache.global_budget
+    yield
+    FrameCache.global_budget = budget
+
+
+def test_hit_and_miss():
+    cache = FrameCache(budget=100)
+    assert cache.get(1) is None
+    cache.put(1, b"x" * 10)
+    assert cache.get(1) == b"x" * 10
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.entries == 1
+    assert stats.size == 10
+    cache.clear()
+
+
+def test_evicts_least_recently_used():
+    cache = FrameCache(budget=30)
+    cache.put(1, b"a" * 10)
+    cache.put(2, b"b" * 10)
+    cache.put(3, b"c" * 10)
+    # Touch the oldest frame so the second one becomes the least recently used
+    cache.get(1)
+    cache.put(4, b"d" * 10)
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.stats().evictions == 1
+    assert cache.stats().size == 30
+    cache.clear()
+
+
+def test_keeps_frame_larger_than_budget():
+    cache = FrameCache(budget=5)
+    cache.put(1, b"a" * 10)
+    assert cache.get(1) is not None
+    cache.clear()
+
+
+def test_global_budget_evicts_from_largest_cache(global_budget):
+    FrameCache.global_budget = 40
+    small = FrameCache(budget=100)
+    large = FrameCache(budget=100)
+    small.put(1, b"a" * 10)
+    large.put(1, b"b" * 10)
+    large.put(2, b"b" * 10)
+    large.put(3, b"b" * 10)
+    small.put(2, b"a" * 10)
+
+    assert small.stats().evictions == 0
+    assert large.stats().evictions == 1
+    assert large.get(1) is None
+    small.clear()
+    large.clear()
+
+
+def test_clear_releases_global_budget(global_budget):
+    FrameCache.global_budget = 20
+    first = FrameCache(budget=100)
+    first.put(1, b"a" * 20)
+    first.clear()
+
+    second = FrameCache(budget=100)
+    second.put(1, b"b" * 20)
+    assert second.stats().evictions == 0
+    second.clear()
+
+
+def test_collected_cache_releases_global_budget(global_budget):
+    FrameCache.global_budget = 30
+    first = FrameCache(budget=100)
+    first.put(1, b"a" * 20)
+    del first
+    gc.collect()
+
+    second = FrameCache(budget=100)
+    second.put(1, b"b" * 10)
+    second.put(2, b"b" * 10)
+    assert second.stats().evictions == 0
+    assert second.get(1) is not None
+    second.clear()
@@ -0,0 +1,36 @@
+import os
+
+from streamdeck_ui.display.frame_store import FrameStore
+
+
+def test_stored_frames_are_found_by_key(tmp_path):
+    store = FrameStore(str(tmp_path / "frames"))
+    key = FrameStore.key("Stream Deck Original", ("BackgroundColorFilter", (255, 0, 0)))
+    assert store.get(key) is None
+
+    store.put(key, b"frame")
+
+    assert FrameStore(str(tmp_path / "frames")).get(key) == b"frame"
+
+
+def test_keys_are_stable():
+    # Unlike hash(), the key must not change from one run to the next
+    assert FrameStore.key("deck", ("TextFilter", "text", 14)) == FrameStore.key("deck", ("TextFilter", "text", 14))
+    assert FrameStore.key("deck", ("TextFilter", "text", 14)) != FrameStore.key("deck", ("TextFilter", "text", 15))
+    assert len(FrameStore.key("deck")) == 32
+
+
+def test_least_recently_used_frames_are_deleted(tmp_path):
+    store = FrameStore(str(tmp_path), budget=300)
+    for index in range(3):
+        store.put(f"frame{index}", bytes(100))
+        # Make the order of the modification times explicit
+        os.utime(tmp_path / f"frame{index}.frame", (index, index))
+    store.get("frame0")
+
+    store.put("frame3", bytes(100))
+
+    assert store.get("frame0") is not None
+    assert store.get("frame1") is None
+    assert store.size is not None and store.size <= 300
+    assert store.stats().evictions == 2
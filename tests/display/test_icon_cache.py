@@ -0,0 +1,57 @@
+from PIL import Image
+
+from streamdeck_ui.display.icon_cache import Frames, IconCache
+from streamdeck_ui.display.output_cache import image_size
+
+SIZE = (10, 10)
+
+
+class Loader:
+    """Counts how many times an icon is loaded."""
+
+    def __init__(self):
+        self.loads = 0
+
+    def __call__(self) -> Frames:
+        self.loads += 1
+        return [(Image.new("RGB", SIZE), -1, 1)]
+
+
+def test_icon_is_loaded_once():
+    cache = IconCache()
+    load = Loader()
+    first = cache.acquire("icon", load)
+    second = cache.acquire("icon", load)
+
+    assert load.loads == 1
+    assert first is second
+    assert cache.stats().hits == 1
+
+
+def test_used_icons_are_not_evicted():
+    cache = IconCache(budget=0)
+    load = Loader()
+    cache.acquire("icon", load)
+    cache.acquire("other", Loader())
+
+    assert cache.stats().entries == 2
+    cache.acquire("icon", load)
+    assert load.loads == 1
+
+
+def test_unused_icons_are_evicted_over_budget():
+    icon_bytes = image_size(Image.new("RGB", SIZE))
+    cache = IconCache(budget=icon_bytes)
+    load = Loader()
+    for key in ("first", "second"):
+        cache.acquire(key, load)
+        cache.release(key)
+
+    stats = cache.stats()
+    assert stats.entries == 1
+    assert stats.evictions == 1
+    assert stats.size == icon_bytes
+
+    # The most recently used icon is still cached
+    cache.acquire("second", load)
+    assert load.loads == 2
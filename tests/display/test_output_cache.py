@@ -0,0 +1,111 @@
+from fractions import Fraction
+
+from PIL import Image
+
+from streamdeck_ui.display.background_color_filter import BackgroundColorFilter
+from streamdeck_ui.display.empty_filter import EmptyFilter
+from streamdeck_ui.display.output_cache import OutputCache, OutputCacheBudget, image_size
+from streamdeck_ui.display.pipeline import Pipeline
+
+SIZE = (10, 10)
+
+
+def create_image() -> Image.Image:
+    return Image.new("RGB", SIZE)
+
+
+def test_evicts_least_recently_used():
+    image_bytes = image_size(create_image())
+    cache = OutputCache(limit=image_bytes * 2)
+    cache.put(1, create_image())
+    cache.put(2, create_image())
+    cache.put(3, create_image())
+
+    assert 1 not in cache
+    assert 2 in cache
+    assert 3 in cache
+    assert cache.budget.stats().evictions == 1
+
+
+def test_hot_images_are_pinned():
+    image_bytes = image_size(create_image())
+    cache = OutputCache(limit=image_bytes * 2)
+    cache.put(1, create_image())
+    cache.put(2, create_image())
+    # Image 1 keeps being requested, like the frame of a looping animation
+    cache.get(1)
+    cache.get(1)
+    cache.get(2)
+    cache.put(3, create_image())
+
+    assert 1 in cache
+    assert 2 not in cache
+
+
+def test_budget_is_shared_by_pipelines_of_a_deck():
+    image_bytes = image_size(create_image())
+    budget = OutputCacheBudget(budget=image_bytes * 3)
+    first = OutputCache(budget)
+    second = OutputCache(budget)
+    first.put(1, create_image())
+    first.put(2, create_image())
+    second.put(1, create_image())
+    second.put(2, create_image())
+
+    assert budget.size == image_bytes * 3
+    assert len(first) == 1
+    assert len(second) == 2
+
+
+def test_release_frees_budget():
+    budget = OutputCacheBudget()
+    cache = OutputCache(budget)
+    cache.put(1, create_image())
+    cache.release()
+    cache.put(2, create_image())
+
+    assert budget.size == 0
+    assert len(cache) == 0
+
+
+def test_pipeline_uses_budget():
+    budget = OutputCacheBudget()
+    pipe = Pipeline(budget)
+    for pipeline_filter in [EmptyFilter(), BackgroundColorFilter("#ff0000")]:
+        pipeline_filter.initialize(SIZE)
+        pipe.add(pipeline_filter)
+
+    image, _ = pipe.execute(Fraction(0))
+    assert image is not None
+    assert len(pipe.output_cache) == 2
+    assert budget.size == 2 * image_size(image)
+
+
+def test_pins_wear_off():
+    image_bytes = image_size(create_image())
+    cache = OutputCache(limit=image_bytes * 2)
+    cache.put(1, create_image())
+    cache.get(1)
+    cache.get(1)
+    # Image 1 is pinned, but is no longer requested, like an image of a button that changed
+    cache.put(2, create_image())
+    cache.put(3, create_image())
+    assert 1 in cache
+    assert 2 not in cache
+
+    cache.put(4, create_image())
+    assert 1 not in cache
+    assert 3 in cache
+
+
+def test_inherited_images_are_unpinned():
+    cache = OutputCache()
+    cache.put(1, create_image())
+    cache.get(1)
+    cache.get(1)
+    cache.reset_hits()
+    cache.put(2, create_image())
+    cache.evict()
+
+    assert 1 not in cache
+    assert 2 in cache
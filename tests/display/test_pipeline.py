@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from fractions import Fraction
+
+from streamdeck_ui.display.background_color_filter import BackgroundColorFilter
+from streamdeck_ui.display.empty_filter import EmptyFilter
+from streamdeck_ui.display.pipeline import Pipeline
+from streamdeck_ui.display.pulse_filter import PulseFilter
+
+SIZE = (10, 10)
+
+
+def create_pipeline(*filters) -> Pipeline:
+    pipe = Pipeline()
+    for pipeline_filter in filters:
+        pipeline_filter.initialize(SIZE)
+        pipe.add(pipeline_filter)
+    return pipe
+
+
+def test_static_pipeline_has_no_deadline():
+    pipe = create_pipeline(EmptyFilter(), BackgroundColorFilter("#ff0000"))
+    pipe.execute(Fraction(0))
+    assert pipe.next_deadline() is None
+
+
+def test_pulse_deadline():
+    pulse = PulseFilter()
+    pipe = create_pipeline(EmptyFilter(), BackgroundColorFilter("#ff0000"), pulse)
+    pipe.execute(Fraction(10))
+    assert pipe.next_deadline() == 10 + pulse.pulse_delay
+
+
+PIPELINE_HASH = """
+from fractions import Fraction
+from streamdeck_ui.display.background_color_filter import BackgroundColorFilter
+from streamdeck_ui.display.empty_filter import EmptyFilter
+from streamdeck_ui.display.pipeline import Pipeline
+pipe = Pipeline()
+for pipeline_filter in (EmptyFilter(), BackgroundColorFilter("#ff0000")):
+    pipeline_filter.initialize((10, 10))
+    pipe.add(pipeline_filter)
+print(pipe.execute(Fraction(0))[1])
+"""
+
+
+def test_pipeline_hash_is_the_same_in_every_process():
+    hashes = {
+        subprocess.run(
+            [sys.executable, "-c", PIPELINE_HASH],
+            env={**os.environ, "PYTHONHASHSEED": seed, "PYTHONPATH": os.pathsep.join(sys.path)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+    _, hashcode = create_pipeline(EmptyFilter(), BackgroundColorFilter("#ff0000")).execute(Fraction(0))
+
+    assert hashes == {f"{hashcode}\n"}
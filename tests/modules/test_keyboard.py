@@ -1,7 +1,18 @@
+import threading
+
 import pytest
 from evdev import ecodes as e
 
-from streamdeck_ui.modules.keyboard import parse_keys_as_keycodes
+from streamdeck_ui.modules.keyboard import (
+    TypingEngine,
+    UInputWrapper,
+    compile_text,
+    get_key_tables,
+    get_valid_key_names,
+    keyboard_press_keycodes,
+    parse_keys_as_keycodes,
+    prewarm_keyboard,
+)
 
 
 @pytest.mark.parametrize(
@@ -31,3 +42,110 @@ def test_parse_keys_as_keycodes(keys, expected):
 def test_parse_keys_as_keycodes_with_invalid_key():
     with pytest.raises(ValueError):
         parse_keys_as_keycodes("invalid_key")
+
+
+class FakeUInput:
+    """Records the events written to a virtual keyboard"""
+
+    def __init__(self):
+        self.events = []
+        self.frames = 0
+
+    def write(self, event_type, code, value):
+        self.events.append((event_type, code, value))
+
+    def syn(self):
+        self.frames += 1
+
+
+class FakeCapsLock:
+    def __init__(self, on):
+        self.on = on
+
+    def is_on(self):
+        return self.on
+
+
+@pytest.mark.parametrize(
+    "caps_lock, expected",
+    [
+        (False, [(e.KEY_A, 1), (e.KEY_A, 0), (e.KEY_LEFTSHIFT, 1), (e.KEY_B, 1), (e.KEY_B, 0), (e.KEY_LEFTSHIFT, 0)]),
+        (True, [(e.KEY_LEFTSHIFT, 1), (e.KEY_A, 1), (e.KEY_A, 0), (e.KEY_LEFTSHIFT, 0), (e.KEY_B, 1), (e.KEY_B, 0)]),
+    ],
+)
+def test_compile_text(caps_lock, expected):
+    strokes, unsupported = compile_text("aB", caps_lock)
+    assert [event for stroke in strokes for event in stroke] == expected
+    assert unsupported == ()
+
+
+def test_compile_text_with_unicode():
+    assert compile_text("é", False)[0] == (
+        (
+            (e.KEY_LEFTSHIFT, 1),
+            (e.KEY_LEFTCTRL, 1),
+            (e.KEY_U, 1),
+            (e.KEY_U, 0),
+            (e.KEY_E, 1),
+            (e.KEY_E, 0),
+            (e.KEY_9, 1),
+            (e.KEY_9, 0),
+            (e.KEY_LEFTSHIFT, 0),
+            (e.KEY_LEFTCTRL, 0),
+        ),
+    )
+
+
+def test_typing_engine_paces_frames(monkeypatch):
+    """Ensure that the engine pauses between frames of characters, not after every character"""
+    sleeps = []
+    monkeypatch.setattr("streamdeck_ui.modules.keyboard.time.sleep", sleeps.append)
+    monkeypatch.setattr("streamdeck_ui.modules.keyboard.time.monotonic", lambda: 0.0)
+    device = FakeUInput()
+    engine = TypingEngine(characters_per_second=100, characters_per_frame=4, caps_lock=FakeCapsLock(False))
+
+    engine.write(device, "hello world")
+
+    assert device.frames == 11
+    assert len(device.events) == 22
+    assert sleeps == [pytest.approx(0.04), pytest.approx(0.08)]
+
+
+def test_unsupported_characters_are_reported_on_every_write(capsys):
+    engine = TypingEngine(characters_per_second=0, caps_lock=FakeCapsLock(False))
+    device = FakeUInput()
+
+    for _ in range(2):
+        engine.write(device, "a\r")
+        assert capsys.readouterr().out == "Unsupported character: \r\n"
+    assert device.frames == 2
+
+
+def test_typing_engine_is_cancelled():
+    cancelled = threading.Event()
+    cancelled.set()
+    device = FakeUInput()
+
+    TypingEngine(characters_per_second=0, caps_lock=FakeCapsLock(False)).write(device, "hello", cancelled)
+
+    assert device.events == []
+
+
+def test_key_tables_are_shared():
+    """Ensure that the key tables are built once, and shared with the autocompletion"""
+    assert get_key_tables() is get_key_tables()
+    assert "ctrl" in get_key_tables().names
+    assert get_valid_key_names() == get_key_tables().names
+
+
+def test_prewarm_keyboard(monkeypatch):
+    """Ensure that the virtual keyboard is created in the background, once"""
+    devices = []
+    monkeypatch.setattr("streamdeck_ui.modules.keyboard.UInput", lambda events: devices.append(events) or FakeUInput())
+    monkeypatch.setattr("streamdeck_ui.modules.keyboard._UINPUT", UInputWrapper())
+    monkeypatch.setattr("streamdeck_ui.modules.keyboard._TYPING_ENGINE.caps_lock", FakeCapsLock(False))
+
+    prewarm_keyboard().join(2)
+    keyboard_press_keycodes([[e.KEY_A]])
+
+    assert devices == [{e.EV_KEY: get_key_tables().supported_keycodes}]
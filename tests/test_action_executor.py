@@ -0,0 +1,80 @@
+import threading
+import time
+
+from streamdeck_ui.action_executor import BACKGROUND_LANE, KEYBOARD_LANE, ActionExecutor
+
+
+def wait_until_idle(executor: ActionExecutor, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = executor.get_stats()
+        if not stats.pending and not stats.running:
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_actions_of_a_key_run_in_order():
+    """Ensure that the actions of a key run one after the other, even on different lanes"""
+    executor = ActionExecutor()
+    ran = []
+
+    def action(name, delay):
+        def run(_cancelled):
+            time.sleep(delay)
+            ran.append(name)
+
+        return run
+
+    executor.submit("ABC123", 1, BACKGROUND_LANE, action("command", 0.05))
+    executor.submit("ABC123", 1, KEYBOARD_LANE, action("keys", 0.01))
+    executor.submit("ABC123", 1, BACKGROUND_LANE, action("second press", 0))
+    assert wait_until_idle(executor)
+    executor.stop()
+
+    assert ran == ["command", "keys", "second press"]
+    stats = executor.get_stats()
+    assert stats.count == 3
+    assert stats.maximum_run >= 0.05
+    assert stats.maximum_wait >= 0.05
+
+
+def test_actions_of_different_keys_run_concurrently():
+    """Ensure that a slow action of a key does not delay the actions of other keys"""
+    executor = ActionExecutor()
+    release = threading.Event()
+    other_key_ran = threading.Event()
+
+    executor.submit("ABC123", 1, BACKGROUND_LANE, lambda _cancelled: release.wait(2))
+    executor.submit("ABC123", 2, BACKGROUND_LANE, lambda _cancelled: other_key_ran.set())
+
+    assert other_key_ran.wait(1)
+    release.set()
+    assert wait_until_idle(executor)
+    executor.stop()
+
+
+def test_cancel():
+    """Ensure that cancelling the actions of a key stops the running action and drops the others"""
+    executor = ActionExecutor()
+    started = threading.Event()
+    ran = []
+
+    def write(cancelled):
+        started.set()
+        cancelled.wait(2)
+        ran.append("write" if cancelled.is_set() else "write not cancelled")
+
+    executor.submit("ABC123", 1, KEYBOARD_LANE, write)
+    executor.submit("ABC123", 1, KEYBOARD_LANE, lambda _cancelled: ran.append("dropped"))
+    assert started.wait(1)
+    executor.cancel("ABC123", 1)
+    executor.submit("ABC123", 1, KEYBOARD_LANE, lambda _cancelled: ran.append("after cancel"))
+    assert wait_until_idle(executor)
+    executor.stop()
+
+    assert ran == ["write", "after cancel"]
+    assert executor.get_stats().cancelled == 1
+
+    executor.submit("ABC123", 1, KEYBOARD_LANE, lambda _cancelled: ran.append("after stop"))
+    assert "after stop" not in ran
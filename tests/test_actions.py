@@ -0,0 +1,52 @@
+from evdev import ecodes as e
+
+from streamdeck_ui.actions import NO_ACTIONS, ActionTable, compile_actions
+from streamdeck_ui.model import DEFAULT_BUTTON_STATE, ButtonMultiState, ButtonState
+
+
+def test_compile_actions():
+    """Ensure that the command, the keys and the pages are parsed once, when the actions are compiled"""
+    actions = compile_actions(
+        ButtonState(command="notify-send 'Hello world'", keys="ctrl+c, v", switch_page=2, switch_state=1)
+    )
+
+    assert actions.command_args == ["notify-send", "Hello world"]
+    assert actions.keycodes == [[e.KEY_LEFTCTRL, e.KEY_C], [e.KEY_V]]
+    assert actions.switch_page_index == 1
+    assert actions.switch_state_index == 0
+    assert not actions.command_error and not actions.keys_error
+
+
+def test_compile_actions_keeps_errors():
+    """Ensure that invalid commands and keys are reported when the key is pressed, not when it is compiled"""
+    actions = compile_actions(ButtonState(command="echo 'unterminated", keys="ctrl+not_a_key"))
+
+    assert actions.command_error
+    assert "not_a_key" in actions.keys_error
+    assert compile_actions(DEFAULT_BUTTON_STATE) is NO_ACTIONS
+
+
+def test_action_table_is_invalidated():
+    """Ensure that actions are compiled once, until the key changes"""
+    button = ButtonMultiState(state=0, states={0: ButtonState(command="first"), 1: ButtonState(command="second")})
+    lookups = []
+
+    def get_button(serial_number, page, key):
+        lookups.append((serial_number, page, key))
+        return button
+
+    table = ActionTable(get_button)
+    assert table.get("ABC123", 0, 1, 0).command == "first"
+    assert table.get("ABC123", 0, 1, 1).command == "second"
+    assert table.get("ABC123", 0, 1, 2) is NO_ACTIONS
+    assert len(lookups) == 1
+
+    button.states[0].command = "changed"
+    assert table.get("ABC123", 0, 1, 0).command == "first"
+    table.invalidate("ABC123", 0, 1)
+    assert table.get("ABC123", 0, 1, 0).command == "changed"
+
+    table.get("ABC123", 1, 1, 0)
+    table.invalidate("ABC123", 1)
+    assert ("ABC123", 1, 1) not in table.actions
+    assert ("ABC123", 0, 1) in table.actions
@@ -1,15 +1,22 @@
 import json
+from dataclasses import asdict
 from unittest.mock import mock_open, patch
 
 import pytest
 
 from streamdeck_ui.config import (
+    CONFIG_FILE_FULL_VERSION,
     CONFIG_FILE_PREVIOUS_VERSION,
     CONFIG_FILE_VERSION,
+    STATE_CACHE_SUFFIX,
+    StateChange,
+    append_to_journal,
+    config_file_need_migration,
+    journal_size,
     read_state_from_config,
     write_state_to_config,
 )
-from streamdeck_ui.model import ButtonMultiState, ButtonState, DeckState
+from streamdeck_ui.model import DEFAULT_BUTTON_STATE, ButtonMultiState, ButtonState, DeckState
 
 TEST_CONFIG_STATE = {
     "DL4XXXXXX": {
@@ -52,6 +59,13 @@ TEST_CONFIG_STATE = {
         "hass_ssl": False,
     }
 }
+TEST_CONFIG_STATE_V3 = {
+    "DL4XXXXXX": {
+        "buttons": {0: {}},
+        "display_timeout": 0,
+        "brightness": 0,
+    }
+}
 TEST_CONFIG_STATE_V1 = {
     "DL4XXXXXX": {
         "buttons": {
@@ -115,6 +129,7 @@ TEST_MODEL_STATE = {
     [
         (CONFIG_FILE_PREVIOUS_VERSION, None, TEST_CONFIG_STATE_V1),
         (CONFIG_FILE_PREVIOUS_VERSION, None, TEST_CONFIG_STATE_V1_WITH_MISSING_KEYS),
+        (CONFIG_FILE_FULL_VERSION, None, TEST_CONFIG_STATE),
         (CONFIG_FILE_VERSION, None, TEST_CONFIG_STATE),
         (CONFIG_FILE_VERSION + 1, ValueError, TEST_CONFIG_STATE)
     ],
@@ -156,5 +171,125 @@ def test_write_state_to_config(raise_exception, expected_exception):
                     m.assert_called_once_with("mock_path.tmp", "w")
                     mock_json_dump.assert_called_once()
                     mock_os_replace.assert_called_once()
-                    assert mock_json_dump.call_args[0][0]["state"] == TEST_CONFIG_STATE
+                    assert mock_json_dump.call_args[0][0]["state"] == TEST_CONFIG_STATE_V3
                     assert mock_json_dump.call_args[0][0]["streamdeck_ui_version"] == CONFIG_FILE_VERSION
+
+
+def test_journal_is_replayed_and_compacted(tmp_path):
+    """Ensure that changes recorded in the journal are applied, and that a large journal is compacted"""
+    config_path = str(tmp_path / "config.json")
+    write_state_to_config(
+        config_path, {"DL4XXXXXX": DeckState(buttons={0: {0: ButtonMultiState(states={0: ButtonState()})}})}
+    )
+    append_to_journal(
+        config_path,
+        [
+            StateChange("DL4XXXXXX", 0, 0, 0, "text", "first"),
+            StateChange("DL4XXXXXX", 0, 0, 0, "text", "second"),
+            StateChange("DL4XXXXXX", 1, 3, 0, "icon", "icon.png"),
+            StateChange("DL4XXXXXX", None, None, None, "brightness", 42),
+        ],
+    )
+
+    state = read_state_from_config(config_path)
+
+    assert state["DL4XXXXXX"].buttons[0][0].states[0].text == "second"
+    assert state["DL4XXXXXX"].buttons[1][3].states[0].icon == "icon.png"
+    assert state["DL4XXXXXX"].brightness == 42
+    # The journal is small, it is kept
+    assert journal_size(config_path) > 0
+
+    with patch("streamdeck_ui.config.STATE_JOURNAL_COMPACTION_SIZE", 0):
+        assert read_state_from_config(config_path) == state
+    assert journal_size(config_path) == 0
+    assert read_state_from_config(config_path) == state
+
+
+def test_full_config_is_migrated_without_loss(tmp_path):
+    """Ensure that a version 2 config file is read back the same after it is written in the compact format"""
+    config_path = str(tmp_path / "config.json")
+    button = ButtonMultiState(state=1, states={0: ButtonState(text="off"), 1: ButtonState(icon="on.png", font_size=20)})
+    full_config = {
+        "streamdeck_ui_version": CONFIG_FILE_FULL_VERSION,
+        "state": {
+            "DL4XXXXXX": {
+                "buttons": {
+                    0: {0: asdict(button), 1: asdict(ButtonMultiState(states={0: ButtonState()}))},
+                    1: {0: asdict(ButtonMultiState(states={0: ButtonState(keys="ctrl+c")}))},
+                },
+                **{
+                    name: value
+                    for name, value in asdict(DeckState(brightness=30, hass_ssl=True)).items()
+                    if name != "buttons"
+                },
+            }
+        },
+    }
+    with open(config_path, "w") as config_file:
+        json.dump(full_config, config_file)
+
+    state = read_state_from_config(config_path)
+    write_state_to_config(config_path, state)
+    with open(config_path) as config_file:
+        compact_config = json.load(config_file)
+
+    # Buttons that were never changed are created again when they are used
+    del state["DL4XXXXXX"].buttons[0][1]
+    assert read_state_from_config(config_path) == state
+    assert compact_config["streamdeck_ui_version"] == CONFIG_FILE_VERSION
+    assert compact_config["state"]["DL4XXXXXX"]["buttons"]["0"]["0"] == {
+        "state": 1,
+        "states": {"0": {"text": "off"}, "1": {"icon": "on.png", "font_size": 20}},
+    }
+
+
+def test_snapshot_is_used_until_the_config_file_changes(tmp_path):
+    """Ensure that the snapshot of the config file is read instead of the file, unless the file changed"""
+    config_path = str(tmp_path / "config.json")
+    state = {"DL4XXXXXX": DeckState(buttons={0: {0: ButtonMultiState(states={0: ButtonState(text="cached")})}})}
+    write_state_to_config(config_path, state)
+
+    with patch("json.load", side_effect=AssertionError("the config file was parsed")):
+        assert read_state_from_config(config_path) == state
+        assert not config_file_need_migration(config_path)
+
+    with open(config_path) as config_file:
+        config = json.load(config_file)
+    config["state"]["DL4XXXXXX"]["buttons"]["0"]["0"]["states"]["0"]["text"] = "edited"
+    with open(config_path, "w") as config_file:
+        json.dump(config, config_file)
+    assert read_state_from_config(config_path)["DL4XXXXXX"].buttons[0][0].states[0].text == "edited"
+
+    # A damaged snapshot is ignored
+    with open(config_path + STATE_CACHE_SUFFIX, "wb") as cache_file:
+        cache_file.write(b"\x00damaged")
+    assert read_state_from_config(config_path)["DL4XXXXXX"].buttons[0][0].states[0].text == "edited"
+
+
+def test_read_states_share_defaults_and_strings(tmp_path):
+    """Ensure that states without any change are the shared default state, and that fonts and colors are shared"""
+    config_path = str(tmp_path / "config.json")
+    font = "/usr/share/fonts/" + "Roboto-Regular.ttf"
+    config = {
+        "streamdeck_ui_version": CONFIG_FILE_VERSION,
+        "state": {
+            "DL4XXXXXX": {
+                "buttons": {
+                    "0": {
+                        "0": {"states": {"0": {"font": font, "font_color": "#ff0000"}, "1": {}}},
+                        "1": {"states": {"0": {"font": font, "font_color": "#ff0000"}}},
+                    }
+                }
+            }
+        },
+    }
+    with open(config_path, "w") as config_file:
+        json.dump(config, config_file)
+
+    for _ in range(2):
+        # The first time from the config file, the second time from its snapshot
+        buttons = read_state_from_config(config_path)["DL4XXXXXX"].buttons[0]
+        assert buttons[0].states[1] is DEFAULT_BUTTON_STATE
+        assert buttons[0].states[0].font == font
+        assert buttons[0].states[0].font is buttons[1].states[0].font
+        assert buttons[0].states[0].font_color is buttons[1].states[0].font_color
@@ -53,3 +53,30 @@ def test_pipeline():
     time = Fraction(0)
     final_image, _ = pipe.execute(time)
     assert final_image is not None
+
+
+SVG_ICON = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><title>{}</title><path d="{}" /></svg>'
+
+
+def test_inline_svg_icons_are_rasterized_once(monkeypatch):
+    rasterized = []
+    svg2png = image_filter.cairosvg.svg2png
+
+    def record_svg2png(svg, **kwargs):
+        rasterized.append(svg)
+        return svg2png(svg, **kwargs)
+
+    monkeypatch.setattr(image_filter.cairosvg, "svg2png", record_svg2png)
+    icon_on = SVG_ICON.format("rasterized once", "M0,0 L24,24 Z")
+    icon_off = SVG_ICON.format("rasterized once", "M24,0 L0,24 Z")
+
+    hashcodes = set()
+    # Toggle a light a few times, every state change creates new filters
+    for _ in range(3):
+        for icon in (icon_on, icon_off):
+            filter = image_filter.ImageFilter(icon)
+            filter.initialize((72, 72))
+            hashcodes.add(filter.current_frame[2])
+
+    assert rasterized == [icon_on, icon_off]
+    assert len(hashcodes) == 2
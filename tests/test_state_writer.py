@@ -0,0 +1,76 @@
+import json
+from time import sleep, time
+
+from streamdeck_ui.config import StateChange, journal_size, read_state_from_config
+from streamdeck_ui.model import DeckState
+from streamdeck_ui.state_writer import StateWriter
+
+
+def create_state(page: int):
+    return {"ABC123": DeckState(buttons={0: {}, 1: {}}, page=page)}
+
+
+def wait_until_written(writer: StateWriter):
+    deadline = time() + 5
+    while not writer.writes and time() < deadline:
+        sleep(0.01)
+
+
+def read_page(path) -> int:
+    with open(path) as config_file:
+        return json.load(config_file)["state"]["ABC123"].get("page", 0)
+
+
+def test_changes_are_written_once_per_burst(tmp_path):
+    path = tmp_path / "config.json"
+    state = create_state(0)
+    writer = StateWriter(str(path), lambda: state, delay=0.1)
+
+    for page in range(50):
+        state["ABC123"].page = page % 2
+        writer.mark_dirty()
+    assert not path.exists()
+
+    wait_until_written(writer)
+    # Give a second write the time to happen, if there was one
+    sleep(0.2)
+    assert writer.writes == 1
+    assert read_page(path) == 1
+
+
+def test_flush_writes_right_away(tmp_path):
+    path = tmp_path / "config.json"
+    state = create_state(1)
+    writer = StateWriter(str(path), lambda: state, delay=60)
+
+    writer.mark_dirty()
+    writer.flush()
+
+    assert read_page(path) == 1
+    # Nothing left to write
+    writer.flush()
+    assert writer.writes == 1
+
+
+def test_field_changes_are_appended_to_the_journal(tmp_path):
+    path = tmp_path / "config.json"
+    state = create_state(0)
+    writer = StateWriter(str(path), lambda: state, delay=60, journal=True)
+    # The state file is written in full the first time
+    writer.mark_dirty()
+    writer.flush()
+
+    state["ABC123"].page = 1
+    writer.mark_dirty(StateChange("ABC123", None, None, None, "page", 1))
+    writer.flush()
+
+    assert writer.writes == 1
+    assert read_page(path) == 0
+    assert read_state_from_config(str(path))["ABC123"].page == 1
+
+    # Other changes rewrite the state file, which includes the journal
+    writer.mark_dirty()
+    writer.flush()
+    assert writer.writes == 2
+    assert read_page(path) == 1
+    assert journal_size(str(path)) == 0
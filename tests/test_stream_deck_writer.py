@@ -0,0 +1,80 @@
+import threading
+from time import sleep
+
+from StreamDeck.Transport.Transport import TransportError
+
+from streamdeck_ui.mock_streamdeck import StreamDeckMock
+from streamdeck_ui.stream_deck_writer import StreamDeckWriter
+
+
+class RecordingStreamDeck(StreamDeckMock):
+    """A mock Stream Deck that records what is written to it."""
+
+    def __init__(self):
+        super().__init__(None)
+        self.writes = []
+
+    def set_key_image(self, key, image):
+        self.writes.append((key, image))
+
+    def set_brightness(self, percent):
+        self.writes.append(("brightness", percent))
+
+
+def wait_until_writing(writer: StreamDeckWriter):
+    while writer.images or writer.priority_images:
+        sleep(0.001)
+
+
+def test_latest_image_wins_and_priority_goes_first():
+    lock = threading.Lock()
+    deck = RecordingStreamDeck()
+    writer = StreamDeckWriter(lock, deck)
+    writer.start()
+
+    with lock:
+        # The writer picks up the first image and waits for the lock
+        writer.set_key_image(0, b"first")
+        wait_until_writing(writer)
+        writer.set_key_image(1, b"stale")
+        writer.set_key_image(1, b"latest")
+        writer.set_key_image(2, b"pressed", priority=True)
+    writer.flush()
+    writer.stop()
+
+    assert deck.writes == [(0, b"first"), (2, b"pressed"), (1, b"latest")]
+    assert writer.writes == 3
+    assert writer.replaced == 1
+
+
+def test_stop_writes_queued_commands():
+    deck = RecordingStreamDeck()
+    writer = StreamDeckWriter(threading.Lock(), deck)
+    writer.start()
+    writer.set_brightness(10)
+    writer.set_brightness(50)
+    writer.stop()
+
+    assert deck.writes == [("brightness", 50)]
+
+
+def test_transport_error_stops_writing():
+    class FailingStreamDeck(RecordingStreamDeck):
+        def set_key_image(self, key, image):
+            raise TransportError("unplugged")
+
+    writer = StreamDeckWriter(threading.Lock(), FailingStreamDeck())
+    writer.start()
+    writer.set_key_image(0, b"image")
+    writer.flush()
+
+    assert writer.failed.is_set()
+    writer.writer_thread.join(1)
+    assert not writer.writer_thread.is_alive()
+
+    # Unplugging queues a brightness change and a reset, then stops the writer
+    writer.set_brightness(50)
+    writer.reset()
+    assert writer.flush()
+    writer.stop()
+    assert writer.writer_thread is None